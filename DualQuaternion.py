@@ -0,0 +1,448 @@
+# Dual quaternion class for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# A dual quaternion r + εd (ε^2 = 0) with unitary real part represents a rigid transformation
+# of R3: the rotation r followed by the translation t, where d = t*r/2 and t is seen as a pure
+# quaternion. A point p is moved to r*p*r^-1 + t, that is, r.rotate_point(p, passive=True) + t.
+# The product σ1 * σ2 is the transformation that applies σ2 first and then σ1.
+
+from Quaternion import Quaternion, Versor
+from typing import Iterable
+import numpy as np
+import batch
+
+
+class DualQuaternion:
+    '''Class to represent dual quaternions.
+
+    Attributes:
+    - real: Quaternion, the real part (the rotation, if unitary)
+    - dual: Quaternion, the dual part (half the translation times the rotation)
+    - ACCURACY: range to handle with floating point
+    '''
+
+    ## Initializers ##
+    def __init__(self, real:Quaternion=None, dual:Quaternion=None, acc:float=1e-13):
+        '''Initializer of DualQuaternion object. As default, it is the identity transformation.
+
+        Arguments:
+        - real[Quaternion]: the real part; default value is Quaternion(1)
+        - dual[Quaternion]: the dual part; default value is Quaternion(0)
+        - acc[float]: accuracy of the dual quaternion
+        '''
+        real = Quaternion(1) if real is None else real
+        dual = Quaternion(0) if dual is None else dual
+
+        if not (isinstance(real, Quaternion) and isinstance(dual, Quaternion)):
+            raise TypeError("Both real and dual parts must be 'Quaternion'")
+
+        if not isinstance(acc, float):
+            raise TypeError("Accuracy must be a float")
+
+        self.real = Quaternion(*real.q, acc=acc)
+        self.dual = Quaternion(*dual.q, acc=acc)
+        self.ACCURACY = acc
+
+
+    @classmethod
+    def from_pose(cls, rotation:Quaternion=None, translation:Iterable[int|float]=(0,0,0)):
+        '''Generates a dual quaternion from a rotation followed by a translation.
+
+        Arguments:
+        - rotation[Quaternion]: the rotation (normalized if it is not unitary)
+        - translation[iterable]: vector in R3
+        '''
+        if not len(translation)==3:
+            raise TypeError("invalid length of translation: must be 3")
+
+        r = Quaternion(1) if rotation is None else rotation.normalize()
+        t = Quaternion(0, *translation)
+        return cls(r, t*r*0.5)
+
+    @classmethod
+    def from_translation(cls, translation:Iterable[int|float]=(0,0,0)):
+        '''Generates a dual quaternion from a pure translation.'''
+        return cls.from_pose(None, translation)
+
+    @classmethod
+    def from_matrix(cls, M):
+        '''Generates a dual quaternion from a 4x4 homogeneous matrix of a rigid transformation.'''
+        return DualQuaternionArray.from_matrices(np.asarray(M, dtype=float)[None])[0]
+
+
+
+    ## Properties ##
+    @property
+    def rotation(self) -> Versor:
+        '''Returns the rotation part, as a Versor.'''
+        return Versor(*self.real.q)
+
+    @property
+    def translation(self) -> tuple:
+        '''Returns the translation part, as a 3-tuple.'''
+        r = self.real
+        return ((self.dual*r.conjugate())*(2/r.square_norm())).vector
+
+    def to_matrix(self) -> np.ndarray:
+        '''Returns the 4x4 homogeneous matrix of the transformation.'''
+        return DualQuaternionArray(self.real.q + self.dual.q).to_matrices()[0]
+
+
+
+    ## Typing magic methods ##
+    def __str__(self) -> str:
+        '''Magic method to show a dual quaternion using print().'''
+        return f'({self.real}) + ε({self.dual})'
+
+    def __repr__(self) -> str:
+        '''Represents the dual quaternion as object declaration.'''
+        return f'DualQuaternion({self.real!r}, {self.dual!r})'
+
+
+
+    ## Operations ##
+    def __pos__(self):
+        '''Magic method to perform unary operation +object, that is a copy.'''
+        return DualQuaternion(self.real, self.dual, self.ACCURACY)
+
+    def __neg__(self):
+        '''Magic method to perform the unary operation -object. It represents the same
+        transformation.'''
+        return DualQuaternion(-self.real, -self.dual, self.ACCURACY)
+
+    def __add__(self, other):
+        '''Magic method to emulate the sum.'''
+        if not isinstance(other, DualQuaternion):
+            raise TypeError(f"unsupported operand type(s) for +: 'DualQuaternion' and '{type(other).__name__}'")
+        return DualQuaternion(self.real+other.real, self.dual+other.dual, self.ACCURACY)
+
+    def __sub__(self, other):
+        '''Magic method to emulate the subtraction.'''
+        if not isinstance(other, DualQuaternion):
+            raise TypeError(f"unsupported operand type(s) for -: 'DualQuaternion' and '{type(other).__name__}'")
+        return DualQuaternion(self.real-other.real, self.dual-other.dual, self.ACCURACY)
+
+    def __mul__(self, other):
+        '''Magic method to perform the product x * y, that is the composition of the
+        transformations (y first). With a real number, it performs the scalar product.'''
+        if isinstance(other, int|float):
+            return DualQuaternion(self.real*other, self.dual*other, self.ACCURACY)
+
+        if not isinstance(other, DualQuaternion):
+            raise TypeError(f"unsupported operand type(s) for *: 'DualQuaternion' and '{type(other).__name__}'")
+
+        return DualQuaternion(self.real*other.real, self.real*other.dual + self.dual*other.real,
+                              self.ACCURACY)
+
+    def __rmul__(self, other):
+        '''Magic method to perform the scalar product c * x.'''
+        if isinstance(other, int|float):
+            return self.__mul__(other)
+        raise TypeError(f"unsupported operand type(s) for *: '{type(other).__name__}' and 'DualQuaternion'")
+
+    def __eq__(self, other) -> bool:
+        '''Magic method to perform ==, componentwise up to ACCURACY.'''
+        if not isinstance(other, DualQuaternion):
+            return NotImplemented
+        return self.real == other.real and self.dual == other.dual
+
+    __hash__ = None
+
+
+    def conjugate(self):
+        '''Returns the quaternionic conjugate of both parts. For unitary dual quaternions it is
+        the inverse transformation.'''
+        return DualQuaternion(self.real.conjugate(), self.dual.conjugate(), self.ACCURACY)
+
+    def inverse(self):
+        '''Returns the inverse dual quaternion with respect to multiplication.'''
+        r_inv = self.real.inverse()
+        return DualQuaternion(r_inv, -(r_inv*self.dual*r_inv), self.ACCURACY)
+
+    def normalize(self):
+        '''Returns the unitary dual quaternion closest to this one: the real part is normalized
+        and the dual part is made orthogonal to it.'''
+        n = self.real.norm
+        if not n:
+            raise ZeroDivisionError("It's not possible to normalize a dual quaternion with zero real part")
+
+        r, d = self.real*(1/n), self.dual*(1/n)
+        d -= r*(r.real*d.real + r.i*d.i + r.j*d.j + r.k*d.k)
+        return DualQuaternion(r, d, self.ACCURACY)
+
+    def is_unit(self) -> bool:
+        '''Checks if the dual quaternion is unitary, that is, if it is a rigid transformation.'''
+        r, d = self.real, self.dual
+        return r.is_unit() and abs(r.real*d.real + r.i*d.i + r.j*d.j + r.k*d.k) < self.ACCURACY
+
+
+
+    ## Geometry ##
+    def transform_point(self, point:Iterable[int|float]) -> tuple:
+        '''Applies the rigid transformation to a given point.'''
+        if not len(point)==3:
+            raise TypeError("point must be a 3-dimensional iterable of floats")
+
+        rotated = self.real.rotate_point(point, passive=True)
+        return tuple(a+b for a, b in zip(rotated, self.translation))
+
+    def sclerp(self, other, t:float):
+        '''Screw linear interpolation between self (t = 0) and other (t = 1).'''
+        return DualQuaternionArray(self.real.q + self.dual.q).sclerp(
+            DualQuaternionArray(other.real.q + other.dual.q), t)[0]
+
+# End of DualQuaternion class
+
+
+
+class DualQuaternionArray:
+    '''Class to represent arrays of dual quaternions, stored in a numpy array of shape (N, 8)
+    whose rows are the components of the real part followed by those of the dual part.
+
+    Attributes:
+    - data: array of shape (N, 8)
+    '''
+
+    def __init__(self, data):
+        '''Initializer of DualQuaternionArray object.
+
+        Arguments:
+        - data: array-like of shape (8,) or (N, 8), or an iterable of DualQuaternion objects
+        '''
+        if isinstance(data, DualQuaternion):
+            data = [data]
+
+        if not isinstance(data, np.ndarray):
+            data = list(data)
+            if data and all(isinstance(item, DualQuaternion) for item in data):
+                data = [item.real.q + item.dual.q for item in data]
+
+        data = np.asarray(data, dtype=float)
+        if data.ndim == 1:
+            data = data.reshape(1, -1) if data.size else data.reshape(0, 8)
+
+        if data.ndim != 2 or data.shape[1] != 8:
+            raise ValueError(f"invalid shape {data.shape}: it must be (N, 8)")
+
+        self.data = data
+
+
+    @classmethod
+    def from_poses(cls, rotations, translations):
+        '''Generates dual quaternions from rotations (N, 4) followed by translations (N, 3).'''
+        r = batch.normalize(rotations)
+        t = np.asarray(translations, dtype=float).reshape(-1, 3)
+        t4 = np.concatenate((np.zeros((t.shape[0], 1)), t), axis=1)
+
+        d = 0.5*batch.multiply(t4, r)
+        r = np.broadcast_to(r, d.shape)
+        return cls(np.concatenate((r, d), axis=1))
+
+    @classmethod
+    def from_matrices(cls, M):
+        '''Generates dual quaternions from an array of shape (N, 4, 4) of homogeneous matrices.'''
+        M = np.asarray(M, dtype=float).reshape(-1, 4, 4)
+        R = M[:, :3, :3]
+        trace = np.trace(R, axis1=1, axis2=2)
+
+        # The largest among 4w^2, 4x^2, 4y^2, 4z^2 gives a stable extraction
+        diag = np.stack((trace, R[:, 0, 0], R[:, 1, 1], R[:, 2, 2]), axis=1)
+        diag = np.concatenate((diag[:, :1], 2*diag[:, 1:] - trace[:, None]), axis=1)
+        best = np.argmax(diag, axis=1)
+
+        r = np.empty((M.shape[0], 4))
+        s = np.sqrt(np.maximum(1 + diag[np.arange(M.shape[0]), best], 0)) * 2
+        for k in range(4):
+            m, Rk, sk = best == k, R[best == k], s[best == k]
+            if not np.any(m):
+                continue
+            if k == 0:
+                r[m] = np.stack((sk/4, (Rk[:, 2, 1]-Rk[:, 1, 2])/sk, (Rk[:, 0, 2]-Rk[:, 2, 0])/sk,
+                                 (Rk[:, 1, 0]-Rk[:, 0, 1])/sk), axis=1)
+            elif k == 1:
+                r[m] = np.stack(((Rk[:, 2, 1]-Rk[:, 1, 2])/sk, sk/4, (Rk[:, 0, 1]+Rk[:, 1, 0])/sk,
+                                 (Rk[:, 0, 2]+Rk[:, 2, 0])/sk), axis=1)
+            elif k == 2:
+                r[m] = np.stack(((Rk[:, 0, 2]-Rk[:, 2, 0])/sk, (Rk[:, 0, 1]+Rk[:, 1, 0])/sk, sk/4,
+                                 (Rk[:, 1, 2]+Rk[:, 2, 1])/sk), axis=1)
+            else:
+                r[m] = np.stack(((Rk[:, 1, 0]-Rk[:, 0, 1])/sk, (Rk[:, 0, 2]+Rk[:, 2, 0])/sk,
+                                 (Rk[:, 1, 2]+Rk[:, 2, 1])/sk, sk/4), axis=1)
+
+        return cls.from_poses(r, M[:, :3, 3])
+
+
+    ## Access ##
+    @property
+    def real(self) -> np.ndarray:
+        '''Returns the (N, 4) array of the real parts.'''
+        return self.data[:, :4]
+
+    @property
+    def dual(self) -> np.ndarray:
+        '''Returns the (N, 4) array of the dual parts.'''
+        return self.data[:, 4:]
+
+    @property
+    def translations(self) -> np.ndarray:
+        '''Returns the (N, 3) array of the translations.'''
+        r = self.real
+        t = 2*batch.multiply(self.dual, batch.conjugate(r))
+        return t[:, 1:] / np.einsum('ij,ij->i', r, r)[:, None]
+
+    def to_matrices(self) -> np.ndarray:
+        '''Returns the (N, 4, 4) array of the homogeneous matrices of the transformations.'''
+        M = np.zeros((len(self), 4, 4))
+        M[:, :3, :3] = batch.rotation_matrices(self.real, passive=True)
+        M[:, :3, 3] = self.translations
+        M[:, 3, 3] = 1
+        return M
+
+    def __len__(self) -> int:
+        '''Magic method to return the number of dual quaternions.'''
+        return self.data.shape[0]
+
+    def __getitem__(self, index):
+        '''Magic method to get a DualQuaternion (integer index) or a sub-array (slices, masks).'''
+        if isinstance(index, int|np.integer):
+            row = [float(x) for x in self.data[index]]
+            return DualQuaternion(Quaternion(*row[:4]), Quaternion(*row[4:]))
+        return DualQuaternionArray(self.data[index])
+
+    def __repr__(self) -> str:
+        '''Represents the array as object declaration.'''
+        return f'DualQuaternionArray({self.data!r})'
+
+
+
+    ## Operations ##
+    def __mul__(self, other):
+        '''Magic method to perform the rowwise product (composition). Arrays of length 1 are
+        broadcast.'''
+        if isinstance(other, int|float):
+            return DualQuaternionArray(self.data*other)
+
+        if isinstance(other, DualQuaternion):
+            other = DualQuaternionArray(other)
+
+        if not isinstance(other, DualQuaternionArray):
+            raise TypeError(f"unsupported operand type(s) for *: 'DualQuaternionArray' and '{type(other).__name__}'")
+
+        r = batch.multiply(self.real, other.real)
+        d = batch.multiply(self.real, other.dual) + batch.multiply(self.dual, other.real)
+        return DualQuaternionArray(np.concatenate((r, d), axis=1))
+
+    def conjugate(self):
+        '''Returns the quaternionic conjugate of both parts of every element.'''
+        return DualQuaternionArray(self.data * np.array([1, -1, -1, -1, 1, -1, -1, -1.0]))
+
+    def inverse(self):
+        '''Returns the inverse of every element with respect to multiplication.'''
+        r = self.real
+        n = np.einsum('ij,ij->i', r, r)
+        if np.any(n == 0):
+            raise ZeroDivisionError("It's not possible to invert a dual quaternion with zero real part")
+
+        r_inv = batch.conjugate(r) / n[:, None]
+        d = -batch.multiply(batch.multiply(r_inv, self.dual), r_inv)
+        return DualQuaternionArray(np.concatenate((r_inv, d), axis=1))
+
+    def normalize(self):
+        '''Returns the closest unitary dual quaternions (see DualQuaternion.normalize).'''
+        n = np.linalg.norm(self.real, axis=1)
+        if np.any(n == 0):
+            raise ZeroDivisionError("It's not possible to normalize a dual quaternion with zero real part")
+
+        r, d = self.real / n[:, None], self.dual / n[:, None]
+        d = d - r*np.einsum('ij,ij->i', r, d)[:, None]
+        return DualQuaternionArray(np.concatenate((r, d), axis=1))
+
+
+
+    ## Geometry ##
+    def transform_points(self, points) -> np.ndarray:
+        '''Applies the transformations to the points, rowwise.
+
+        Arguments:
+        - points: array of shape (N, 3), or (P, 3) if the array contains a single element
+        '''
+        points = np.asarray(points, dtype=float)
+        return batch.rotate_points(self.real, points, passive=True) + self.translations
+
+    def sclerp(self, other, t) -> 'DualQuaternionArray':
+        '''Screw linear interpolation, rowwise, between self (t = 0) and other (t = 1).
+
+        The shortest path is taken, replacing other with -other when needed.
+
+        Arguments:
+        - other[DualQuaternionArray]: final transformations
+        - t: float or array of shape (N,) of parameters
+        '''
+        a, b = self.normalize(), other.normalize()
+        delta = (a.conjugate() * b).data
+        delta *= np.where(delta[:, 0] < 0, -1.0, 1.0)[:, None]
+
+        t = np.asarray(t, dtype=float).reshape(-1)
+        n = max(delta.shape[0], t.shape[0])
+        delta, t = np.broadcast_to(delta, (n, 8)), np.broadcast_to(t, (n,))
+
+        # Screw parameters of delta: angle theta, axis l, pitch p, moment m
+        w, v = delta[:, 0], delta[:, 1:4]
+        dw, dv = delta[:, 4], delta[:, 5:]
+        s = np.linalg.norm(v, axis=1)
+        screw = s > 1e-12
+        safe = np.where(screw, s, 1.0)
+
+        theta = 2*np.arctan2(s, w)
+        l = v / safe[:, None]
+        p = -2*dw / safe
+        m = (dv - 0.5*(p*w)[:, None]*l) / safe[:, None]
+
+        half, pt = 0.5*t*theta, t*p
+        c, sn = np.cos(half), np.sin(half)
+
+        out = np.empty((n, 8))
+        out[:, 0] = c
+        out[:, 1:4] = sn[:, None]*l
+        out[:, 4] = -0.5*pt*sn
+        out[:, 5:] = (0.5*pt*c)[:, None]*l + sn[:, None]*m
+
+        # Pure translations: the power is a scaling of the dual part
+        pure = ~screw
+        out[pure, :4] = [1.0, 0, 0, 0]
+        out[pure, 4:] = t[pure, None]*delta[pure, 4:]
+
+        return a * DualQuaternionArray(out)
+
+    @staticmethod
+    def blend(bones, indices, weights) -> 'DualQuaternionArray':
+        '''Dual quaternion linear blending (DLB).
+
+        For every row of indices, the corresponding bones are summed with the given weights
+        (after aligning their signs with the first one) and the result is normalized.
+
+        Arguments:
+        - bones[DualQuaternionArray]: the B transformations
+        - indices: integer array of shape (V, K) of bone indices
+        - weights: array of shape (V, K) of weights
+        '''
+        indices = np.asarray(indices)
+        weights = np.asarray(weights, dtype=float)
+        if indices.shape != weights.shape:
+            raise ValueError("indices and weights must have the same shape")
+
+        selected = bones.data[indices]
+        signs = np.einsum('vkj,vj->vk', selected[:, :, :4], selected[:, 0, :4])
+        weights = np.where(signs < 0, -weights, weights)
+
+        return DualQuaternionArray(np.einsum('vk,vkj->vj', weights, selected)).normalize()
+
+    @staticmethod
+    def skin(bones, indices, weights, points) -> np.ndarray:
+        '''Deforms the points (V, 3) by dual quaternion skinning: every point is moved by the
+        blend of its bones (see blend).'''
+        return DualQuaternionArray.blend(bones, indices, weights).transform_points(points)
+
+# End of DualQuaternionArray class
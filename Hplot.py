@@ -4,9 +4,14 @@
 # Licence:      MIT 2025
 
 from Quaternion import Quaternion
+import batch
+import numpy as np
 import matplotlib.pyplot as plt
 from numpy import arange, linspace
 from matplotlib.colors import hsv_to_rgb
+from matplotlib.animation import FuncAnimation
+from mpl_toolkits.mplot3d.art3d import Line3DCollection, Poly3DCollection
+from time import perf_counter
 from typing import Iterable
 from math import inf, ceil, sqrt
 from functools import wraps
@@ -188,37 +193,94 @@ def distplot(H_points:Iterable[Quaternion]):
 
 
 @__are_quaternions
-def pathplot(H_points:Iterable[Quaternion], /, colored:bool=True):
+def pathplot(H_points:Iterable[Quaternion], /, colored:bool=True, geodesic:bool=False,
+             samples:int=16, view:str='vector', edges=None):
     '''Draws a 3-dimensional graph of the list of quaternion, connected according to
     the minimum mutual distances.
     
     The three imaginary parts are the coordinates in R3, while the real part determines
-    the color of the point.
+    the color of the point. Points and links are drawn as two collections, so that large
+    graphs remain drawable.
 
     Arguments:
     - H_points: an iterable of quaternions
     - colored[bool]: if set to false, the graph will be graduated from black to red
+    - geodesic[bool]: if set to true, the quaternions are normalized and every link is the
+    great arc of S^3 between its ends (sampled with slerp), instead of a straight chord
+    - samples[int]: number of points of each great arc
+    - view[str]: 'vector' (imaginary parts) or 'stereo' (stereographic projection from the
+    north pole, see stereo_pjrN)
+    - edges: array of shape (E, 2) of the indices of the linked quaternions; default value are
+    the links to the nearest quaternions (see linkEdges, whose cost grows as N^2)
     '''
-    Colors = __getColors(H_points,colored)
+    if view not in ('vector', 'stereo'):
+        raise AttributeError(f"View `{view}` is not a valid view: it must be 'vector' or 'stereo'.")
+
+    Colors = list(__getColors(H_points,colored))
+    H = batch.as_array(H_points)
+    if geodesic:
+        H = batch.normalize(H)
     ax = __getPicture()
-    
-    # Plotting the (colored) points
-    for item, col in zip(H_points, Colors):
-            ax.plot(item.i, item.j, item.k, 'o', c=col)
 
-    # Adding the links among points
-    for item in H_points:
-        dist = tuple(__distance(item,k) if k!=item else inf for k in H_points)
-        minimum = min(dist)
-        repet = (k for k in range(len(dist)) if dist[k]==minimum)
-        
-        for p in repet:
-            dx = H_points[p]
-            ax.plot([item.i,dx.i], [item.j,dx.j], [item.k,dx.k], 'black', linestyle='-')
+    first, second = linkEdges(H) if edges is None else np.asarray(edges, dtype=np.intp).reshape(-1, 2).T
+    if geodesic:
+        curves = geodesic_edges(H[first], H[second], samples)
+    else:
+        curves = np.stack((H[first], H[second]), axis=1)
+
+    project = stereographic if view == 'stereo' else lambda x: x[..., 1:]
+    points = project(H)
+    ax.scatter(*points.T, c=Colors, depthshade=False)
+    ax.add_collection3d(Line3DCollection(project(curves), colors='black', linewidths=1))
 
     plt.show()
 
 
+def linkEdges(H_points, chunk:int=256) -> tuple[np.ndarray]:
+    '''Returns the links drawn by pathplot (see getPaths) as two arrays of indices (first,
+    second), with first < second and without repetitions.
+
+    Every quaternion is linked to all its nearest ones (in the euclidean distance of R4). The
+    candidates are found by matrix products, chunk rows at a time, and their distances are then
+    computed exactly, so that ties are the same of getPaths.
+    '''
+    H = batch.as_array(H_points)
+    N = len(H)
+    sq = np.einsum('ij,ij->i', H, H)
+    first, second = [], []
+    for start in range(0, N, chunk):
+        rows = arange(start, min(start + chunk, N))
+
+        # |a - b|^2 without the term |a|^2, constant along each row
+        D = H[rows] @ H.T
+        D *= -2
+        D += sq
+        D[rows - start, rows] = inf
+        lowest = D.min(axis=1)
+        i, j = np.nonzero(D <= (lowest + 1e-12*(sq[rows] + sq.max()))[:, None])
+
+        exact = np.sum((H[rows[i]] - H[j])**2, axis=1)
+        best = np.full(len(rows), inf)
+        np.minimum.at(best, i, exact)
+        keep = exact == best[i]
+        first.append(rows[i[keep]])
+        second.append(j[keep])
+
+    first, second = np.concatenate(first), np.concatenate(second)
+    edges = np.unique(np.stack((np.minimum(first, second), np.maximum(first, second)), axis=1), axis=0)
+    return edges[:, 0], edges[:, 1]
+
+
+def geodesic_edges(p, q, samples:int=16) -> np.ndarray:
+    '''Returns the (E, samples, 4) array of points along the great arcs of S^3 from the rows of
+    p to the rows of q (normalized if not unitary), computed by a single slerp on all the edges.
+    The arcs join the given quaternions, not the closest of q and -q.'''
+    p, q = batch.normalize(p), batch.normalize(q)
+    t = np.tile(linspace(0, 1, samples), len(p))
+    arcs = batch.slerp(np.repeat(p, samples, axis=0), np.repeat(q, samples, axis=0), t, shortest=False)
+    return arcs.reshape(len(p), samples, 4)
+
+
 @__are_quaternions
 def stereo_pjrN(H_points:Iterable[Quaternion], /):
     '''Draws a 3-dimensional graph of the given list of quaternions according to the
@@ -346,4 +408,385 @@ def stereo_4321(H_points:Iterable[Quaternion], poles:Iterable[str]=('North','Nor
     plt.plot(xx, R1, '*')
     plt.show()
 
+
+## Hopf fibration (vectorized)
+def hopf_map(H_points) -> np.ndarray:
+    '''Returns the (N, 3) array of the images of the given quaternions (normalized if not
+    unitary) by the Hopf map S^3 -> S^2, q -> q*k*q^-1.
+
+    The quaternions q*exp(k*t), for every t, have the same image: they form the fibre over it,
+    a great circle of S^3. Accepts an iterable of quaternions or an array of shape (N, 4).
+    '''
+    a, b, c, d = batch.normalize(H_points).T
+    return np.stack((2*(b*d + a*c), 2*(c*d - a*b), a*a + d*d - b*b - c*c), axis=1)
+
+
+def hopf_fibres(H_points, samples:int=64) -> np.ndarray:
+    '''Returns the (N, samples, 4) array of the fibres through the given quaternions, that is
+    the closed circles q*exp(k*t) for samples values of t from 0 to 2*pi.'''
+    q = batch.normalize(H_points)
+    t = linspace(0, 2*np.pi, samples)
+    x, z = np.cos(t), np.sin(t)
+    a, b, c, d = (q[:, i, None] for i in range(4))
+
+    # q * (x + z*k)
+    return np.stack((a*x - d*z, b*x + c*z, c*x - b*z, a*z + d*x), axis=-1)
+
+
+def stereographic(H_points, north:bool=True) -> np.ndarray:
+    '''Returns the stereographic projections S^3 -> R^3 of an array of quaternions of shape
+    (..., 4), normalized if not unitary (see stereo_pjrN and stereo_prjS). The pole itself is
+    mapped to nan.'''
+    H = np.asarray(H_points, dtype=float)
+    H = H / np.linalg.norm(H, axis=-1, keepdims=True)
+    den = 1 - H[..., 3] if north else 1 + H[..., 3]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den[..., None] > 0, H[..., :3] / den[..., None], np.nan)
+
+
+def __sphereColors(points:np.ndarray) -> np.ndarray:
+    '''Returns the colors of points of S^2: the hue is the longitude, the brightness the height.'''
+    hue = (np.arctan2(points[:, 1], points[:, 0]) / (2*np.pi)) % 1
+    value = 0.3 + 0.35*(points[:, 2] + 1)
+    return hsv_to_rgb(np.stack((hue, np.ones_like(hue), value), axis=1))
+
+
+def hopfplot(H_points, /, fibres:int=32, samples:int=64, max_points:int=50000, north:bool=True,
+             limit:float=10, seed=None):
+    '''Draws the Hopf fibration of the given quaternions: on the left, their images on S^2 by the
+    Hopf map; on the right, the fibres over some of them, stereographically projected in R^3.
+    Base points and fibres share their colors, and each set is drawn as a single collection.
+
+    To keep the figure interactive with millions of orientations, only a random subsample is
+    drawn.
+
+    Arguments:
+    - H_points: iterable of quaternions or array of shape (N, 4)
+    - fibres[int]: number of fibres drawn
+    - samples[int]: number of points of each fibre
+    - max_points[int]: maximum number of base points drawn
+    - north[bool]: pole of the stereographic projection (see stereographic)
+    - limit[float]: fibre points farther than limit from the origin are not drawn (the fibres
+    through the pole are lines)
+    - seed: seed of the random subsamples
+    '''
+    H = batch.normalize(H_points)
+    if not len(H):
+        raise ValueError('Invalid input: at least one quaternion is needed')
+
+    rng = np.random.default_rng(seed)
+    shown = H if len(H) <= max_points else H[rng.choice(len(H), max_points, replace=False)]
+    chosen = shown[rng.choice(len(shown), min(fibres, len(shown)), replace=False)]
+
+    fig = plt.figure(figsize=(12, 6))
+    base = hopf_map(shown)
+    ax = fig.add_subplot(1, 2, 1, projection='3d')
+    ax.scatter(*base.T, c=__sphereColors(base), s=2, depthshade=False, rasterized=True)
+    ax.set_box_aspect((1, 1, 1))
+    ax.set_title('Base points on S^2')
+
+    curves = stereographic(hopf_fibres(chosen, samples), north)
+    curves[np.linalg.norm(curves, axis=-1) > limit] = np.nan
+    ax = fig.add_subplot(1, 2, 2, projection='3d')
+    ax.add_collection3d(Line3DCollection(curves, colors=__sphereColors(hopf_map(chosen)), linewidths=1))
+    bound = min(limit, np.nanmax(np.abs(curves))) if np.any(np.isfinite(curves)) else limit
+    ax.set_xlim(-bound, bound)
+    ax.set_ylim(-bound, bound)
+    ax.set_zlim(-bound, bound)
+    ax.set_box_aspect((1, 1, 1))
+    ax.set_title('Fibres in R^3')
+
+    plt.show()
+
+
+## Escape-time sets
+def __coarsen(filled:np.ndarray, factor:int) -> np.ndarray:
+    '''Returns the boolean grid with blocks of factor^3 cells merged (a block is filled if any
+    of its cells is).'''
+    shape = [-(-n // factor)*factor for n in filled.shape]
+    padded = np.zeros(shape, dtype=bool)
+    padded[:filled.shape[0], :filled.shape[1], :filled.shape[2]] = filled
+    nx, ny, nz = (n // factor for n in shape)
+    return padded.reshape(nx, factor, ny, factor, nz, factor).any(axis=(1, 3, 5))
+
+def escape_surface(filled:np.ndarray, bounds=None) -> tuple[np.ndarray]:
+    '''Returns the boundary of a set of cells of a 3D grid, as the (F, 4, 3) array of the
+    corners of its exposed faces (the faces between a filled cell and an empty one or the
+    outside) and the (F, 3) array of their outer normals.
+
+    Arguments:
+    - filled: boolean array of shape (nx, ny, nz)
+    - bounds: three pairs (low, high) of the coordinates of the centres of the first and last
+    cells along each axis (see fractal.slice_points); default value is the indices of the cells
+    '''
+    filled = np.asarray(filled, dtype=bool)
+    P = np.pad(filled, 1)
+    square = np.array([(0, 0), (1, 0), (1, 1), (0, 1)])
+    quads, normals = [], []
+    for axis in range(3):
+        others = [a for a in range(3) if a != axis]
+        for sign in (-1, 1):
+            exposed = (P & ~np.roll(P, -sign, axis))[1:-1, 1:-1, 1:-1]
+            cells = np.argwhere(exposed)
+            offsets = np.zeros((4, 3))
+            offsets[:, axis] = sign > 0
+            offsets[:, others] = square
+            quads.append(cells[:, None, :] + offsets - 0.5)
+            normal = np.zeros((len(cells), 3))
+            normal[:, axis] = sign
+            normals.append(normal)
+
+    quads, normals = np.concatenate(quads), np.concatenate(normals)
+    if bounds is not None:
+        bounds = np.asarray(bounds, dtype=float)
+        step = (bounds[:, 1] - bounds[:, 0]) / np.maximum(np.array(filled.shape) - 1, 1)
+        quads = bounds[:, 0] + quads*step
+    return quads, normals
+
+
+def escapeplot(counts:np.ndarray, /, bounds=None, level:int=None, view:str='surface',
+               max_faces:int=300000, max_side:int=48, cmap:str='viridis'):
+    '''Draws the set of the points of a 3D slice whose orbits did not escape, from the escape
+    times computed by fractal.julia or fractal.mandelbrot.
+
+    Arguments:
+    - counts: array of shape (nx, ny, nz) of the escape times
+    - bounds: the bounds of the slice (see fractal.slice_points); default value is the indices
+    - level[int]: the points with counts >= level are drawn; default value is the largest count
+    (the orbits that never escaped)
+    - view[str]: 'surface' draws the boundary of the set as a single collection of shaded faces
+    (see escape_surface); 'voxels' draws the cells with Axes3D.voxels, which creates an artist
+    for each cell and is suited to coarse grids
+    - max_faces[int]: with 'surface', the grid is coarsened until the faces are fewer
+    - max_side[int]: with 'voxels', the grid is coarsened until its sides are shorter
+    - cmap[str]: colormap of the height (third axis)
+    '''
+    if view not in ('surface', 'voxels'):
+        raise ValueError(f"invalid view `{view}`: it must be 'surface' or 'voxels'")
+    counts = np.asarray(counts)
+    if counts.ndim != 3:
+        raise ValueError('Invalid input: counts must be a 3-dimensional array')
+
+    filled = counts >= (counts.max() if level is None else level)
+    bounds = np.array([(0, n - 1) for n in counts.shape] if bounds is None else bounds, dtype=float)
+    colormap = plt.get_cmap(cmap)
+    fig = plt.figure()
+    ax = fig.add_subplot(projection='3d')
+
+    step = (bounds[:, 1] - bounds[:, 0]) / np.maximum(np.array(filled.shape) - 1, 1)
+    if view == 'surface':
+        factor = 1
+        quads, normals = escape_surface(filled)
+        while len(quads) > max_faces and factor < max(filled.shape):
+            factor *= 2
+            quads, normals = escape_surface(__coarsen(filled, factor))
+        # from the indices of the coarse cells to the coordinates of the slice
+        quads = bounds[:, 0] + (quads*factor + (factor - 1)/2)*step
+
+        height = quads[:, :, 2].mean(axis=1)
+        colors = colormap((height - bounds[2, 0]) / max(bounds[2, 1] - bounds[2, 0], 1e-12))
+        light = np.array([0.4, 0.3, 0.87])
+        colors[:, :3] *= (0.45 + 0.55*np.clip(normals @ light, 0, 1))[:, None]
+        ax.add_collection3d(Poly3DCollection(quads, facecolors=colors, edgecolors='none'), autolim=False)
+    else:
+        factor = max(1, ceil(max(filled.shape) / max_side))
+        grid = __coarsen(filled, factor) if factor > 1 else filled
+        corners = [bounds[a, 0] + (np.arange(grid.shape[a] + 1)*factor - 0.5)*step[a] for a in range(3)]
+        x, y, z = np.meshgrid(*corners, indexing='ij')
+        height = (np.arange(grid.shape[2]) + 0.5) / grid.shape[2]
+        colors = np.broadcast_to(colormap(height), (*grid.shape, 4))
+        ax.voxels(x, y, z, grid, facecolors=colors, edgecolor='none')
+
+    ax.set_xlim(*bounds[0])
+    ax.set_ylim(*bounds[1])
+    ax.set_zlim(*bounds[2])
+    ax.set_box_aspect(tuple(bounds[:, 1] - bounds[:, 0]))
+    plt.show()
+
+
+
+## Live plotting
+class LivePlot:
+    '''Class to watch a stream of quaternions.
+
+    The last `capacity` quaternions are kept in a ring buffer and drawn on a single figure,
+    whose artists (a trail and a marker on the newest point) are created once: new batches only
+    change their data. With blitting, every frame restores the saved background (axes, panes,
+    labels) and draws the two artists on it, instead of redrawing the whole 3D scene. The
+    background is saved again after every full draw, for example after the view is rotated.
+
+    Batches can be appended faster than the screen refreshes (e.g. a 200 Hz sensor): frames are
+    drawn at most max_fps times per second, and the buffer keeps every sample in the meantime.
+
+    Attributes:
+    - capacity: number of quaternions kept
+    - mode: 'vector' (imaginary parts, as Hplot), 'hopf' (Hopf map to S^2, as hopfplot) or
+    'stereo' (stereographic projection from the north pole)
+    - fig, ax: figure and 3D axes of the plot
+    - trail, head: the persistent artists
+    '''
+
+    MODES = ('vector', 'hopf', 'stereo')
+
+    def __init__(self, capacity:int=1000, mode:str='vector', colored:bool=True, blit:bool=True,
+                 max_fps:float=60, limit:float=None):
+        '''Initializer of LivePlot object.
+
+        Arguments:
+        - capacity[int]: size of the ring buffer; default value is 1000
+        - mode[str]: projection of the quaternions (see MODES); default value is 'vector'
+        - colored[bool]: if set to false, the trail is black, else its color follows the real part
+        - blit[bool]: if set to false, every frame redraws the whole figure
+        - max_fps[float]: maximum number of frames drawn per second by append
+        - limit[float]: half side of the (fixed) box shown; default value is 1 ('vector' and
+        'hopf', whose points lie in the unit ball) or 3 ('stereo')
+        '''
+        if not isinstance(capacity, int) or capacity < 2:
+            raise ValueError("capacity must be an integer larger than 1")
+        if mode not in self.MODES:
+            raise AttributeError(f"invalid mode `{mode}`: it must be one of {self.MODES}")
+
+        self.capacity = capacity
+        self.mode = mode
+        self.colored = colored
+        self.blit = blit
+        self.max_fps = max_fps
+        self._buffer = np.zeros((capacity, 4))
+        self._next = 0
+        self._count = 0
+        self._last_draw = -inf
+        self._background = None
+
+        # same axes of __getPicture (whose name would be mangled inside the class)
+        self.ax = plt.figure().add_subplot(projection='3d')
+        self.ax.set_xlabel('i axis')
+        self.ax.set_ylabel('j axis')
+        self.ax.set_zlabel('k axis')
+        self.fig = self.ax.figure
+        limit = limit or (3 if mode == 'stereo' else 1)
+        self.ax.set_xlim(-limit, limit)
+        self.ax.set_ylim(-limit, limit)
+        self.ax.set_zlim(-limit, limit)
+        self.ax.set_box_aspect((1, 1, 1))
+
+        self.trail = Line3DCollection([], linewidths=1, colors='black', animated=blit)
+        self.ax.add_collection3d(self.trail, autolim=False)
+        self.head, = self.ax.plot([], [], [], 'o', c='red', animated=blit)
+        self.fig.canvas.mpl_connect('draw_event', self.__on_draw)
+
+
+    ## Ring buffer ##
+    def __len__(self) -> int:
+        '''Returns the number of quaternions in the buffer.'''
+        return self._count
+
+    @property
+    def data(self) -> np.ndarray:
+        '''Returns the quaternions in the buffer, from the oldest to the newest, as an array of
+        shape (len(self), 4).'''
+        if self._count < self.capacity:
+            return self._buffer[:self._count].copy()
+        return np.concatenate((self._buffer[self._next:], self._buffer[:self._next]))
+
+    def append(self, H_points, draw:bool=True):
+        '''Appends quaternions to the ring buffer (the oldest ones are dropped) and, if draw is
+        True and the last frame is older than 1/max_fps seconds, draws a new frame.
+
+        Arguments:
+        - H_points: a Quaternion, an iterable of quaternions or an array of shape (N, 4)
+        - draw[bool]: if set to false, only the buffer is updated
+        '''
+        arr = batch.as_array(H_points)[-self.capacity:]
+        n = arr.shape[0]
+        self._buffer[(self._next + arange(n)) % self.capacity] = arr
+        self._next = (self._next + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+        if draw and perf_counter() - self._last_draw >= 1/self.max_fps:
+            self.draw()
+
+    def clear(self):
+        '''Empties the ring buffer.'''
+        self._next = self._count = 0
+        self.draw()
+
+
+    ## Drawing ##
+    def __project(self, H:np.ndarray) -> np.ndarray:
+        '''Returns the points in R^3 of the quaternions, according to the mode.'''
+        if self.mode == 'hopf':
+            return hopf_map(H)
+        if self.mode == 'stereo':
+            return stereographic(H)
+        return H[:, 1:]
+
+    def update(self) -> tuple:
+        '''Sets the data of the artists from the buffer (without drawing) and returns them.'''
+        H = self.data
+        P = self.__project(H) if len(H) else np.empty((0, 3))
+        self.trail.set_segments(np.stack((P[:-1], P[1:]), axis=1))
+        if self.colored and len(H) > 1:
+            hue = (np.clip(H[1:, 0] / np.maximum(np.linalg.norm(H[1:], axis=1), 1e-300), -1, 1) + 1)/2
+            self.trail.set_color(hsv_to_rgb(np.stack((hue, np.ones_like(hue), np.ones_like(hue)), axis=1)))
+        self.head.set_data_3d(P[-1:, 0], P[-1:, 1], P[-1:, 2])
+
+        # the collection is projected when the axes are drawn: animated artists are not
+        if self.ax.M is not None:
+            self.trail.do_3d_projection()
+        return self.trail, self.head
+
+    def __on_draw(self, event):
+        '''Saves the background after every full draw of the figure.'''
+        if self.blit:
+            self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+            self.__draw_artists()
+
+    def __draw_artists(self):
+        '''Draws the animated artists on the current canvas.'''
+        for artist in self.update():
+            self.ax.draw_artist(artist)
+
+    def draw(self):
+        '''Draws a new frame: with blitting, only the artists are drawn on the saved background.'''
+        canvas = self.fig.canvas
+        if not self.blit or self._background is None:
+            self.update()
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            self.__draw_artists()
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        self._last_draw = perf_counter()
+
+    def show(self):
+        '''Shows the figure without blocking, so that the stream can go on.'''
+        plt.show(block=False)
+        self.draw()
+
+
+    ## Animations ##
+    def animate(self, frames, interval:float=1000/30, path:str=None, fps:int=30, **kwargs) -> FuncAnimation:
+        '''Returns the animation that appends a batch of quaternions for every frame.
+
+        Arguments:
+        - frames: iterable of batches (for example a list of arrays, or a generator reading a
+        stream); every batch is a Quaternion, an iterable of quaternions or an array (N, 4)
+        - interval[float]: delay between frames, in milliseconds
+        - path[str]: if given, the animation is saved there (e.g. 'stream.gif' or 'stream.mp4',
+        with the writers available to matplotlib)
+        - fps[int]: frames per second of the saved file
+        - kwargs: other arguments of FuncAnimation (e.g. save_count for generators)
+        '''
+        def step(H_points):
+            self.append(H_points, draw=False)
+            return self.update()
+
+        kwargs.setdefault('cache_frame_data', False)
+        anim = FuncAnimation(self.fig, step, frames=frames, init_func=self.update, interval=interval,
+                             blit=self.blit, **kwargs)
+        if path is not None:
+            anim.save(path, fps=fps)
+        return anim
+
 # End of Hplot class
\ No newline at end of file
@@ -3,9 +3,14 @@
 # Author:       Samuele Ferri (@ferrixio)
 # Licence:      MIT 2025
 
-from math import sqrt, pi, sin, cos, acos
+from math import sqrt, pi, sin, cos, acos, isfinite
 from typing import Iterable
 
+# Type unions used by the checks of the arithmetic: built once, since writing int|float inside
+# isinstance creates a new object at every call (and the in-place methods must not allocate)
+_REAL = int|float
+_NUMBER = int|float|complex
+
 class Quaternion:
     '''Class to represent quaternions.
     
@@ -156,25 +161,25 @@ class Quaternion:
 
     @real.setter
     def real(self, a):
-        if not isinstance(a, int|float):
+        if not isinstance(a, _REAL):
             raise ValueError("Real part must be of type 'int' or 'float'")
         self.q[0] = a
         
     @i.setter
     def i(self, a):
-        if not isinstance(a, int|float):
+        if not isinstance(a, _REAL):
             raise ValueError("i must be of type 'int' or 'float'")
         self.q[1] = a
         
     @j.setter
     def j(self, a):
-        if not isinstance(a, int|float):
+        if not isinstance(a, _REAL):
             raise ValueError("j must be of type 'int' or 'float'")
         self.q[2] = a      
 
     @k.setter
     def k(self, a):
-        if not isinstance(a, int|float):
+        if not isinstance(a, _REAL):
             raise ValueError("k must be of type 'int' or 'float'")
         self.q[3] = a
 
@@ -326,11 +331,32 @@ class Quaternion:
     @staticmethod
     def check_other(T_other, operation:str):
         '''Auxiliary function to raise exceptions during arithmetic.'''
-        if isinstance(T_other, int|float|complex|Quaternion):
+        if isinstance(T_other, _NUMBER) or isinstance(T_other, Quaternion):
             return
 
         raise TypeError(f"unsupported operand type(s) for {operation}: \
-            'Quaternion' and '{T_other.__name__}'")
+            'Quaternion' and '{type(T_other).__name__}'")
+
+    @staticmethod
+    def store(out, a:float, b:float, c:float, d:float):
+        '''Auxiliary function to write the components (a, b, c, d) into out, a Quaternion or a
+        mutable buffer of length 4 (list, array, ...), without allocating. Returns out.'''
+        buf = out.q if isinstance(out, Quaternion) else out
+        buf[0] = a
+        buf[1] = b
+        buf[2] = c
+        buf[3] = d
+        return out
+
+    def __imul_components(self, a:float, b:float, c:float, d:float):
+        '''Auxiliary function to perform in place the left-multiplication by a+bi+cj+dk.'''
+        q = self.q
+        r, x, y, z = q
+        q[0] = r*a - x*b - y*c - z*d
+        q[1] = r*b + x*a + y*d - z*c
+        q[2] = r*c + y*a - x*d + z*b
+        q[3] = r*d + z*a + x*c - y*b
+        return self
 
 
     # Addition
@@ -338,7 +364,7 @@ class Quaternion:
         '''Magic method to emulate the left sum.'''
         self.check_other(other, '+')
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             return Quaternion(self.real+other,self.i,self.j,self.k)
 
         if isinstance(other, complex):
@@ -355,7 +381,7 @@ class Quaternion:
         '''Magic method to left-sum quaternions using +=.'''
         self.check_other(other, '+=')
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             self.real += other
             return self
 
@@ -376,7 +402,7 @@ class Quaternion:
         '''Magic method to emulate left subtraction.'''
         self.check_other(other, '-')
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             return Quaternion(self.real-other,self.i,self.j,self.k)
 
         if isinstance(other, complex):
@@ -389,7 +415,7 @@ class Quaternion:
         '''Magic method to emulate right subtraction.'''
         self.check_other(other, 'r-')
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             return Quaternion(other-self.real,-self.i,-self.j,-self.k)
 
         if isinstance(other, complex):
@@ -402,7 +428,7 @@ class Quaternion:
         '''Magic method to subtract quaternions using -=.'''
         self.check_other(other, '-=')
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             self.real -= other
             return self
 
@@ -420,10 +446,15 @@ class Quaternion:
 
     # Multiplication
     def __mul__(self, other):
-        '''Magic method to perform quaternionic left-multiplication x * y.'''
-        self.check_other(other, '*')
+        '''Magic method to perform quaternionic left-multiplication x * y.
+        
+        Returns NotImplemented for unsupported operands, so that their own right-multiplication
+        (e.g. QuaternionMatrix.__rmul__) can be used.
+        '''
+        if not (isinstance(other, _NUMBER) or isinstance(other, Quaternion)):
+            return NotImplemented
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             return Quaternion(self.real*other,self.i*other,self.j*other,self.k*other)
 
         if isinstance(other, complex):
@@ -442,7 +473,7 @@ class Quaternion:
         '''Magic method to perform quaternionic right-multiplication y * x.'''
         self.check_other(other, 'r*')
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             return Quaternion(self.real*other,self.i*other,self.j*other,self.k*other)
 
         if isinstance(other, complex):
@@ -461,24 +492,19 @@ class Quaternion:
         '''Magic method to perform quaternionic left-multiplication x *= y.'''
         self.check_other(other, '*=')
 
-        if isinstance(other, int|float):
-            self.real *= other
-            self.i *= other
-            self.j *= other
-            self.k *= other
+        if isinstance(other, _REAL):
+            q = self.q
+            q[0] *= other
+            q[1] *= other
+            q[2] *= other
+            q[3] *= other
             return self
 
         if isinstance(other, complex):
-            other = self.from_complex(other)
+            return self.__imul_components(other.real, other.imag, 0, 0)
 
-        n_real = self.real*other.real - self.i*other.i - self.j*other.j - self.k*other.k
-        n_i = self.real*other.i + self.i*other.real + self.j*other.k - self.k*other.j
-        n_j = self.real*other.j + self.j*other.real - self.i*other.k + self.k*other.i
-        n_k = self.real*other.k + self.k*other.real + self.i*other.j - self.j*other.i
-
-        del other
-        self.real, self.i, self.j, self.k  = n_real, n_i, n_j, n_k
-        return self
+        a, b, c, d = other.q
+        return self.__imul_components(a, b, c, d)
 
 
     # Powers
@@ -516,9 +542,10 @@ class Quaternion:
             power *= -1
 
         if power:
-            h = +self
-            for _ in range(power-1):
-                self *= h
+            a, b, c, d = self.q
+            while power > 1:
+                self.__imul_components(a, b, c, d)
+                power -= 1
             return self
 
         self.real, self.i, self.j, self.k = 1, 0, 0, 0
@@ -530,7 +557,7 @@ class Quaternion:
         '''Magic method to perform left quaternionic division x / y.'''
         self.check_other(other, '/')
 
-        if isinstance(other, int|float):
+        if isinstance(other, _REAL):
             return Quaternion(self.real/other, self.i/other, self.j/other, self.k/other)
 
         if isinstance(other, complex):
@@ -542,17 +569,23 @@ class Quaternion:
         '''Magic method to perform quaternionic division x /= y.'''
         self.check_other(other, '/=')
 
-        if isinstance(other, int|float):
-            self.real /= other
-            self.i /= other
-            self.j /= other
-            self.k /= other
+        if isinstance(other, _REAL):
+            q = self.q
+            q[0] /= other
+            q[1] /= other
+            q[2] /= other
+            q[3] /= other
             return self
 
         if isinstance(other, complex):
-            return self.__imul__(self.from_complex(other).inverse_ip())
+            a, b, c, d = other.real, other.imag, 0, 0
+        else:
+            a, b, c, d = other.q
 
-        return self.__imul__(~other)
+        n = a*a + b*b + c*c + d*d
+        if not n:
+            raise ZeroDivisionError("It's not possible to invert the zero quaternion")
+        return self.__imul_components(a/n, -b/n, -c/n, -d/n)
 
 
     # Modulo
@@ -564,7 +597,7 @@ class Quaternion:
         '''
         self.check_other(other, '%')
 
-        if not isinstance(other, int|float) or other < 0:
+        if not isinstance(other, _REAL) or other < 0:
             raise TypeError('The modulo must be a positive integer')
 
         f = self.norm % other
@@ -580,7 +613,7 @@ class Quaternion:
         '''
         self.check_other(other, '//')
 
-        if not isinstance(other, int|float) or other < 0:
+        if not isinstance(other, _REAL) or other < 0:
             raise TypeError('The divisor must be a positive integer')
 
         f = self.__mod__(other)
@@ -596,7 +629,7 @@ class Quaternion:
         '''
         self.check_other(other, '@')
 
-        if not isinstance(other, int|float) or other < 0:
+        if not isinstance(other, _REAL) or other < 0:
             raise TypeError('The divisor must be a positive number')
 
         return self.normalize().__mul__(other)
@@ -605,10 +638,16 @@ class Quaternion:
         '''Magic method to implement matmul x @= y.'''
         self.check_other(other, '@=')
 
-        if not isinstance(other, int|float) or other < 0:
+        if not isinstance(other, _REAL) or other < 0:
             raise TypeError('The divisor must be a positive number')
 
-        return self.normalize().__imul__(other)
+        t = other / self.norm
+        q = self.q
+        q[0] *= t
+        q[1] *= t
+        q[2] *= t
+        q[3] *= t
+        return self
 
 
 
@@ -616,27 +655,62 @@ class Quaternion:
     def __eq__(self, other) -> bool:
         '''Magic method to perform ==.
         
-        Checks if all the components between the two quaternions are the same.
+        Checks if all the components between the two quaternions are the same, up to ACCURACY.
+        The comparison is made componentwise, without building any intermediate quaternion.
         '''
-        return self.__sub__(other).__abs__() < self.ACCURACY
+        if isinstance(other, Quaternion):
+            a, b, c, d = other.q
+        elif isinstance(other, _REAL):
+            a, b, c, d = other, 0, 0, 0
+        elif isinstance(other, complex):
+            a, b, c, d = other.real, other.imag, 0, 0
+        else:
+            return NotImplemented
+
+        acc, q = self.ACCURACY, self.q
+        return abs(q[0]-a) < acc and abs(q[1]-b) < acc and abs(q[2]-c) < acc and abs(q[3]-d) < acc
 
     def __ne__(self, other) -> bool:
         '''Magic method to perform !=.
 
         Returns the negation of __eq__.
         '''
-        return not self.__eq__(other)
+        ans = self.__eq__(other)
+        return ans if ans is NotImplemented else not ans
+
+    def __hash__(self) -> int:
+        '''Magic method to perform hash(), so that quaternions can be used in sets and dicts.
+
+        This is a convenience hash: each component is quantized to a grid of side ACCURACY, so
+        that quaternions equal up to rounding errors usually share the same hash.
+
+        Notes:
+        - the contract "a == b implies hash(a) == hash(b)" does not hold near the cell borders:
+        two quaternions closer than ACCURACY, but lying across a border, are equal and have
+        different hashes. Use batch.dedup to collapse near-identical quaternions reliably
+        - quaternions with nan or infinite components (or too large for the grid) are hashed
+        by their raw components
+        - do not modify a quaternion in place while it is stored in a set or dict
+        '''
+        acc = self.ACCURACY
+        a, b, c, d = self.q[0]/acc, self.q[1]/acc, self.q[2]/acc, self.q[3]/acc
+        if not isfinite(a + b + c + d):
+            return hash(tuple(self.q))
+        return hash((round(a), round(b), round(c), round(d)))
 
     def __bool__(self) -> bool:
         '''Magic method to perform bool().
 
         Returns True if the quaternion is not zero.
         '''
-        return any(map(lambda x: abs(x) > self.ACCURACY, self.q))
+        acc, q = self.ACCURACY, self.q
+        return abs(q[0]) > acc or abs(q[1]) > acc or abs(q[2]) > acc or abs(q[3]) > acc
 
     def is_unit(self) -> bool:
         '''Checks if the quaternion is unitary, that is, if it lies on the 3-sphere.'''
-        return abs(self.norm-1) < self.ACCURACY
+        # |norm - 1| < ACCURACY, compared on the squared norm to avoid the square root
+        acc, n = self.ACCURACY, self.square_norm()
+        return (acc > 1 or (1 - acc)**2 < n) and n < (1 + acc)**2
 
     def is_real(self) -> bool:
         '''Checks if the quaternion is a real number.'''
@@ -661,10 +735,25 @@ class Quaternion:
         return self.real**2 + self.i**2 + self.j**2 + self.k**2
 
 
-    def normalize(self):
-        '''Returns the normalized quaternion.'''
+    def normalize(self, out=None):
+        '''Returns the normalized quaternion.
+
+        If out (a Quaternion or a buffer of length 4) is given, the result is written there
+        without allocating and out is returned.
+
+        Called as Quaternion.normalize(H_points), with a list of quaternions or an array of shape
+        (N, 4), it normalizes every element (see dispatch.py); the same holds for conjugate,
+        inverse and rotate_point.
+        '''
+        if not isinstance(self, Quaternion):
+            from dispatch import apply
+            return apply('normalize', self, out=out)
+
         t = self.norm
-        return Quaternion(self.real/t, self.i/t, self.j/t, self.k/t)
+        q = self.q
+        if out is None:
+            return Quaternion(q[0]/t, q[1]/t, q[2]/t, q[3]/t)
+        return self.store(out, q[0]/t, q[1]/t, q[2]/t, q[3]/t)
 
     def normalize_ip(self):
         '''Normalizes the quaternion in place.'''
@@ -677,11 +766,18 @@ class Quaternion:
         return self
 
 
-    def conjugate(self):
+    def conjugate(self, out=None):
         '''Returns the conjugated quaternion, that is a quaternion with the signs of the
-        imaginary parts reversed.
+        imaginary parts reversed. See normalize for out.
         '''
-        return Quaternion(self.real,-self.i,-self.j,-self.k)
+        if not isinstance(self, Quaternion):
+            from dispatch import apply
+            return apply('conjugate', self, out=out)
+
+        q = self.q
+        if out is None:
+            return Quaternion(q[0],-q[1],-q[2],-q[3])
+        return self.store(out, q[0], -q[1], -q[2], -q[3])
 
     def conjugate_ip(self):
         '''Conjugates the quaternion in place.'''
@@ -691,13 +787,20 @@ class Quaternion:
         return self
     
 
-    def inverse(self):
-        '''Returns the inverse quaternion with respect to multiplication.'''
+    def inverse(self, out=None):
+        '''Returns the inverse quaternion with respect to multiplication. See normalize for out.'''
+        if not isinstance(self, Quaternion):
+            from dispatch import apply
+            return apply('inverse', self, out=out)
+
         if not self.__bool__():
             raise ZeroDivisionError("It's not possible to invert the zero quaternion")
 
         n = self.square_norm()
-        return Quaternion(self.real/n, -self.i/n, -self.j/n, -self.k/n)
+        q = self.q
+        if out is None:
+            return Quaternion(q[0]/n, -q[1]/n, -q[2]/n, -q[3]/n)
+        return self.store(out, q[0]/n, -q[1]/n, -q[2]/n, -q[3]/n)
 
     def inverse_ip(self):
         '''Inverts (in place) the quaternion with respect to multiplication.'''
@@ -713,24 +816,41 @@ class Quaternion:
 
 
     ## Geometry (functions) ##
-    def rotate_point(self, point:Iterable[int|float], passive:bool=False) -> tuple:
+    def rotate_point(self, point:Iterable[int|float], passive:bool=False, out=None) -> tuple:
         '''Performs the rotation of a given point by this quaternion.
         
         Notes:
         - normalizes the quaternion if it is not unitary
         - the boolean passive, if set to True, performs the passive rotation, that is the inverse
         rotation.
+        - point can be a list of points or an array of shape (N, 3), and the method can be called
+        as Quaternion.rotate_point(H_points, point) on a batch of quaternions (see dispatch.py)
+        - if out (a buffer of length 3) is given, the result is written there without allocating
+        and out is returned
         '''
+        if not isinstance(self, Quaternion) or getattr(point, 'ndim', 1) > 1 \
+                or (len(point) and hasattr(point[0], '__iter__')):
+            from dispatch import apply
+            return apply('rotate_point', self, point, passive=passive, out=out)
+
         if not len(point)==3:
             raise TypeError("point must be a 3-dimensional iterable of floats")
-        
-        p = Quaternion(seq=(0,*point))
-        self_copy = self.normalize()
 
+        # q*p*q^-1 = p + w*t + v x t, with t = 2(v x p)/|q|^2; q^-1*p*q is the same with -v
+        w, x, y, z = self.q
         if not passive:
-            return (self_copy.inverse() * p * self_copy).vector
-        
-        return (self_copy * p * self_copy.inverse()).vector
+            x, y, z = -x, -y, -z
+        n = w*w + x*x + y*y + z*z
+        px, py, pz = point
+        tx, ty, tz = 2*(y*pz - z*py)/n, 2*(z*px - x*pz)/n, 2*(x*py - y*px)/n
+        rx, ry, rz = px + w*tx + y*tz - z*ty, py + w*ty + z*tx - x*tz, pz + w*tz + x*ty - y*tx
+
+        if out is None:
+            return rx, ry, rz
+        out[0] = rx
+        out[1] = ry
+        out[2] = rz
+        return out
 
 # End of Quaternion class
 
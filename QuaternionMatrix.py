@@ -0,0 +1,337 @@
+# Quaternion matrix class for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# A quaternion matrix A = A1 + A2*j, where A1 and A2 are complex matrices (q = a+bi+cj+dk is
+# split as (a+bi) + (c+di)j), is stored as its complex embedding
+#
+#       chi(A) = [[ A1,        A2       ],
+#                 [-conj(A2),  conj(A1) ]]
+#
+# Since chi(A + B) = chi(A) + chi(B), chi(AB) = chi(A) chi(B) and chi(A*) = chi(A)^H, sums,
+# products, inverses and linear systems are computed by numpy (BLAS/LAPACK) on the embedding.
+# The entries are converted back to Quaternion objects only when they are accessed.
+
+from Quaternion import Quaternion
+import numpy as np
+
+
+class QuaternionMatrix:
+    '''Class to represent matrices with quaternionic entries.
+
+    Attributes:
+    - chi: complex array of shape (2m, 2n), the embedding of the m x n matrix
+    - shape: 2-tuple (m, n)
+    '''
+
+    ## Initializers ##
+    def __init__(self, entries=None, chi:np.ndarray=None):
+        '''Initializer of QuaternionMatrix object.
+
+        Arguments:
+        - entries: nested lists of quaternions (or real numbers), or a real array of shape
+        (m, n, 4) with the components of the entries
+        - chi: the complex embedding, used instead of entries if given
+        '''
+        if chi is not None:
+            chi = np.asarray(chi, dtype=complex)
+            if chi.ndim != 2 or chi.shape[0] % 2 or chi.shape[1] % 2:
+                raise ValueError(f"invalid shape {chi.shape} of the embedding: it must be (2m, 2n)")
+            self.chi = chi
+            return
+
+        if entries is None:
+            raise TypeError("QuaternionMatrix needs either entries or chi")
+
+        if not isinstance(entries, np.ndarray):
+            entries = [[item.q if isinstance(item, Quaternion) else [item, 0, 0, 0] for item in row]
+                       for row in entries]
+        comp = np.asarray(entries, dtype=float)
+
+        if comp.ndim != 3 or comp.shape[2] != 4:
+            raise ValueError(f"invalid shape {comp.shape} of the components: it must be (m, n, 4)")
+
+        self.chi = self.__embed(comp[..., 0] + 1j*comp[..., 1], comp[..., 2] + 1j*comp[..., 3])
+
+
+    @staticmethod
+    def __embed(A1:np.ndarray, A2:np.ndarray) -> np.ndarray:
+        '''Returns the complex embedding of A1 + A2*j.'''
+        return np.block([[A1, A2], [-A2.conj(), A1.conj()]])
+
+    @classmethod
+    def from_complex(cls, A1, A2=None):
+        '''Generates the quaternion matrix A1 + A2*j from two complex matrices.'''
+        A1 = np.atleast_2d(np.asarray(A1, dtype=complex))
+        A2 = np.zeros_like(A1) if A2 is None else np.atleast_2d(np.asarray(A2, dtype=complex))
+        if A1.shape != A2.shape:
+            raise ValueError("A1 and A2 must have the same shape")
+        return cls(chi=cls.__embed(A1, A2))
+
+    @classmethod
+    def identity(cls, n:int):
+        '''Generates the n x n identity matrix.'''
+        return cls(chi=np.eye(2*n, dtype=complex))
+
+    @classmethod
+    def zeros(cls, m:int, n:int):
+        '''Generates the m x n zero matrix.'''
+        return cls(chi=np.zeros((2*m, 2*n), dtype=complex))
+
+    @classmethod
+    def random(cls, m:int, n:int, a:float=-50, b:float=50):
+        '''Random quaternion matrix generator, with components uniform in [a, b].'''
+        return cls(np.random.uniform(a, b, (m, n, 4)))
+
+
+
+    ## Properties ##
+    @property
+    def shape(self) -> tuple[int]:
+        '''Returns the shape (m, n) of the matrix.'''
+        return self.chi.shape[0]//2, self.chi.shape[1]//2
+
+    @property
+    def blocks(self) -> tuple[np.ndarray]:
+        '''Returns the 2-tuple (A1, A2) of complex matrices such that A = A1 + A2*j.'''
+        m, n = self.shape
+        return self.chi[:m, :n], self.chi[:m, n:]
+
+    @property
+    def components(self) -> np.ndarray:
+        '''Returns the real array of shape (m, n, 4) of the components of the entries.'''
+        A1, A2 = self.blocks
+        return np.stack((A1.real, A1.imag, A2.real, A2.imag), axis=-1)
+
+    @property
+    def H(self):
+        '''Returns the conjugate transpose of the matrix.'''
+        return QuaternionMatrix(chi=self.chi.conj().T.copy())
+
+    def norm(self) -> float:
+        '''Returns the Frobenius norm of the matrix.'''
+        return float(np.linalg.norm(self.chi) / np.sqrt(2))
+
+    def to_list(self) -> list[list[Quaternion]]:
+        '''Returns the matrix as nested lists of quaternions.'''
+        return [[Quaternion(*(float(x) for x in entry)) for entry in row] for row in self.components]
+
+
+
+    ## Typing magic methods ##
+    def __repr__(self) -> str:
+        '''Represents the matrix by its entries.'''
+        rows = ',\n '.join('[' + ', '.join(str(q) for q in row) + ']' for row in self.to_list())
+        return f'QuaternionMatrix([{rows}])'
+
+    def __getitem__(self, index):
+        '''Magic method to access entries (two integers) or submatrices (slices).'''
+        if not (isinstance(index, tuple) and len(index) == 2):
+            raise IndexError("QuaternionMatrix needs two indices")
+
+        m, n = self.shape
+        i, k = index
+        if isinstance(i, int) and isinstance(k, int):
+            z1, z2 = self.chi[i % m, k % n], self.chi[i % m, n + k % n]
+            return Quaternion(float(z1.real), float(z1.imag), float(z2.real), float(z2.imag))
+
+        rows = np.arange(m)[i].reshape(-1)
+        cols = np.arange(n)[k].reshape(-1)
+        A1, A2 = self.blocks
+        return QuaternionMatrix.from_complex(A1[np.ix_(rows, cols)], A2[np.ix_(rows, cols)])
+
+    def __setitem__(self, index, value):
+        '''Magic method to set a single entry.'''
+        if not (isinstance(index, tuple) and len(index) == 2):
+            raise IndexError("QuaternionMatrix needs two indices")
+
+        if isinstance(value, int|float):
+            value = Quaternion(value)
+
+        m, n = self.shape
+        i, k = index[0] % m, index[1] % n
+        z1, z2 = complex(value.real, value.i), complex(value.j, value.k)
+        self.chi[i, k], self.chi[i, n+k] = z1, z2
+        self.chi[m+i, k], self.chi[m+i, n+k] = -z2.conjugate(), z1.conjugate()
+
+
+
+    ## Arithmetic ##
+    def __check_other(self, other, operation:str):
+        '''Auxiliary function to raise exceptions during arithmetic.'''
+        if not isinstance(other, QuaternionMatrix):
+            raise TypeError(f"unsupported operand type(s) for {operation}: 'QuaternionMatrix' and '{type(other).__name__}'")
+
+    def __add__(self, other):
+        '''Magic method to perform the sum of matrices.'''
+        self.__check_other(other, '+')
+        return QuaternionMatrix(chi=self.chi + other.chi)
+
+    def __sub__(self, other):
+        '''Magic method to perform the subtraction of matrices.'''
+        self.__check_other(other, '-')
+        return QuaternionMatrix(chi=self.chi - other.chi)
+
+    def __neg__(self):
+        '''Magic method to perform the unary operation -object.'''
+        return QuaternionMatrix(chi=-self.chi)
+
+    def __matmul__(self, other):
+        '''Magic method to perform the matrix product A @ B.'''
+        self.__check_other(other, '@')
+        if self.shape[1] != other.shape[0]:
+            raise ValueError(f"shapes {self.shape} and {other.shape} not aligned")
+        return QuaternionMatrix(chi=self.chi @ other.chi)
+
+    def __scalar(self, q) -> np.ndarray:
+        '''Returns the embedding of the scalar matrix q*I (n x n).'''
+        if isinstance(q, int|float):
+            q = Quaternion(q)
+        elif not isinstance(q, Quaternion):
+            raise TypeError(f"unsupported operand type(s) for *: 'QuaternionMatrix' and '{type(q).__name__}'")
+
+        z1, z2 = complex(q.real, q.i), complex(q.j, q.k)
+        return np.array([[z1, z2], [-z2.conjugate(), z1.conjugate()]])
+
+    def __mul__(self, q):
+        '''Magic method to perform the right multiplication A * q by a scalar.'''
+        c = self.__scalar(q)
+        m, n = self.shape
+        X = self.chi.reshape(2*m, 2, n)
+        return QuaternionMatrix(chi=np.einsum('abn,bc->acn', X, c).reshape(2*m, 2*n))
+
+    def __rmul__(self, q):
+        '''Magic method to perform the left multiplication q * A by a scalar.'''
+        c = self.__scalar(q)
+        m, n = self.shape
+        X = self.chi.reshape(2, m, 2*n)
+        return QuaternionMatrix(chi=np.einsum('ab,bmn->amn', c, X).reshape(2*m, 2*n))
+
+
+
+    ## Linear algebra ##
+    def inverse(self):
+        '''Returns the inverse of a square matrix.'''
+        if self.shape[0] != self.shape[1]:
+            raise ValueError("only square matrices can be inverted")
+        return QuaternionMatrix(chi=np.linalg.inv(self.chi))
+
+    def solve(self, B):
+        '''Solves the linear system A @ X = B, where A is this square matrix.'''
+        self.__check_other(B, 'solve')
+        if self.shape[0] != self.shape[1] or self.shape[0] != B.shape[0]:
+            raise ValueError(f"shapes {self.shape} and {B.shape} not compatible for solve")
+        return QuaternionMatrix(chi=np.linalg.solve(self.chi, B.chi))
+
+    def qr(self) -> tuple:
+        '''Returns the thin QR factorization (Q, R) of an m x n matrix, with m >= n: Q has
+        orthonormal columns (Q.H @ Q = I) and R is upper triangular with real diagonal.
+
+        It runs a classical Gram-Schmidt with reorthogonalization on the embedding, so that
+        every step is a pair of BLAS products.
+        '''
+        m, n = self.shape
+        if m < n:
+            raise ValueError("qr needs a matrix with at least as many rows as columns")
+
+        A = self.chi
+        Q = np.zeros((2*m, 2*n), dtype=complex)
+        R = np.zeros((2*n, 2*n), dtype=complex)
+        for k in range(n):
+            cols, prev = [k, n+k], [*range(k), *range(n, n+k)]
+            a = A[:, cols].copy()
+            for _ in range(2):
+                r = Q[:, prev].conj().T @ a
+                a -= Q[:, prev] @ r
+                R[np.ix_(prev, cols)] += r
+
+            rkk = np.linalg.norm(a[:, 0])
+            if rkk == 0:
+                raise ArithmeticError("the columns of the matrix are linearly dependent")
+            Q[:, cols] = a / rkk
+            R[k, k] = R[n+k, n+k] = rkk
+
+        return QuaternionMatrix(chi=Q), QuaternionMatrix(chi=R)
+
+    def svd(self, tol:float=1e-10) -> tuple:
+        '''Returns the thin singular value decomposition (U, s, V) such that
+        A = U @ diag(s) @ V.H, where s is the real array of the singular values.
+
+        The singular values of the embedding appear in pairs: for each pair, a vector v of the
+        embedding determines a quaternion vector whose embedding spans the pair.
+        '''
+        m, n = self.shape
+        r = min(m, n)
+        U2, S2, Vh2 = np.linalg.svd(self.chi, full_matrices=False)
+        V2 = Vh2.conj().T
+
+        s = S2[::2][:r].copy()
+        V = self.__quaternionic_basis(V2, S2, r, tol)
+        Uchi = self.chi @ V
+        U = np.zeros((2*m, 2*r), dtype=complex)
+
+        big = s > tol * max(S2[0] if S2.size else 0, 1)
+        U[:, np.r_[np.flatnonzero(big), r + np.flatnonzero(big)]] = \
+            Uchi[:, np.r_[np.flatnonzero(big), r + np.flatnonzero(big)]] / np.tile(s[big], 2)
+        if not np.all(big):
+            U = self.__complete(U, U2, np.flatnonzero(~big), r)
+
+        return QuaternionMatrix(chi=U), s, QuaternionMatrix(chi=V)
+
+
+    @staticmethod
+    def __J(u:np.ndarray) -> np.ndarray:
+        '''Returns the second column of the embedding whose first column is u.'''
+        h = u.shape[0]//2
+        return np.concatenate((-u[h:].conj(), u[:h].conj()))
+
+    @classmethod
+    def __quaternionic_basis(cls, V2:np.ndarray, S2:np.ndarray, r:int, tol:float) -> np.ndarray:
+        '''Picks r quaternion vectors from the singular vectors of the embedding, one for each
+        pair of singular values, keeping them orthonormal in the quaternionic sense.'''
+        h = V2.shape[0]
+        chosen = []
+        for col in range(V2.shape[1]):
+            if len(chosen) == r:
+                break
+            v = V2[:, col].copy()
+            for u in chosen:
+                v -= u * (u.conj() @ v)
+                Ju = cls.__J(u)
+                v -= Ju * (Ju.conj() @ v)
+
+            nv = np.linalg.norm(v)
+            if nv > 0.5:
+                chosen.append(v / nv)
+
+        V = np.zeros((h, 2*r), dtype=complex)
+        for k, v in enumerate(chosen):
+            V[:, k], V[:, r+k] = v, cls.__J(v)
+        return V
+
+    @classmethod
+    def __complete(cls, U:np.ndarray, U2:np.ndarray, missing:np.ndarray, r:int) -> np.ndarray:
+        '''Fills the columns of U related to zero singular values with orthonormal vectors.'''
+        known = [U[:, k] for k in range(r) if k not in set(missing)]
+        candidates = np.concatenate((U2, np.eye(U.shape[0], dtype=complex)), axis=1)
+        slots = iter(missing)
+        slot = next(slots, None)
+        for col in range(candidates.shape[1]):
+            if slot is None:
+                break
+            v = candidates[:, col].copy()
+            for u in known:
+                v -= u * (u.conj() @ v)
+                Ju = cls.__J(u)
+                v -= Ju * (Ju.conj() @ v)
+
+            nv = np.linalg.norm(v)
+            if nv > 0.5:
+                v /= nv
+                known.append(v)
+                U[:, slot], U[:, r+slot] = v, cls.__J(v)
+                slot = next(slots, None)
+        return U
+
+# End of QuaternionMatrix class
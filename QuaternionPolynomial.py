@@ -0,0 +1,333 @@
+# Quaternion polynomial class for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# A unilateral quaternion polynomial has its coefficients on one side of the powers of the
+# variable: p(x) = sum a_k x^k ('left') or p(x) = sum x^k a_k ('right'). Since quaternions do
+# not commute, the two are different functions.
+#
+# Roots (Niven, 1941; Janovska and Opfer, 2010): the companion polynomial
+# C(x) = sum_m (sum_{j+k=m} conj(a_j) a_k) x^m has real coefficients and degree 2n. Every root
+# of p lies in the class [z] = {alpha + beta*u : u unitary and pure} of a complex root
+# z = alpha + beta*i of C. On such a class x^k = A_k + B_k u, with A_k + B_k i = z^k, so that
+# p(x) = A + B*u (or A + u*B for right polynomials) with A = sum a_k A_k and B = sum a_k B_k.
+# If A and B vanish, the whole class is made of roots (a spherical root); otherwise the
+# only root in the class is u = -B^-1 * A (or -A * B^-1).
+
+from Quaternion import Quaternion
+from typing import Iterable
+import numpy as np
+import batch
+import jacobians
+
+SIDES = ('left', 'right')
+
+
+class QuaternionPolynomial:
+    '''Class to represent unilateral quaternion polynomials.
+
+    Attributes:
+    - coefficients: array of shape (n+1, 4) of the coefficients, from degree 0 to degree n
+    - side: 'left' for sum a_k x^k, 'right' for sum x^k a_k
+    - ACCURACY: range to handle with floating point
+    '''
+
+    ## Initializers ##
+    def __init__(self, coefficients:Iterable, side:str='left', acc:float=1e-13):
+        '''Initializer of QuaternionPolynomial object.
+
+        Arguments:
+        - coefficients: iterable of quaternions (or real numbers), from degree 0 upwards, or
+        an array of shape (n+1, 4); the zero coefficients of highest degree are dropped
+        - side[str]: 'left' or 'right' (see the attributes)
+        - acc[float]: accuracy of the polynomial
+        '''
+        if side not in SIDES:
+            raise ValueError(f"invalid side `{side}`: it must be one of {SIDES}")
+
+        if not isinstance(acc, float):
+            raise TypeError("Accuracy must be a float")
+
+        if isinstance(coefficients, np.ndarray):
+            arr = batch.as_array(coefficients).copy()
+        else:
+            arr = batch.as_array([Quaternion(c) if isinstance(c, int|float) else c for c in coefficients])
+
+        nonzero = np.flatnonzero(np.any(arr != 0, axis=1))
+        self.coefficients = arr[:nonzero[-1] + 1] if nonzero.size else np.zeros((1, 4))
+        self.side = side
+        self.ACCURACY = acc
+
+
+    @classmethod
+    def from_roots(cls, roots:Iterable, side:str='left'):
+        '''Generates the monic polynomial (x - r_1)(x - r_2)...(x - r_n) of the given
+        quaternions, multiplied formally (as if x commuted with them). The last quaternion is
+        always a root; all of them are roots if they commute with each other (for example, if
+        they lie in the same complex plane).'''
+        coeffs = np.array([[1.0, 0, 0, 0]])
+        for r in batch.as_array(roots):
+            # factor theorem: p(x) = q(x)(x - r) is zero at r for left polynomials,
+            # p(x) = (x - r)q(x) for right ones
+            shifted = np.concatenate((np.zeros((1, 4)), coeffs))
+            if side == 'left':
+                shifted[:-1] -= batch.multiply(coeffs, r)
+            else:
+                shifted[:-1] -= batch.multiply(r, coeffs)
+            coeffs = shifted
+        return cls(coeffs, side)
+
+
+
+    ## Properties ##
+    @property
+    def degree(self) -> int:
+        '''Returns the degree of the polynomial (0 for constant ones, zero included).'''
+        return self.coefficients.shape[0] - 1
+
+    def __len__(self) -> int:
+        '''Returns the number of coefficients.'''
+        return self.coefficients.shape[0]
+
+    def __getitem__(self, k:int) -> Quaternion:
+        '''Returns the coefficient of degree k as a Quaternion.'''
+        return Quaternion(*(float(c) for c in self.coefficients[k]), acc=self.ACCURACY)
+
+    def __str__(self) -> str:
+        '''Magic method to show the polynomial using print(), as "(a_n)x^n + ... + (a_0)".'''
+        terms = []
+        for k in range(self.degree, -1, -1):
+            c = self[k]
+            if not c and self.degree:
+                continue
+            power = '' if k == 0 else ('x' if k == 1 else f'x^{k}')
+            terms.append(f'({c}){power}' if self.side == 'left' else f'{power}({c})')
+        return ' + '.join(terms)
+
+    def __repr__(self) -> str:
+        '''Represents the polynomial as object declaration.'''
+        return f"QuaternionPolynomial({self.coefficients.tolist()}, side='{self.side}')"
+
+
+
+    ## Operators ##
+    def __check(self, other) -> 'QuaternionPolynomial':
+        '''Returns other as a polynomial on the same side, or raises an exception.'''
+        if isinstance(other, int|float|Quaternion):
+            return QuaternionPolynomial([other], self.side)
+        if not isinstance(other, QuaternionPolynomial):
+            raise TypeError("unsupported operand: it must be 'QuaternionPolynomial', 'Quaternion' or a number")
+        if other.side != self.side:
+            raise ValueError("polynomials with coefficients on different sides cannot be combined")
+        return other
+
+    def __add__(self, other):
+        '''Sum of the coefficients of the same degree.'''
+        other = self.__check(other)
+        n = max(len(self), len(other))
+        coeffs = np.zeros((n, 4))
+        coeffs[:len(self)] += self.coefficients
+        coeffs[:len(other)] += other.coefficients
+        return QuaternionPolynomial(coeffs, self.side, self.ACCURACY)
+
+    def __radd__(self, other):
+        '''Sum is commutative.'''
+        return self + other
+
+    def __neg__(self):
+        '''Returns the polynomial with opposite coefficients.'''
+        return QuaternionPolynomial(-self.coefficients, self.side, self.ACCURACY)
+
+    def __sub__(self, other):
+        '''Difference of the coefficients of the same degree.'''
+        return self + (-self.__check(other))
+
+    def __rsub__(self, other):
+        '''Difference with the polynomial on the right.'''
+        return (-self) + other
+
+    def __mul__(self, other):
+        '''Product by a real number, or by a quaternion on the side opposite to the variable
+        (p*q for right polynomials, where (sum x^k a_k)*q = sum x^k (a_k q)).'''
+        if isinstance(other, int|float):
+            return QuaternionPolynomial(self.coefficients*other, self.side, self.ACCURACY)
+        if isinstance(other, Quaternion) and self.side == 'right':
+            return QuaternionPolynomial(batch.multiply(self.coefficients, other.q), self.side, self.ACCURACY)
+        return NotImplemented
+
+    def __rmul__(self, other):
+        '''Product by a real number, or by a quaternion on the left of a left polynomial.'''
+        if isinstance(other, int|float):
+            return self*other
+        if isinstance(other, Quaternion) and self.side == 'left':
+            return QuaternionPolynomial(batch.multiply(other.q, self.coefficients), self.side, self.ACCURACY)
+        return NotImplemented
+
+    def __eq__(self, other) -> bool:
+        '''Two polynomials are equal if they have the same side and coefficients (up to
+        ACCURACY).'''
+        if not isinstance(other, QuaternionPolynomial):
+            return NotImplemented
+        return (self.side == other.side and len(self) == len(other)
+                and bool(np.all(np.abs(self.coefficients - other.coefficients) < self.ACCURACY)))
+
+
+
+    ## Evaluation ##
+    def __call__(self, H_points):
+        '''Evaluates the polynomial by Horner's method.
+
+        Arguments:
+        - H_points: a Quaternion (or a real number), an iterable of quaternions or an array of
+        shape (N, 4)
+
+        Returns a Quaternion for a single quaternion, otherwise an array of shape (N, 4).
+        '''
+        if isinstance(H_points, int|float):
+            H_points = Quaternion(H_points)
+
+        if isinstance(H_points, Quaternion):
+            coeffs = [self[k] for k in range(self.degree, -1, -1)]
+            r = Quaternion(*coeffs[0].q, acc=self.ACCURACY)
+            for c in coeffs[1:]:
+                if self.side == 'left':
+                    r *= H_points
+                else:
+                    r = H_points*r
+                r += c
+            return r
+
+        X = batch.as_array(H_points)
+        r = np.empty_like(X)
+        r[:] = self.coefficients[-1]
+        for c in self.coefficients[-2::-1]:
+            if self.side == 'left':
+                batch.multiply(r, X, out=r)
+            else:
+                batch.multiply(X, r, out=r)
+            r += c
+        return r
+
+
+    def derivative(self, m:int=1):
+        '''Returns the formal derivative of order m, sum k a_k x^(k-1). It is the derivative of
+        the polynomial along real increments of x (or along any increment that commutes with x),
+        and its roots are the multiple roots of the polynomial; see jacobian for all the
+        directions.'''
+        if not isinstance(m, int) or m < 0:
+            raise ValueError("the order must be a non-negative integer")
+
+        coeffs = self.coefficients
+        for _ in range(m):
+            if coeffs.shape[0] == 1:
+                coeffs = np.zeros((1, 4))
+                break
+            coeffs = coeffs[1:] * np.arange(1, coeffs.shape[0])[:, None]
+        return QuaternionPolynomial(coeffs, self.side, self.ACCURACY)
+
+
+    def jacobian(self, H_points) -> np.ndarray:
+        '''Returns the (N, 4, 4) Jacobians of the polynomial at the given quaternions (see
+        jacobians.py), by Horner's method on the values and their derivatives.'''
+        X = batch.as_array(H_points)
+        r = np.empty_like(X)
+        r[:] = self.coefficients[-1]
+        J = np.zeros((X.shape[0], 4, 4))
+
+        # left: d(r*x) = dr*x + r*dx; right: d(x*r) = dx*r + x*dr
+        if self.side == 'left':
+            R = jacobians.right_matrices(X)
+            for c in self.coefficients[-2::-1]:
+                J = R @ J + jacobians.left_matrices(r)
+                r = batch.multiply(r, X) + c
+        else:
+            L = jacobians.left_matrices(X)
+            for c in self.coefficients[-2::-1]:
+                J = L @ J + jacobians.right_matrices(r)
+                r = batch.multiply(X, r) + c
+        return J
+
+
+
+    ## Roots ##
+    def companion(self) -> np.ndarray:
+        '''Returns the real coefficients of the companion polynomial conj(p)*p (see the top of
+        the file), from degree 0 to degree 2n.'''
+        a = self.coefficients
+        n = self.degree
+        products = batch.multiply(batch.conjugate(a)[:, None], a[None, :])[..., 0]
+        c = np.zeros(2*n + 1)
+        np.add.at(c, np.add.outer(np.arange(n + 1), np.arange(n + 1)), products)
+        return c
+
+
+    def roots(self, tol:float=1e-8, polish:int=3) -> tuple[np.ndarray]:
+        '''Returns the roots of the polynomial.
+
+        Arguments:
+        - tol[float]: relative tolerance to merge the classes of the companion roots and to
+        recognize spherical roots
+        - polish[int]: number of Newton steps applied to the isolated roots
+
+        Returns the pair (isolated, spherical): isolated is the array of shape (m, 4) of the
+        isolated roots, spherical is the array of shape (s, 2) of the pairs (alpha, beta) of
+        the spheres alpha + beta*u (u unitary and pure) made of roots.
+        '''
+        n = self.degree
+        if n == 0:
+            return np.empty((0, 4)), np.empty((0, 2))
+
+        z = np.roots(self.companion()[::-1])
+        scale = max(1.0, float(np.abs(z).max()))
+        z = z.real + 1j*np.abs(z.imag)
+
+        # one representative for each class (alpha, beta)
+        classes = []
+        for w in z[np.lexsort((z.imag, z.real))]:
+            if not classes or abs(w - classes[-1]) > tol**0.5*scale:
+                classes.append(w)
+        z = np.array(classes)
+
+        # p = A + B*u on the class of z
+        powers = z[:, None]**np.arange(n + 1)
+        A = powers.real @ self.coefficients
+        B = powers.imag @ self.coefficients
+        size = np.abs(self.coefficients).max() * np.abs(powers).max(axis=1)
+        spherical = (np.linalg.norm(A, axis=1) < tol**0.5*size) & (np.linalg.norm(B, axis=1) < tol**0.5*size) & (z.imag > tol**0.5*scale)
+
+        isolated = []
+        for w, a, b, sph in zip(z, A, B, spherical):
+            if sph:
+                continue
+            if w.imag <= tol**0.5*scale or not np.any(b):
+                isolated.append([w.real, 0, 0, 0])
+                continue
+            b_inv = batch.conjugate(b) / np.dot(b, b)
+            u = -(batch.multiply(b_inv, a) if self.side == 'left' else batch.multiply(a, b_inv))[0]
+            u[0] = 0
+            norm = np.linalg.norm(u)
+            isolated.append([w.real, *(w.imag*u[1:]/norm if norm else (w.imag, 0, 0))])
+
+        X = np.array(isolated).reshape(-1, 4)
+        for _ in range(polish if len(X) else 0):
+            value = self(X)
+            try:
+                Y = X - np.linalg.solve(self.jacobian(X), value[..., None])[..., 0]
+            except np.linalg.LinAlgError:
+                break
+            better = np.linalg.norm(self(Y), axis=1) < np.linalg.norm(value, axis=1)
+            X[better] = Y[better]
+
+        # a spherical root is a double root of the companion polynomial, so a simple root of
+        # its derivative
+        S = z[spherical]
+        dC = np.polyder(self.companion()[::-1])
+        ddC = np.polyder(dC)
+        for _ in range(polish if len(S) else 0):
+            slope = np.polyval(ddC, S)
+            S = np.where(slope != 0, S - np.polyval(dC, S)/np.where(slope != 0, slope, 1), S)
+
+        return X, np.stack((S.real, np.abs(S.imag)), axis=1)
+
+# End of QuaternionPolynomial class
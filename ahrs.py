@@ -0,0 +1,321 @@
+# Attitude and heading reference filters for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains orientation filters fusing gyroscope, accelerometer and (optionally)
+# magnetometer samples of many devices at once. The state of D devices is a (D, 4) array of
+# versors and every update advances all of them with vectorized kernels.
+#
+# Conventions: gyroscope in rad/s, all the samples in the sensor frame. The orientation q maps
+# sensor to earth coordinates, v_earth = q*v_sensor*q^-1 (Quaternion.rotate_point with
+# passive=True), and the earth z axis points upward, so a still accelerometer reads +z.
+
+import numpy as np
+import batch
+from abc import ABC, abstractmethod
+from Quaternion import Versor
+
+
+## Base filter ##
+class AttitudeFilter(ABC):
+    '''Base class of the batched attitude filters.
+
+    Attributes:
+    - q: (D, 4) array of the orientations of the devices
+    - devices: number of devices D
+    '''
+
+    def __init__(self, devices:int, q0=None):
+        '''Initializer of AttitudeFilter object.
+
+        Arguments:
+        - devices[int]: number of devices
+        - q0: initial orientations, one (4,) versor for all or a (D, 4) array; default is identity
+        '''
+        if not isinstance(devices, int) or devices <= 0:
+            raise ValueError("devices must be a positive integer")
+
+        self.devices = devices
+        self.q = np.tile([1.0, 0, 0, 0], (devices, 1))
+        if q0 is not None:
+            self.q[:] = batch.normalize(q0)
+
+    def versors(self) -> list[Versor]:
+        '''Returns the orientations as a list of Versor objects.'''
+        return batch.to_quaternions(self.q, Versor)
+
+    def update(self, gyro, accel=None, mag=None, dt:float=0.01, mask=None) -> np.ndarray:
+        '''Advances every device by one sample.
+
+        Devices whose gyroscope sample is missing (masked out or not finite) keep their state;
+        missing accelerometer or magnetometer samples only skip the corresponding correction.
+
+        Arguments:
+        - gyro: (D, 3) angular rates in rad/s
+        - accel: (D, 3) accelerations (any unit), or None
+        - mag: (D, 3) magnetic fields (any unit), or None
+        - dt: time step in seconds, a float or a (D,) array
+        - mask: (D,) booleans, False for devices without a new sample
+
+        Returns the (D, 4) array of the orientations.
+        '''
+        gyro = np.asarray(gyro, dtype=float).reshape(self.devices, 3)
+        active = np.all(np.isfinite(gyro), axis=1)
+        if mask is not None:
+            active &= np.asarray(mask, dtype=bool).reshape(self.devices)
+
+        if not np.any(active):
+            return self.q
+
+        idx = np.flatnonzero(active)
+        a = None if accel is None else np.asarray(accel, dtype=float).reshape(self.devices, 3)[idx]
+        m = None if mag is None else np.asarray(mag, dtype=float).reshape(self.devices, 3)[idx]
+        dt = np.broadcast_to(np.asarray(dt, dtype=float), (self.devices,))[idx][:, None]
+
+        self._step(idx, gyro[idx], a, m, dt)
+        return self.q
+
+    @abstractmethod
+    def _step(self, idx:np.ndarray, gyro:np.ndarray, accel, mag, dt:np.ndarray):
+        '''Advances the devices idx; implemented by the subclasses.'''
+
+    def run(self, gyro, accel=None, mag=None, dt:float=0.01, chunk:int=1024):
+        '''Processes recorded logs, yielding the orientations chunk by chunk.
+
+        Arguments:
+        - gyro, accel, mag: arrays of shape (T, D, 3) (accel and mag can be None); samples with
+        NaN are treated as missing
+        - dt: time step, a float or a (T,) array
+        - chunk[int]: number of time steps in each yielded (chunk, D, 4) array
+        '''
+        gyro = np.asarray(gyro, dtype=float)
+        T = gyro.shape[0]
+        dt = np.broadcast_to(np.asarray(dt, dtype=float), (T,))
+
+        for start in range(0, T, chunk):
+            stop = min(start + chunk, T)
+            out = np.empty((stop - start, self.devices, 4))
+            for t in range(start, stop):
+                out[t - start] = self.update(gyro[t], None if accel is None else accel[t],
+                                             None if mag is None else mag[t], dt[t])
+            yield out
+
+    ## Kernels shared by the filters ##
+    @staticmethod
+    def _unit_rows(v:np.ndarray) -> tuple[np.ndarray]:
+        '''Returns the normalized rows of v and the mask of the rows that are finite and non
+        zero.'''
+        norm = np.linalg.norm(v, axis=1)
+        valid = np.isfinite(norm) & (norm > 0)
+        return np.where(valid[:, None], v / np.where(valid, norm, 1.0)[:, None], 0.0), valid
+
+    @staticmethod
+    def _integrate(q:np.ndarray, omega:np.ndarray, dt) -> np.ndarray:
+        '''Returns the normalized q + dt*q*(0, omega)/2.'''
+        rate = 0.5*batch.multiply(q, np.concatenate((np.zeros((q.shape[0], 1)), omega), axis=1))
+        return batch.normalize(q + rate*dt)
+
+    @staticmethod
+    def _earth_field(q:np.ndarray, m:np.ndarray) -> np.ndarray:
+        '''Returns the (D, 2) reference (bx, bz) of the magnetic field in the earth frame: the
+        measured direction rotated to earth, with the horizontal part moved onto the x axis.'''
+        h = batch.rotate_points(q, m, passive=True)
+        return np.stack((np.hypot(h[:, 0], h[:, 1]), h[:, 2]), axis=1)
+
+    @staticmethod
+    def _sensor_directions(q:np.ndarray, b:np.ndarray=None) -> np.ndarray:
+        '''Returns the expected (D, 3) directions, in the sensor frame, of gravity (if b is None)
+        or of the magnetic field with earth reference b = (bx, bz).'''
+        q0, q1, q2, q3 = q.T
+        gravity = np.stack((2*(q1*q3 - q0*q2), 2*(q0*q1 + q2*q3), q0*q0 - q1*q1 - q2*q2 + q3*q3), axis=1)
+        if b is None:
+            return gravity
+
+        bx, bz = b[:, :1], b[:, 1:]
+        north = np.stack((1 - 2*(q2*q2 + q3*q3), 2*(q1*q2 - q0*q3), 2*(q0*q2 + q1*q3)), axis=1)
+        return bx*north + bz*gravity
+
+    @staticmethod
+    def _skew(v:np.ndarray) -> np.ndarray:
+        '''Returns the (D, 3, 3) cross-product matrices of the rows of v.'''
+        S = np.zeros(v.shape[:-1] + (3, 3))
+        S[..., 0, 1], S[..., 0, 2], S[..., 1, 2] = -v[..., 2], v[..., 1], -v[..., 0]
+        S[..., 1, 0], S[..., 2, 0], S[..., 2, 1] = v[..., 2], -v[..., 1], v[..., 0]
+        return S
+
+# End of AttitudeFilter class
+
+
+
+## Madgwick ##
+class Madgwick(AttitudeFilter):
+    '''Madgwick's gradient descent filter.
+
+    The gyroscope rate is corrected by a step of length beta along the normalized gradient of
+    the misalignment between measured and expected gravity (and magnetic field).
+
+    Attributes:
+    - beta: gain of the gradient step, in rad/s
+    '''
+
+    def __init__(self, devices:int, beta:float=0.1, q0=None):
+        '''Initializer of Madgwick object (see AttitudeFilter); beta is the filter gain.'''
+        super().__init__(devices, q0)
+        self.beta = beta
+
+    def _step(self, idx, gyro, accel, mag, dt):
+        '''Advances the devices idx by one gradient descent step.'''
+        q = self.q[idx]
+        rate = 0.5*batch.multiply(q, np.concatenate((np.zeros((len(idx), 1)), gyro), axis=1))
+
+        if accel is not None:
+            a, valid = self._unit_rows(accel)
+            q0, q1, q2, q3 = q.T
+            f = self._sensor_directions(q) - a
+            J = np.zeros((len(idx), 3, 4))
+            J[:, 0] = np.stack((-2*q2, 2*q3, -2*q0, 2*q1), axis=1)
+            J[:, 1] = np.stack((2*q1, 2*q0, 2*q3, 2*q2), axis=1)
+            J[:, 2, 1], J[:, 2, 2] = -4*q1, -4*q2
+            grad = np.einsum('dij,di->dj', J, f)
+
+            if mag is not None:
+                m, has_mag = self._unit_rows(mag)
+                b = self._earth_field(q, m)
+                bx, bz = b[:, 0], b[:, 1]
+                f = self._sensor_directions(q, b) - m
+                J = np.empty((len(idx), 3, 4))
+                J[:, 0] = np.stack((-2*bz*q2, 2*bz*q3, -4*bx*q2 - 2*bz*q0, -4*bx*q3 + 2*bz*q1), axis=1)
+                J[:, 1] = np.stack((-2*bx*q3 + 2*bz*q1, 2*bx*q2 + 2*bz*q0, 2*bx*q1 + 2*bz*q3,
+                                    -2*bx*q0 + 2*bz*q2), axis=1)
+                J[:, 2] = np.stack((2*bx*q2, 2*bx*q3 - 4*bz*q1, 2*bx*q0 - 4*bz*q2, 2*bx*q1), axis=1)
+                grad += np.where(has_mag[:, None], np.einsum('dij,di->dj', J, f), 0.0)
+
+            grad, _ = self._unit_rows(grad)
+            rate -= self.beta * np.where(valid[:, None], grad, 0.0)
+
+        self.q[idx] = batch.normalize(q + rate*dt)
+
+# End of Madgwick class
+
+
+
+## Mahony ##
+class Mahony(AttitudeFilter):
+    '''Mahony's nonlinear complementary filter.
+
+    The gyroscope rate is corrected by a proportional-integral feedback of the cross product
+    between measured and expected directions of gravity (and magnetic field).
+
+    Attributes:
+    - kp, ki: proportional and integral gains
+    - bias: (D, 3) array of the integral terms (gyroscope bias estimates, with opposite sign)
+    '''
+
+    def __init__(self, devices:int, kp:float=1.0, ki:float=0.0, q0=None):
+        '''Initializer of Mahony object (see AttitudeFilter); kp and ki are the gains.'''
+        super().__init__(devices, q0)
+        self.kp, self.ki = kp, ki
+        self.bias = np.zeros((devices, 3))
+
+    def _step(self, idx, gyro, accel, mag, dt):
+        '''Advances the devices idx by one feedback step.'''
+        q = self.q[idx]
+        error = np.zeros((len(idx), 3))
+
+        if accel is not None:
+            a, valid = self._unit_rows(accel)
+            error += np.where(valid[:, None], np.cross(a, self._sensor_directions(q)), 0.0)
+
+            if mag is not None:
+                m, has_mag = self._unit_rows(mag)
+                w = self._sensor_directions(q, self._earth_field(q, m))
+                error += np.where((valid & has_mag)[:, None], np.cross(m, w), 0.0)
+
+        if self.ki > 0:
+            self.bias[idx] += self.ki*error*dt
+        self.q[idx] = self._integrate(q, gyro + self.kp*error + self.bias[idx], dt)
+
+# End of Mahony class
+
+
+
+## Multiplicative extended Kalman filter ##
+class MEKF(AttitudeFilter):
+    '''Multiplicative extended Kalman filter.
+
+    The error state of each device is the small rotation angle (3) and the gyroscope bias (3),
+    with a (6, 6) covariance; the orientation is corrected multiplicatively, q <- q*dq.
+
+    Attributes:
+    - bias: (D, 3) array of the gyroscope bias estimates
+    - P: (D, 6, 6) array of the covariances
+    - gyro_noise, bias_noise: spectral densities of the gyroscope noise and of the bias walk
+    - accel_noise, mag_noise: variances of the normalized measurements
+    '''
+
+    def __init__(self, devices:int, gyro_noise:float=1e-3, bias_noise:float=1e-6,
+                 accel_noise:float=1e-2, mag_noise:float=1e-2, q0=None):
+        '''Initializer of MEKF object (see AttitudeFilter) with the noise parameters.'''
+        super().__init__(devices, q0)
+        self.bias = np.zeros((devices, 3))
+        self.P = np.tile(np.diag([1e-2]*3 + [1e-4]*3), (devices, 1, 1))
+        self.gyro_noise, self.bias_noise = gyro_noise, bias_noise
+        self.accel_noise, self.mag_noise = accel_noise, mag_noise
+
+    def _step(self, idx, gyro, accel, mag, dt):
+        '''Advances the devices idx by one prediction and (if available) one correction.'''
+        n = len(idx)
+        omega = gyro - self.bias[idx]
+        q = self._integrate(self.q[idx], omega, dt)
+
+        # Prediction of the covariance
+        dt3 = dt[:, :, None]
+        Phi = np.tile(np.eye(6), (n, 1, 1))
+        Phi[:, :3, :3] -= self._skew(omega)*dt3
+        Phi[:, :3, 3:] = -np.eye(3)*dt3
+        Q = np.zeros((n, 6, 6))
+        Q[:, :3, :3] = np.eye(3)*self.gyro_noise*dt3
+        Q[:, 3:, 3:] = np.eye(3)*self.bias_noise*dt3
+        P = Phi @ self.P[idx] @ Phi.transpose(0, 2, 1) + Q
+
+        # Correction with the measured directions
+        rows, residuals, noises = [], [], []
+        if accel is not None:
+            a, valid = self._unit_rows(accel)
+            expected = self._sensor_directions(q)
+            rows.append((expected, valid))
+            residuals.append(a - expected)
+            noises.append(self.accel_noise)
+
+            if mag is not None:
+                m, has_mag = self._unit_rows(mag)
+                expected = self._sensor_directions(q, self._earth_field(q, m))
+                rows.append((expected, valid & has_mag))
+                residuals.append(m - expected)
+                noises.append(self.mag_noise)
+
+        bias = self.bias[idx]
+        if rows:
+            k = len(rows)
+            H = np.zeros((n, 3*k, 6))
+            R = np.zeros((n, 3*k, 3*k))
+            for j, ((expected, valid), noise) in enumerate(zip(rows, noises)):
+                H[:, 3*j:3*j+3, :3] = self._skew(expected) * valid[:, None, None]
+                R[:, 3*j:3*j+3, 3*j:3*j+3] = np.eye(3)*noise
+                residuals[j] = residuals[j] * valid[:, None]
+
+            z = np.concatenate(residuals, axis=1)
+            S = H @ P @ H.transpose(0, 2, 1) + R
+            K = np.linalg.solve(S, H @ P).transpose(0, 2, 1)
+            dx = np.einsum('dij,dj->di', K, z)
+            P = (np.eye(6) - K @ H) @ P
+
+            dq = np.concatenate((np.ones((n, 1)), 0.5*dx[:, :3]), axis=1)
+            q = batch.normalize(batch.multiply(q, dq))
+            bias = bias + dx[:, 3:]
+
+        self.q[idx], self.bias[idx] = q, bias
+        self.P[idx] = 0.5*(P + P.transpose(0, 2, 1))
+
+# End of MEKF class
@@ -0,0 +1,342 @@
+# Quaternion batch kernels for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains functions that operate on whole arrays of quaternions at once.
+# A batch is a numpy array of shape (N, 4), whose rows are the components (real, i, j, k).
+
+from Quaternion import Quaternion
+import numpy as np
+
+
+## Conversions ##
+def as_array(H_points) -> np.ndarray:
+    '''Returns the given quaternions as a float array of shape (N, 4).
+
+    Arguments:
+    - H_points: a Quaternion, an iterable of quaternions or an array-like of shape (4,)
+    or (N, 4)
+    '''
+    if isinstance(H_points, Quaternion):
+        return np.array([H_points.q], dtype=float)
+
+    if isinstance(H_points, np.ndarray):
+        arr = H_points.astype(float, copy=False)
+    else:
+        H_points = list(H_points)
+        if H_points and all(isinstance(item, Quaternion) for item in H_points):
+            arr = np.array([item.q for item in H_points], dtype=float)
+        else:
+            arr = np.asarray(H_points, dtype=float)
+
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1) if arr.size else arr.reshape(0, 4)
+
+    if arr.ndim != 2 or arr.shape[1] != 4:
+        raise ValueError(f"invalid shape {arr.shape}: a batch of quaternions must be (N, 4)")
+
+    return arr
+
+
+def to_quaternions(arr:np.ndarray, cls:type=Quaternion) -> list:
+    '''Converts an array of shape (N, 4) into a list of quaternions of class cls.'''
+    return [cls(*(float(x) for x in row)) for row in np.asarray(arr).reshape(-1, 4)]
+
+
+
+## Sign and grid ##
+def canonical(arr:np.ndarray, tol:float=1e-13) -> np.ndarray:
+    '''Returns a copy of the batch where every row is flipped, if needed, so that its first
+    non-negligible component is positive.
+
+    Since q and -q represent the same 3D rotation, this picks one representative of the pair.
+    '''
+    arr = as_array(arr)
+    mask = np.abs(arr) > tol
+    lead = arr[np.arange(arr.shape[0]), np.argmax(mask, axis=1)]
+    return arr * np.where(lead < 0, -1.0, 1.0)[:, None]
+
+
+def continuous(arr:np.ndarray) -> np.ndarray:
+    '''Returns a copy of the batch where every row is flipped, if needed, so that it lies on the
+    same hemisphere of the previous one (their dot product is not negative).
+
+    Since q and -q represent the same 3D rotation, this picks the representatives joined by the
+    shortest paths, as needed to interpolate or differentiate a sequence of orientations.
+    '''
+    arr = as_array(arr).copy()
+    dots = np.einsum('ij,ij->i', arr[1:], arr[:-1])
+    arr[1:] *= np.cumprod(np.where(dots < 0, -1.0, 1.0))[:, None]
+    return arr
+
+
+def quantize(arr:np.ndarray, step:float=1e-13) -> np.ndarray:
+    '''Returns the integer coordinates of the cells, of side step, containing each row.'''
+    if step <= 0:
+        raise ValueError("step must be a positive float")
+
+    return np.rint(as_array(arr) / step).astype(np.int64)
+
+
+
+## Deduplication ##
+def dedup(H_points, tol:float=1e-13, antipodal:bool=True) -> tuple[np.ndarray, np.ndarray]:
+    '''Collapses near-identical quaternions.
+
+    Every row is snapped to a grid of side tol (after picking the canonical sign, if antipodal
+    is True) and rows falling in the same cell are merged. The cost is a single sort, so it
+    scales to millions of orientations.
+
+    Returns a 2-tuple (unique, index) containing:
+        unique: array of shape (M, 4) with the first representative of each cell
+        index: array of shape (N,) such that unique[index] approximates the input
+
+    Notes:
+    - two quaternions closer than tol but lying across a cell border are kept apart
+    - with antipodal=True, the representatives have canonical sign
+
+    Arguments:
+    - H_points: iterable of quaternions or array of shape (N, 4)
+    - tol[float]: side of the grid cells
+    - antipodal[bool]: if set to True, q and -q are considered the same orientation
+    '''
+    arr = canonical(H_points, tol) if antipodal else as_array(H_points)
+    keys = quantize(arr, tol)
+
+    order = np.lexsort(keys.T[::-1])
+    sorted_keys = keys[order]
+    new_cell = np.empty(len(order), dtype=bool)
+    new_cell[:1] = True
+    np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1, out=new_cell[1:])
+
+    index = np.empty(len(order), dtype=np.int64)
+    index[order] = np.cumsum(new_cell) - 1
+    return arr[order[new_cell]], index
+
+
+
+## Predicates ##
+# Vectorized versions of the checks of Quaternion, with the tolerance tol in place of ACCURACY:
+# every function returns a boolean mask of shape (N,).
+
+def isclose(p, q, rtol:float=0, atol:float=1e-13, antipodal:bool=False) -> np.ndarray:
+    '''Checks which rows of p are close to the corresponding rows of q: every component must
+    satisfy |p - q| <= atol + rtol*|q|. With antipodal=True, rows close to -q are accepted too
+    (q and -q represent the same rotation). A single quaternion is broadcast against a batch.'''
+    p, q = as_array(p), as_array(q)
+    tol = atol + rtol*np.abs(q)
+    close = np.all(np.abs(p - q) <= tol, axis=1)
+    if antipodal:
+        close |= np.all(np.abs(p + q) <= tol, axis=1)
+    return close
+
+def allclose(p, q, rtol:float=0, atol:float=1e-13, antipodal:bool=False) -> bool:
+    '''Checks if all the rows of p are close to the ones of q (see isclose).'''
+    return bool(np.all(isclose(p, q, rtol, atol, antipodal)))
+
+
+def is_unit(H_points, tol:float=1e-13) -> np.ndarray:
+    '''Checks which rows have norm within tol from 1 (without square roots: the squared norm is
+    compared with the squared bounds).'''
+    arr = as_array(H_points)
+    sq = np.einsum('ij,ij->i', arr, arr)
+    lower = (1 - tol)**2 if tol < 1 else -1
+    return (sq > lower) & (sq < (1 + tol)**2)
+
+def is_real(H_points, tol:float=1e-13) -> np.ndarray:
+    '''Checks which rows have vector part within tol from zero.'''
+    return np.all(np.abs(as_array(H_points)[:, 1:]) <= tol, axis=1)
+
+def is_pure(H_points, tol:float=1e-13) -> np.ndarray:
+    '''Checks which rows are pure imaginary: real part within tol from zero and non-zero vector
+    part (see Quaternion.is_imagy).'''
+    arr = as_array(H_points)
+    return (np.abs(arr[:, 0]) <= tol) & np.any(np.abs(arr[:, 1:]) > tol, axis=1)
+
+def is_zero(H_points, tol:float=1e-13) -> np.ndarray:
+    '''Checks which rows have every component within tol from zero (see Quaternion.__bool__).'''
+    return np.all(np.abs(as_array(H_points)) <= tol, axis=1)
+
+def lengths(H_points, tol:float=1e-13) -> np.ndarray:
+    '''Returns len() of every row (see Quaternion.__len__): the number of components larger than
+    tol, or 1 for real quaternions.'''
+    large = np.abs(as_array(H_points)) > tol
+    return np.where(np.any(large[:, 1:], axis=1), np.count_nonzero(large, axis=1), 1)
+
+
+def validate_batch(H_points, unit:bool=False, tol:float=1e-13) -> dict:
+    '''Checks a batch of quaternions before using it.
+
+    Returns a dict with:
+    - 'rows': number of rows
+    - 'nonfinite': indices of the rows with nan or infinite components
+    - 'zero': indices of the zero rows (up to tol)
+    - 'not_unit': indices of the finite rows whose norm is not within tol from 1 (only if unit
+    is True, else an empty array)
+    - 'counts': dict with the number of rows of each of the previous kinds
+    - 'valid': True if no row is bad
+
+    The squared norms are computed once; components are inspected one by one only for the rows
+    whose squared norm is not finite.
+    '''
+    arr = as_array(H_points)
+    sq = np.einsum('ij,ij->i', arr, arr)
+
+    suspect = np.flatnonzero(~np.isfinite(sq))
+    nonfinite = suspect[~np.all(np.isfinite(arr[suspect]), axis=1)]
+
+    # |x| <= tol for every component implies sq <= 4*tol^2, so only those rows are inspected
+    small = np.flatnonzero(sq <= 4*tol*tol)
+    zero = small[np.all(np.abs(arr[small]) <= tol, axis=1)]
+
+    if unit:
+        not_unit = np.flatnonzero(~is_unit(arr, tol))
+        not_unit = not_unit[np.isin(not_unit, nonfinite, assume_unique=True, invert=True)]
+    else:
+        not_unit = np.empty(0, dtype=np.intp)
+
+    report = {'rows': arr.shape[0], 'nonfinite': nonfinite, 'zero': zero, 'not_unit': not_unit}
+    report['counts'] = {name: len(report[name]) for name in ('nonfinite', 'zero', 'not_unit')}
+    report['valid'] = not any(report['counts'].values())
+    return report
+
+
+
+## Algebra ##
+# Every function with the argument out writes its result there (an array of the right shape,
+# possibly one of the inputs) instead of allocating a new array, and returns it.
+
+def normalize(H_points, out:np.ndarray=None) -> np.ndarray:
+    '''Returns the batch with every row divided by its norm.'''
+    arr = as_array(H_points)
+    norm = np.linalg.norm(arr, axis=1)
+    if np.any(norm == 0):
+        raise ZeroDivisionError("It's not possible to normalize the zero quaternion")
+
+    return np.divide(arr, norm[:, None], out=out)
+
+
+_SIGNS = np.array([1.0, -1.0, -1.0, -1.0])
+
+def conjugate(H_points, out:np.ndarray=None) -> np.ndarray:
+    '''Returns the batch with the signs of the imaginary parts reversed.'''
+    return np.multiply(as_array(H_points), _SIGNS, out=out)
+
+
+def multiply(p:np.ndarray, q:np.ndarray, out:np.ndarray=None) -> np.ndarray:
+    '''Performs the rowwise Hamilton product p * q.
+
+    Both arguments are arrays whose last axis has length 4; the other axes are broadcast.
+    '''
+    p, q = np.asarray(p, dtype=float), np.asarray(q, dtype=float)
+    a1, b1, c1, d1 = np.moveaxis(p, -1, 0)
+    a2, b2, c2, d2 = np.moveaxis(q, -1, 0)
+
+    components = (a1*a2 - b1*b2 - c1*c2 - d1*d2,
+                  a1*b2 + b1*a2 + c1*d2 - d1*c2,
+                  a1*c2 + c1*a2 - b1*d2 + d1*b2,
+                  a1*d2 + d1*a2 + b1*c2 - c1*b2)
+    if out is None:
+        return np.stack(components, axis=-1)
+
+    for c in range(4):
+        out[..., c] = components[c]
+    return out
+
+
+
+def exp(H_points, out:np.ndarray=None) -> np.ndarray:
+    '''Rowwise quaternionic exponential. Real quaternions are mapped to e^real.'''
+    arr = as_array(H_points)
+    v_norm = np.linalg.norm(arr[:, 1:], axis=1)
+    safe = np.where(v_norm > 0, v_norm, 1.0)
+    e = np.exp(arr[:, 0])
+
+    out = np.empty_like(arr) if out is None else out
+    out[:, 0] = e*np.cos(v_norm)
+    out[:, 1:] = (e*np.where(v_norm > 0, np.sin(v_norm)/safe, 1.0))[:, None] * arr[:, 1:]
+    return out
+
+
+def log(H_points, out:np.ndarray=None) -> np.ndarray:
+    '''Rowwise quaternionic (natural) logarithm. For unitary quaternions the result is the
+    pure quaternion (theta/2)*axis of the associated rotation.'''
+    arr = as_array(H_points)
+    v_norm = np.linalg.norm(arr[:, 1:], axis=1)
+    norm = np.linalg.norm(arr, axis=1)
+    if np.any(norm == 0):
+        raise ZeroDivisionError("The logarithm of the zero quaternion is not defined")
+
+    angle = np.arctan2(v_norm, arr[:, 0])
+    out = np.empty_like(arr) if out is None else out
+    out[:, 0] = np.log(norm)
+    out[:, 1:] = (angle / np.where(v_norm > 0, v_norm, 1.0))[:, None] * arr[:, 1:]
+    return out
+
+
+
+## Geometry ##
+def rotation_matrices(H_points, passive:bool=False, out:np.ndarray=None) -> np.ndarray:
+    '''Returns the array of shape (N, 3, 3) of the rotation matrices M such that
+    M @ p == q.rotate_point(p, passive) for each quaternion q of the batch.
+
+    Note: the quaternions are normalized if they are not unitary.
+    '''
+    w, x, y, z = normalize(H_points).T
+    if passive:
+        w = -w      # the transpose
+
+    M = np.empty((len(w), 3, 3)) if out is None else out
+    M[:, 0, 0] = 1 - 2*(y*y + z*z)
+    M[:, 1, 1] = 1 - 2*(x*x + z*z)
+    M[:, 2, 2] = 1 - 2*(x*x + y*y)
+    M[:, 0, 1], M[:, 1, 0] = 2*(x*y + w*z), 2*(x*y - w*z)
+    M[:, 0, 2], M[:, 2, 0] = 2*(x*z - w*y), 2*(x*z + w*y)
+    M[:, 1, 2], M[:, 2, 1] = 2*(y*z + w*x), 2*(y*z - w*x)
+    return M
+
+
+def rotate_points(H_points, points:np.ndarray, passive:bool=False, out:np.ndarray=None) -> np.ndarray:
+    '''Rotates the points by the quaternions, rowwise, as Quaternion.rotate_point does.
+
+    Arguments:
+    - H_points: batch of N quaternions (or a single one, applied to every point)
+    - points: array of shape (N, 3) (or (3,) to rotate the same point by every quaternion)
+    - passive[bool]: if set to True, performs the inverse rotation
+    '''
+    points = np.asarray(points, dtype=float)
+    if points.shape[-1] != 3:
+        raise TypeError("points must be an array of 3-dimensional points")
+
+    M = rotation_matrices(H_points, passive)
+    if out is None:
+        return (M @ points[..., None])[..., 0]
+    np.matmul(M, points[..., None], out=out[..., None])
+    return out
+
+
+def slerp(p, q, t, shortest:bool=True) -> np.ndarray:
+    '''Performs the spherical linear interpolation between the rows of p and q.
+
+    Arguments:
+    - p, q: batches of unitary quaternions, of shape (N, 4) (or single quaternions)
+    - t: float or array of shape (N,) of parameters in [0, 1]
+    - shortest[bool]: if set to True, q is replaced by -q when it gives the shorter arc
+    '''
+    p, q = normalize(p), normalize(q)
+    t = np.asarray(t, dtype=float).reshape(-1, 1)
+
+    cos_omega = np.einsum('ij,ij->i', *np.broadcast_arrays(p, q))
+    if shortest:
+        q = q * np.where(cos_omega < 0, -1.0, 1.0)[:, None]
+        cos_omega = np.abs(cos_omega)
+
+    omega = np.arccos(np.clip(cos_omega, -1.0, 1.0))[:, None]
+    sin_omega = np.sin(omega)
+    near = sin_omega < 1e-8
+    safe = np.where(near, 1.0, sin_omega)
+
+    a = np.where(near, 1 - t, np.sin((1 - t)*omega) / safe)
+    b = np.where(near, t, np.sin(t*omega) / safe)
+    return normalize(a*p + b*q)
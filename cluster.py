@@ -0,0 +1,294 @@
+# Clustering of orientations for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains clustering algorithms for versors stored in arrays of shape (N, 4):
+# spherical k-means, mean-shift and DBSCAN.
+#
+# Every algorithm treats q and -q as the same rotation: the similarity of two versors is |<p, q>|
+# and their distance is the geodesic one of the rotations, 2*acos|<p, q>| (in radians, as
+# functions.geodesic_dist). Centroids are Markley's means: the eigenvector of the largest
+# eigenvalue of sum q*q^T, which does not depend on the signs of the rows.
+#
+# The rows are processed in chunks, so the memory needed does not grow with the product of the
+# number of rows and the number of centroids. The assignment step of k-means can run on worker
+# processes, which read the rows from shared memory.
+
+import numpy as np
+import batch
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Indices of the 10 distinct entries of the symmetric 4x4 matrix q*q^T
+_ROWS, _COLS = np.triu_indices(4)
+
+
+## Markley's mean ##
+def __scatter(X:np.ndarray, labels:np.ndarray, k:int, weights=None) -> np.ndarray:
+    '''Returns the (k, 10) array of the distinct entries of sum w*q*q^T over each cluster.'''
+    products = X[:, _ROWS] * X[:, _COLS]
+    if weights is not None:
+        products *= weights[:, None]
+    return np.stack([np.bincount(labels, products[:, c], minlength=k) for c in range(10)], axis=1)
+
+def __top_eigenvectors(S:np.ndarray) -> np.ndarray:
+    '''Returns the top eigenvectors of the symmetric matrices stored as (k, 10) arrays.'''
+    M = np.zeros((S.shape[0], 4, 4))
+    M[:, _ROWS, _COLS] = S
+    M[:, _COLS, _ROWS] = S
+    return batch.canonical(np.linalg.eigh(M)[1][:, :, -1])
+
+
+def mean(H_points, weights=None) -> np.ndarray:
+    '''Returns Markley's mean of the versors (a (4,) array with non-negative first non-zero
+    component): the versor maximizing the weighted sum of the squared dots with the rows.'''
+    X = batch.normalize(H_points)
+    w = None if weights is None else np.asarray(weights, dtype=float).reshape(-1)
+    return __top_eigenvectors(__scatter(X, np.zeros(X.shape[0], dtype=np.intp), 1, w))[0]
+
+
+def distances(H_points, centers) -> np.ndarray:
+    '''Returns the (N, K) array of the geodesic distances between the rows and the centers.'''
+    dots = np.abs(batch.normalize(H_points) @ batch.normalize(centers).T)
+    return 2*np.arccos(np.minimum(dots, 1.0))
+
+
+
+## Spherical k-means ##
+def __assign(X:np.ndarray, C:np.ndarray, k:int) -> tuple:
+    '''Assignment step on a chunk: returns the labels, the best similarities and the scatter
+    sums of the clusters.'''
+    dots = np.abs(X @ C.T)
+    labels = np.argmax(dots, axis=1)
+    return labels, dots[np.arange(X.shape[0]), labels], __scatter(X, labels, k)
+
+# Rows shared with the worker processes
+_shared = {}
+
+def __attach(name:str, shape:tuple):
+    '''Initializer of the worker processes: attaches the shared rows.'''
+    _shared['memory'] = shared_memory.SharedMemory(name=name)
+    _shared['X'] = np.ndarray(shape, dtype=float, buffer=_shared['memory'].buf)
+
+def __assign_shared(start:int, stop:int, C:np.ndarray) -> tuple:
+    '''Assignment step of the worker processes on the shared rows start:stop.'''
+    return __assign(_shared['X'][start:stop], C, C.shape[0])
+
+
+def __plus_plus(X:np.ndarray, k:int, rng:np.random.Generator, sample:int=100000) -> np.ndarray:
+    '''Returns k initial centroids chosen by k-means++ on a subsample of the rows, with
+    probabilities proportional to the squared chordal distance 1 - <p, q>^2.'''
+    if X.shape[0] > sample:
+        X = X[rng.choice(X.shape[0], sample, replace=False)]
+
+    C = [X[rng.integers(X.shape[0])]]
+    gap = np.maximum(1 - (X @ C[0])**2, 0)
+    for _ in range(1, k):
+        total = gap.sum()
+        i = rng.choice(X.shape[0], p=gap/total) if total > 0 else rng.integers(X.shape[0])
+        C.append(X[i])
+        gap = np.minimum(gap, np.maximum(1 - (X @ X[i])**2, 0))
+    return np.stack(C)
+
+
+def kmeans(H_points, k:int, iterations:int=100, tol:float=1e-8, chunk:int=1<<20,
+           workers:int=1, seed=None) -> tuple[np.ndarray]:
+    '''Spherical k-means with Markley's means as centroids.
+
+    Every row is assigned to the centroid with the largest |<q, c>| (the smallest geodesic
+    distance); every centroid becomes the mean of its rows. Empty clusters are restarted at the
+    rows farthest from their centroids.
+
+    Arguments:
+    - H_points: iterable of quaternions or (N, 4) array (normalized if not unitary)
+    - k[int]: number of clusters
+    - iterations[int]: maximum number of iterations
+    - tol[float]: stop when every centroid moves by less than tol (in 1 - |<c_old, c_new>|) or
+    when no label changes
+    - chunk[int]: number of rows assigned at once
+    - workers[int]: number of worker processes of the assignment step (1 runs in process)
+    - seed: seed of the random initialization
+
+    Returns the 2-tuple (centroids, labels) of arrays of shape (k, 4) and (N,).
+    '''
+    X = batch.normalize(H_points)
+    N = X.shape[0]
+    if not 0 < k <= N:
+        raise ValueError("k must be between 1 and the number of rows")
+
+    rng = np.random.default_rng(seed)
+    C = __plus_plus(X, k, rng)
+    bounds = [(s, min(s + chunk, N)) for s in range(0, N, chunk)]
+    labels, score = np.full(N, -1, dtype=np.intp), np.empty(N)
+
+    pool = memory = None
+    if workers > 1:
+        memory = shared_memory.SharedMemory(create=True, size=X.nbytes)
+        np.ndarray(X.shape, dtype=float, buffer=memory.buf)[:] = X
+        pool = ProcessPoolExecutor(workers, initializer=__attach, initargs=(memory.name, X.shape))
+
+    try:
+        for _ in range(iterations):
+            if pool is None:
+                results = (__assign(X[s:e], C, k) for s, e in bounds)
+            else:
+                results = pool.map(__assign_shared, *zip(*bounds), [C]*len(bounds))
+
+            S, changed = np.zeros((k, 10)), 0
+            for (s, e), (l, d, part) in zip(bounds, results):
+                changed += np.count_nonzero(labels[s:e] != l)
+                labels[s:e], score[s:e] = l, d
+                S += part
+            if not changed:
+                break
+
+            counts = np.bincount(labels, minlength=k)
+            new = __top_eigenvectors(S)
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                new[empty] = X[np.argsort(score)[:empty.size]]
+
+            moved = 1 - np.abs(np.einsum('ij,ij->i', new, C))
+            C = new
+            if not empty.size and np.all(moved < tol):
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+            memory.close()
+            memory.unlink()
+
+    for s, e in bounds:
+        labels[s:e] = np.argmax(np.abs(X[s:e] @ C.T), axis=1)
+    return C, labels
+
+
+
+## Mean-shift ##
+def mean_shift(H_points, bandwidth:float, seeds=None, iterations:int=50, tol:float=1e-12,
+               chunk:int=1<<16) -> tuple[np.ndarray]:
+    '''Mean-shift with a flat kernel of geodesic radius bandwidth.
+
+    Every seed moves to the Markley mean of the rows within bandwidth, until it stops; then the
+    modes closer than bandwidth/2 are merged (keeping the most populated) and every row is
+    labelled with its nearest mode.
+
+    Arguments:
+    - H_points: iterable of quaternions or (N, 4) array (normalized if not unitary)
+    - bandwidth[float]: radius of the kernel, in radians
+    - seeds: initial (S, 4) modes; by default, one row for each cell of side bandwidth/2
+    - iterations[int]: maximum number of shifts
+    - tol[float]: stop when every mode moves by less than tol (in 1 - |<m_old, m_new>|)
+    - chunk[int]: number of rows processed at once
+
+    Returns the 2-tuple (modes, labels) of arrays of shape (M, 4) and (N,).
+    '''
+    X = batch.normalize(H_points)
+    threshold = np.cos(bandwidth/2)
+    modes = batch.dedup(X, tol=bandwidth/2)[0] if seeds is None else batch.normalize(seeds)
+
+    def shift(modes):
+        S, counts = np.zeros((modes.shape[0], 10)), np.zeros(modes.shape[0])
+        for s in range(0, X.shape[0], chunk):
+            x = X[s:s + chunk]
+            near = np.abs(x @ modes.T) >= threshold
+            rows, cols = np.nonzero(near)
+            S += __scatter(x[rows], cols, modes.shape[0])
+            counts += near.sum(axis=0)
+        return S, counts
+
+    for _ in range(iterations):
+        S, counts = shift(modes)
+        keep = counts > 0
+        new = __top_eigenvectors(S[keep])
+        moved = 1 - np.abs(np.einsum('ij,ij->i', new, modes[keep]))
+        modes = new
+        if np.all(moved < tol):
+            break
+
+    # Merge close modes, the most populated first
+    _, counts = shift(modes)
+    order = np.argsort(-counts, kind='stable')
+    kept = []
+    for i in order:
+        if not kept or np.max(np.abs(modes[kept] @ modes[i])) < np.cos(bandwidth/4):
+            kept.append(i)
+    modes = modes[kept]
+
+    labels = np.empty(X.shape[0], dtype=np.intp)
+    for s in range(0, X.shape[0], chunk):
+        labels[s:s + chunk] = np.argmax(np.abs(X[s:s + chunk] @ modes.T), axis=1)
+    return modes, labels
+
+
+
+## DBSCAN ##
+def __root(parent:np.ndarray, i:np.ndarray) -> np.ndarray:
+    '''Returns the roots of the nodes i in the forest parent, and links the nodes to them.'''
+    r = parent[i]
+    while True:
+        up = parent[r]
+        if np.array_equal(up, r):
+            parent[i] = r
+            return r
+        r = up
+
+def __union(parent:np.ndarray, i:np.ndarray, j:np.ndarray):
+    '''Merges the trees of the pairs of nodes (i, j) in the forest parent, in place: every root
+    is hooked to the smallest root it meets, so that parent[n] <= n always holds.'''
+    while i.size:
+        ri, rj = __root(parent, i), __root(parent, j)
+        apart = ri != rj
+        np.minimum.at(parent, np.maximum(ri[apart], rj[apart]), np.minimum(ri[apart], rj[apart]))
+        i, j = i[apart], j[apart]
+
+
+def dbscan(H_points, eps:float, min_samples:int=5, chunk:int=4096) -> np.ndarray:
+    '''Density-based clustering with geodesic radius eps.
+
+    A row is core if at least min_samples rows (itself included) are within eps; clusters are
+    the connected components of the core rows, and the other rows within eps of a core row join
+    one of its clusters. The neighbours are found by chunks of the all-pairs similarities, so
+    the time grows as N^2; the edges of every chunk are merged into a union-find forest of the
+    core rows as soon as they are found, so the memory grows as chunk times the number of core
+    rows.
+
+    Arguments:
+    - H_points: iterable of quaternions or (N, 4) array (normalized if not unitary)
+    - eps[float]: radius of the neighbourhoods, in radians
+    - min_samples[int]: minimum size of the neighbourhood of a core row
+    - chunk[int]: number of rows processed at once
+
+    Returns the (N,) array of the labels 0, 1, ..., with -1 for noise.
+    '''
+    X = batch.normalize(H_points)
+    N = X.shape[0]
+    threshold = np.cos(eps/2)
+
+    counts = np.empty(N, dtype=np.intp)
+    for s in range(0, N, chunk):
+        counts[s:s + chunk] = np.sum(np.abs(X[s:s + chunk] @ X.T) >= threshold, axis=1)
+    core = np.flatnonzero(counts >= min_samples)
+
+    # Components of the core rows merged one chunk of edges at a time, and one core neighbour
+    # for every row
+    position = np.full(N, -1, dtype=np.intp)
+    position[core] = np.arange(core.size)
+    Y = X[core]
+    comp = np.arange(core.size)
+    neighbour = np.full(N, -1, dtype=np.intp)
+    for s in range(0, N, chunk):
+        near = np.abs(X[s:s + chunk] @ Y.T) >= threshold
+        has = near.any(axis=1)
+        neighbour[s:s + chunk][has] = np.argmax(near[has], axis=1)
+
+        rows, cols = np.nonzero(near)
+        rows = position[rows + s]
+        __union(comp, rows[rows >= 0], cols[rows >= 0])
+
+    comp = __root(comp, np.arange(core.size))
+    _, comp = np.unique(comp, return_inverse=True)
+    labels = np.full(N, -1, dtype=np.intp)
+    labels[neighbour >= 0] = comp[neighbour[neighbour >= 0]]
+    return labels
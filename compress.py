@@ -0,0 +1,191 @@
+# Compressed encodings of unitary quaternions for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains encoders and decoders to store or send versors in few bytes.
+#
+# Formats:
+# - 'st32': smallest-three in 32 bits (2 bits for the index, 3x10 bits), 4 bytes per versor
+# - 'st48': smallest-three in 48 bits (2 bits for the index, 3x15 bits), 6 bytes per versor
+# - 'half': the four components as IEEE half floats, 8 bytes per versor
+#
+# Error bounds (largest error on a component of the decoded versor, and angle between the
+# original and the decoded rotations):
+# - 'st32': |dq| <= 2.1e-3, angle <= 4.8e-3 rad (0.28 deg)
+# - 'st48': |dq| <= 6.5e-5, angle <= 1.5e-4 rad (0.0086 deg)
+# - 'half': |dq| <= 5.0e-4, angle <= 1.0e-3 rad (0.056 deg)
+#
+# The smallest-three scheme drops the component with the largest absolute value, after
+# choosing the sign of the versor that makes it positive, and rebuilds it from the unit norm.
+# The remaining three lie in [-1/sqrt(2), 1/sqrt(2)], so they are quantized on that range with
+# an error h = 1/(sqrt(2)*(2^b - 1)), where b is the number of bits per component. The rebuilt
+# component is at least 1/2, so its error is at most 3h, and the angle is at most 4*sqrt(3)*h.
+
+from Quaternion import Quaternion, Versor
+from batch import as_array
+import numpy as np
+
+_OTHERS = np.array([[1,2,3], [0,2,3], [0,1,3], [0,1,2]])
+_SQRT1_2 = np.sqrt(0.5)
+FORMATS = {'st32': 4, 'st48': 6, 'half': 8}
+
+
+## Auxiliary functions ##
+def __unit_rows(H_points) -> np.ndarray:
+    '''Returns the given quaternions as normalized rows of an (N, 4) array.'''
+    arr = as_array(H_points)
+    norm = np.linalg.norm(arr, axis=1)
+    if np.any(norm == 0):
+        raise ZeroDivisionError("The zero quaternion can't be encoded as a versor")
+
+    return arr / norm[:, None]
+
+def __as_bytes(data, width:int) -> np.ndarray:
+    '''Returns the encoded data as an array of shape (N, width) of uint8.'''
+    if isinstance(data, bytes|bytearray|memoryview):
+        data = np.frombuffer(data, dtype=np.uint8)
+
+    data = np.asarray(data, dtype=np.uint8)
+    if data.size % width:
+        raise ValueError(f"invalid length of data: it must be a multiple of {width} bytes")
+
+    return data.reshape(-1, width)
+
+def __bits_per_component(bits:int) -> int:
+    '''Returns the number of bits used for each of the three smallest components.'''
+    if bits not in (32, 48):
+        raise ValueError(f"invalid number of bits {bits}: it must be 32 or 48")
+
+    return (bits - 2)//3
+
+
+
+## Smallest-three ##
+def encode_st(H_points, bits:int=32) -> np.ndarray:
+    '''Encodes versors with the smallest-three scheme.
+
+    Returns an array of shape (N, bits//8) of uint8, that is, the little-endian codes. Use
+    .tobytes() on it to get the stream to be sent or stored.
+
+    Arguments:
+    - H_points: a quaternion, an iterable of quaternions or an array of shape (N, 4); they are
+    normalized before the encoding
+    - bits[int]: size of a code, 32 or 48
+    '''
+    b = __bits_per_component(bits)
+    top = (1 << b) - 1
+
+    arr = __unit_rows(H_points)
+    rows = np.arange(arr.shape[0])
+    index = np.argmax(np.abs(arr), axis=1)
+    arr *= np.where(arr[rows, index] < 0, -1.0, 1.0)[:, None]
+
+    rest = np.take_along_axis(arr, _OTHERS[index], axis=1)
+    u = np.rint((rest/_SQRT1_2 + 1) * (top/2))
+    u = np.clip(u, 0, top).astype(np.uint64)
+
+    code = ((index.astype(np.uint64) << np.uint64(3*b)) | (u[:, 0] << np.uint64(2*b)) |
+            (u[:, 1] << np.uint64(b)) | u[:, 2])
+    return code.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :bits//8].copy()
+
+
+def decode_st(data, bits:int=32) -> np.ndarray:
+    '''Decodes versors encoded with the smallest-three scheme.
+
+    Returns an array of shape (N, 4) of unitary quaternions.
+
+    Arguments:
+    - data: bytes or array of uint8 produced by encode_st
+    - bits[int]: size of a code, 32 or 48
+    '''
+    b = __bits_per_component(bits)
+    top = (1 << b) - 1
+    raw = __as_bytes(data, bits//8)
+
+    padded = np.zeros((raw.shape[0], 8), dtype=np.uint8)
+    padded[:, :bits//8] = raw
+    code = padded.view('<u8').reshape(-1)
+
+    mask = np.uint64(top)
+    index = (code >> np.uint64(3*b)).astype(np.intp) & 3
+    u = np.stack((code >> np.uint64(2*b) & mask, code >> np.uint64(b) & mask, code & mask), axis=1)
+    rest = (u.astype(float) * (2/top) - 1) * _SQRT1_2
+
+    out = np.empty((raw.shape[0], 4))
+    np.put_along_axis(out, _OTHERS[index], rest, axis=1)
+    largest = np.sqrt(np.maximum(0.0, 1 - np.einsum('ij,ij->i', rest, rest)))
+    out[np.arange(out.shape[0]), index] = largest
+
+    return out / np.linalg.norm(out, axis=1)[:, None]
+
+
+
+## Half floats ##
+def encode_half(H_points) -> np.ndarray:
+    '''Encodes versors as four IEEE half floats.
+
+    Returns an array of shape (N, 8) of uint8, that is, the little-endian codes.
+
+    Arguments:
+    - H_points: a quaternion, an iterable of quaternions or an array of shape (N, 4); they are
+    normalized before the encoding
+    '''
+    return __unit_rows(H_points).astype('<f2').view(np.uint8).reshape(-1, 8)
+
+
+def decode_half(data) -> np.ndarray:
+    '''Decodes versors encoded as half floats.
+
+    Returns an array of shape (N, 4) of unitary quaternions.
+
+    Arguments:
+    - data: bytes or array of uint8 produced by encode_half
+    '''
+    arr = __as_bytes(data, 8).copy().view('<f2').astype(float)
+    return arr / np.linalg.norm(arr, axis=1)[:, None]
+
+
+
+## Generic interface ##
+def encode(H_points, fmt:str='st32') -> np.ndarray:
+    '''Encodes versors in the given format ('st32', 'st48' or 'half').'''
+    match fmt:
+        case 'st32':
+            return encode_st(H_points, 32)
+        case 'st48':
+            return encode_st(H_points, 48)
+        case 'half':
+            return encode_half(H_points)
+        case _:
+            raise AttributeError(f"invalid format `{fmt}`: it must be one of {tuple(FORMATS)}")
+
+
+def decode(data, fmt:str='st32') -> np.ndarray:
+    '''Decodes versors stored in the given format ('st32', 'st48' or 'half').'''
+    match fmt:
+        case 'st32':
+            return decode_st(data, 32)
+        case 'st48':
+            return decode_st(data, 48)
+        case 'half':
+            return decode_half(data)
+        case _:
+            raise AttributeError(f"invalid format `{fmt}`: it must be one of {tuple(FORMATS)}")
+
+
+def pack(q:Quaternion, fmt:str='st32') -> bytes:
+    '''Encodes a single quaternion (normalized if it is not unitary) into bytes.'''
+    if not isinstance(q, Quaternion):
+        raise TypeError("unsupported operand type for pack: argument must be 'Quaternion'")
+
+    return encode(q, fmt).tobytes()
+
+
+def unpack(data:bytes, fmt:str='st32') -> Versor:
+    '''Decodes bytes produced by pack into a Versor.'''
+    arr = decode(data, fmt)
+    if arr.shape[0] != 1:
+        raise ValueError(f"invalid length of data: it must be {FORMATS[fmt]} bytes")
+
+    return Versor(*(float(x) for x in arr[0]))
@@ -0,0 +1,173 @@
+# Crystallographic symmetry for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains the rotational point groups of crystals as arrays of versors, the
+# reduction of orientations to the fundamental zone and the disorientation between them.
+#
+# Crystal symmetries act on the right: the orientations q*s, with s in the group, are all
+# equivalent to q. The misorientation between p and q is d = p^-1 * q, and its symmetric
+# equivalents are s1^-1 * d * s2; the disorientation is the smallest rotation angle among them,
+#           2*acos(max |<s1, d*s2>|),
+# since the real part of a^-1 * b is the dot product <a, b> for unitary a.
+#
+# Angles are in radians, as in functions.geodesic_dist.
+
+import numpy as np
+import batch
+from functools import lru_cache
+
+# Generators of the proper point groups: (angle in degrees, axis)
+SYMMETRIES = {
+    'triclinic':    (),
+    'monoclinic':   ((180, (0, 1, 0)),),
+    'orthorhombic': ((180, (1, 0, 0)), (180, (0, 1, 0))),
+    'trigonal':     ((120, (0, 0, 1)), (180, (1, 0, 0))),
+    'tetragonal':   ((90, (0, 0, 1)), (180, (1, 0, 0))),
+    'hexagonal':    ((60, (0, 0, 1)), (180, (1, 0, 0))),
+    'cubic':        ((90, (0, 0, 1)), (120, (1, 1, 1))),
+}
+
+
+## Symmetry groups ##
+@lru_cache(maxsize=None)
+def __closure(name:str) -> np.ndarray:
+    '''Returns the read-only group generated by the generators of SYMMETRIES[name].'''
+    if name not in SYMMETRIES:
+        raise AttributeError(f"invalid symmetry `{name}`: it must be one of {tuple(SYMMETRIES)}")
+
+    gens = [np.array([1.0, 0, 0, 0])]
+    for angle, axis in SYMMETRIES[name]:
+        half = np.radians(angle)/2
+        gens.append(np.concatenate(([np.cos(half)], np.sin(half)*np.asarray(axis)/np.linalg.norm(axis))))
+    gens = np.stack(gens)
+
+    # Multiply by the generators until no new element appears
+    elements = gens
+    while True:
+        products = batch.multiply(np.repeat(elements, len(gens), axis=0), np.tile(gens, (len(elements), 1)))
+        grown, _ = batch.dedup(np.concatenate((elements, products)), tol=1e-9)
+        if len(grown) == len(elements):
+            break
+        elements = grown
+
+    # identity first, then by increasing rotation angle
+    elements = elements[np.argsort(-np.abs(elements[:, 0]), kind='stable')]
+    elements.setflags(write=False)
+    return elements
+
+def group(name:str) -> np.ndarray:
+    '''Returns the (K, 4) array of the versors of the rotational point group of the given crystal
+    system (see SYMMETRIES), one for each pair q, -q, starting from the identity. For example,
+    the cubic group has 24 elements and the hexagonal one 12.'''
+    return __closure(name)
+
+def __as_group(sym) -> np.ndarray:
+    '''Returns the group given by name or as an array of versors.'''
+    return group(sym) if isinstance(sym, str) else batch.as_array(sym) if not isinstance(sym, np.ndarray) else sym
+
+def min_angle(sym) -> float:
+    '''Returns the smallest rotation angle of a non-identity element of the group (for example
+    pi/2 for the cubic one), or pi if the group is trivial.'''
+    G = __as_group(sym)
+    if len(G) == 1:
+        return np.pi
+    return 2*np.arccos(min(np.max(np.abs(G[1:, 0])), 1.0))
+
+
+
+## Fundamental zone ##
+def reduce(H_points, sym) -> np.ndarray:
+    '''Reduces the orientations to the fundamental zone of the group: every row q is replaced by
+    its equivalent q*s with the smallest rotation angle, with non-negative real part.
+
+    Arguments:
+    - H_points: iterable of quaternions or (N, 4) array (normalized if not unitary)
+    - sym: name of the crystal system or (K, 4) array of the group
+    '''
+    q = batch.normalize(H_points)
+    G = __as_group(sym)
+
+    # real part of q*s is <q, conj(s)>
+    best = np.argmax(np.abs(q @ batch.conjugate(G).T), axis=1)
+    out = batch.multiply(q, G[best])
+    out[out[:, 0] < 0] *= -1
+    return out
+
+
+def in_fundamental_zone(H_points, sym, tol:float=1e-12) -> np.ndarray:
+    '''Returns the boolean mask of the orientations already in the fundamental zone.'''
+    q = batch.normalize(H_points)
+    G = __as_group(sym)
+    return np.abs(q[:, 0]) + tol >= np.max(np.abs(q @ batch.conjugate(G).T), axis=1)
+
+
+
+## Disorientation ##
+def __operators(G1:np.ndarray, G2:np.ndarray) -> np.ndarray:
+    '''Returns the conjugates of the distinct products s2 * s1^-1, as columns of a (4, M) array.'''
+    if G2 is G1:
+        return batch.conjugate(G1).T
+    products = batch.multiply(np.repeat(G2, len(G1), axis=0), np.tile(batch.conjugate(G1), (len(G2), 1)))
+    return batch.conjugate(batch.dedup(products, tol=1e-9)[0]).T
+
+def disorientation(p, q, sym, sym2=None, chunk:int=65536, degrees:bool=False) -> np.ndarray:
+    '''Returns the (N,) array of disorientation angles between the rows of p and q.
+
+    The angle of s1^-1 * d * s2 equals the angle of its conjugate d * s2 * s1^-1, so the search
+    over the K1 x K2 pairs of operators is a single matrix product with the distinct products
+    s2 * s1^-1 (the group itself when both orientations have the same symmetry), done in chunks.
+    With the same symmetry, pairs whose misorientation angle is at most half of the smallest
+    angle of the group are already in the fundamental zone and skip the search.
+
+    Arguments:
+    - p, q: iterables of quaternions or (N, 4) arrays (broadcast if one has a single row)
+    - sym: crystal system (or group array) of p
+    - sym2: crystal system of q; default value is sym
+    - chunk[int]: number of pairs processed at once
+    - degrees[bool]: if True, the angles are in degrees
+    '''
+    p, q = batch.normalize(p), batch.normalize(q)
+    p, q = np.broadcast_arrays(p, q)
+    G1 = __as_group(sym)
+    G2 = G1 if sym2 is None else __as_group(sym2)
+
+    d = batch.multiply(batch.conjugate(p), q)
+    best = np.abs(d[:, 0])
+
+    # Early termination (same group): angle(d * s) >= min_angle - angle(d) when s != 1
+    if G2 is G1:
+        todo = np.flatnonzero(best < np.cos(min_angle(G1)/4))
+    else:
+        todo = np.arange(len(d))
+
+    # real part of d * g is <d, conj(g)>
+    ops = __operators(G1, G2)
+    for start in range(0, len(todo), chunk):
+        idx = todo[start:start + chunk]
+        best[idx] = np.max(np.abs(d[idx] @ ops), axis=1)
+
+    angles = 2*np.arccos(np.minimum(best, 1.0))
+    return np.degrees(angles) if degrees else angles
+
+
+def neighbour_disorientation(orientation_map, sym, chunk:int=65536, degrees:bool=False) -> tuple[np.ndarray]:
+    '''Returns the disorientations between neighbouring pixels of an orientation map.
+
+    Arguments:
+    - orientation_map: array of shape (H, W, 4)
+    - sym: crystal system (or group array) of the map
+    - chunk, degrees: see disorientation
+
+    Returns the 2-tuple of the arrays of shape (H, W-1), between each pixel and its right
+    neighbour, and (H-1, W), between each pixel and the one below.
+    '''
+    M = np.asarray(orientation_map, dtype=float)
+    if M.ndim != 3 or M.shape[-1] != 4:
+        raise ValueError("orientation_map must be an array of shape (H, W, 4)")
+
+    H, W, _ = M.shape
+    right = disorientation(M[:, :-1].reshape(-1, 4), M[:, 1:].reshape(-1, 4), sym, chunk=chunk, degrees=degrees)
+    down = disorientation(M[:-1].reshape(-1, 4), M[1:].reshape(-1, 4), sym, chunk=chunk, degrees=degrees)
+    return right.reshape(H, W - 1), down.reshape(H - 1, W)
@@ -0,0 +1,337 @@
+# Backend dispatch for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file routes the operations of Quaternion and functions.py to the best kernel for the
+# given input: a single Quaternion, a list of them or an array of shape (N, 4).
+#
+# Every operation has one kernel per backend. Scalar kernels (elementwise=True) are applied to
+# one Quaternion at a time; array kernels receive whole numpy arrays. THRESHOLDS[op][container]
+# maps each backend to the minimum batch size from which it is used, where container is 'list'
+# or 'array' (the conversions between Quaternion objects and arrays move the crossovers): a
+# batch of n elements goes to the backend with the largest threshold not above n. The command
+#           python dispatch.py [path]
+# measures the crossovers on the current machine (see calibrate) and saves them to a JSON file,
+# by default dispatch.json next to this file. At import, the thresholds are read back (see load)
+# from the file named by the environment variable QUATERNION_DISPATCH, or else from the default
+# file if it exists.
+#
+# The result has the container of the input: lists of Quaternion, tuples (for vectors) or
+# floats for lists, arrays of shape (N, 4), (N, 3) or (N,) for arrays, and a single array of
+# shape (4,) or (3,) (or a float) for single arrays of shape (4,).
+
+import os
+import json
+import numpy as np
+import batch
+import functions
+from Quaternion import Quaternion
+from typing import Callable, Iterable
+from time import perf_counter
+
+# Signature of each operation: kinds of the arguments and of the result, where 'q' is a
+# quaternion, 'p' a point of R3 and 's' a float
+OPERATIONS = {
+    'normalize':     (('q',), 'q'),
+    'conjugate':     (('q',), 'q'),
+    'inverse':       (('q',), 'q'),
+    'rotate_point':  (('q', 'p'), 'p'),
+    'dot':           (('q', 'q'), 's'),
+    'cross':         (('q', 'q'), 'p'),
+    'commutator':    (('q', 'q'), 'p'),
+    'exp':           (('q',), 'q'),
+    'log2':          (('q',), 'q'),
+    'geodesic_dist': (('q', 'q'), 's'),
+}
+
+# Shape of one row of the result of each kind
+__WIDTHS = {'q': (4,), 'p': (3,), 's': ()}
+
+KERNELS = {op: {} for op in OPERATIONS}
+CONTAINERS = ('list', 'array')
+THRESHOLDS = {op: {c: {} for c in CONTAINERS} for op in OPERATIONS}
+
+# Files of the calibrated thresholds
+ENVIRONMENT = 'QUATERNION_DISPATCH'
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dispatch.json')
+
+
+## Registry ##
+def register(op:str, backend:str, kernel:Callable, threshold:int|tuple=0, elementwise:bool=False):
+    '''Registers the kernel of an operation for a backend.
+
+    Arguments:
+    - op[str]: name of the operation (see OPERATIONS)
+    - backend[str]: name of the backend
+    - kernel[callable]: function with the arguments of the operation; if elementwise is True it
+    receives single Quaternions (and points), otherwise numpy arrays of shape (N, 4), (N, 3) or
+    (4,), (3,) for the arguments that are not batched
+    - threshold: minimum batch size from which the backend is used, an int or a 2-tuple with
+    the sizes for lists and for arrays
+    '''
+    if op not in OPERATIONS:
+        raise AttributeError(f"invalid operation `{op}`: it must be one of {tuple(OPERATIONS)}")
+
+    if isinstance(threshold, int):
+        threshold = (threshold, threshold)
+
+    KERNELS[op][backend] = (kernel, elementwise)
+    for container, t in zip(CONTAINERS, threshold):
+        THRESHOLDS[op][container][backend] = int(t)
+
+def backend(op:str, n:int, container:str='list') -> str:
+    '''Returns the name of the backend used for a batch of n elements given in a container
+    ('list' or 'array').'''
+    candidates = [(t, b) for b, t in THRESHOLDS[op][container].items() if t <= n]
+    if not candidates:
+        raise LookupError(f"no backend registered for `{op}` with batches of {n} elements")
+    return max(candidates)[1]
+
+
+
+## Dispatch ##
+def __is_single(arg, kind:str) -> bool:
+    '''Checks if the argument is a single quaternion (or point) instead of a batch.'''
+    if isinstance(arg, np.ndarray):
+        return arg.ndim == 1
+    if kind == 'q':
+        return isinstance(arg, Quaternion)
+    return not (len(arg) and isinstance(arg[0], Iterable))
+
+def __to_scalar(arg, kind:str, single:bool, n:int) -> Iterable:
+    '''Returns an iterable of n Quaternions (or points) for an elementwise kernel.'''
+    if single:
+        if kind == 'q' and isinstance(arg, np.ndarray):
+            arg = Quaternion(*map(float, arg))
+        return [arg]*n
+    if kind == 'q' and isinstance(arg, np.ndarray):
+        return [Quaternion(*row) for row in arg.tolist()]
+    return arg
+
+def __to_array(arg, kind:str) -> np.ndarray:
+    '''Returns the argument as a numpy array for an array kernel.'''
+    if isinstance(arg, Quaternion):
+        return np.array(arg.q, dtype=float)
+    if kind == 'q' and not isinstance(arg, np.ndarray):
+        return batch.as_array(arg)
+    return np.asarray(arg, dtype=float)
+
+
+def apply(op:str, *args, out=None, **kwargs):
+    '''Applies the operation to single or batched arguments, with the backend chosen by the
+    batch size. Single arguments are broadcast against the batched ones.
+
+    If out (an array or a list of the right length) is given, the results are copied there and
+    out is returned.
+    '''
+    if out is not None:
+        result = apply(op, *args, **kwargs)
+        out[:] = result
+        return out
+
+    kinds, result = OPERATIONS[op]
+    if len(args) != len(kinds):
+        raise TypeError(f"{op} takes {len(kinds)} positional argument(s), {len(args)} given")
+
+    single = [__is_single(a, k) for a, k in zip(args, kinds)]
+    sizes = {len(a) for a, s in zip(args, single) if not s}
+    if len(sizes) > 1:
+        raise ValueError(f"batched arguments of {op} must have the same length, not {sorted(sizes)}")
+
+    n = sizes.pop() if sizes else 1
+    batched = any(isinstance(a, np.ndarray) and not s for a, s in zip(args, single))
+    as_array = batched or (all(single) and any(isinstance(a, np.ndarray) for a in args))
+    kernel, elementwise = KERNELS[op][backend(op, n, 'array' if as_array else 'list')]
+
+    if elementwise:
+        columns = [__to_scalar(a, k, s, n) for a, k, s in zip(args, kinds, single)]
+        out = [kernel(*row, **kwargs) for row in zip(*columns)]
+        if not as_array:
+            return out
+        out = batch.as_array(out) if result == 'q' else np.array(out, dtype=float)
+    else:
+        out = kernel(*(__to_array(a, k) for a, k in zip(args, kinds)), **kwargs)
+        out = np.broadcast_to(out, (n,) + out.shape[1:]) if out.ndim and out.shape[0] == 1 else out
+
+    if as_array:
+        # single inputs give a single row: an array of shape (4,) or (3,), or a float
+        out = np.array(out).reshape((n,) + __WIDTHS[result])
+        return out if batched else out[0]
+
+    match result:
+        case 'q':
+            return batch.to_quaternions(out)
+        case 'p':
+            return [tuple(p) for p in out.tolist()]
+        case _:
+            return out.tolist()
+
+
+
+## Scalar backend ##
+register('normalize', 'scalar', lambda q: q.normalize(), elementwise=True)
+register('conjugate', 'scalar', lambda q: q.conjugate(), elementwise=True)
+register('inverse', 'scalar', lambda q: q.inverse(), elementwise=True)
+register('rotate_point', 'scalar', lambda q, p, passive=False: q.rotate_point(p, passive), elementwise=True)
+for op in ('dot', 'cross', 'commutator', 'exp', 'log2', 'geodesic_dist'):
+    register(op, 'scalar', getattr(functions, op), elementwise=True)
+
+
+
+## NumPy backend ##
+def __check_not_real(arr:np.ndarray):
+    '''Raises ZeroDivisionError as the scalar exp and log2 do on real quaternions.'''
+    if np.any(np.all(np.abs(arr[..., 1:]) <= 1e-13, axis=-1)):
+        raise ZeroDivisionError("This is real number, isn't it?")
+
+def __inverse(arr:np.ndarray) -> np.ndarray:
+    n = np.sum(arr*arr, axis=-1, keepdims=True)
+    if np.any(n == 0):
+        raise ZeroDivisionError("It's not possible to invert the zero quaternion")
+    return batch.conjugate(arr.reshape(-1, 4)) / n.reshape(-1, 1)
+
+def __exp(arr:np.ndarray) -> np.ndarray:
+    __check_not_real(arr)
+    return batch.exp(arr)
+
+def __log2(arr:np.ndarray) -> np.ndarray:
+    __check_not_real(arr)
+    arr = arr.reshape(-1, 4)
+    v_norm = np.linalg.norm(arr[:, 1:], axis=1)
+    ratio = arr[:, 0] / v_norm
+    if np.any(np.abs(ratio) > 1):
+        raise ValueError("math domain error")
+
+    out = np.empty_like(arr)
+    out[:, 0] = np.log2(v_norm)
+    out[:, 1:] = (np.arccos(ratio) / v_norm)[:, None] * arr[:, 1:]
+    return out
+
+def __geodesic_dist(a:np.ndarray, b:np.ndarray) -> np.ndarray:
+    for arr in (a, b):
+        if np.any(np.abs(np.linalg.norm(arr, axis=-1) - 1) >= 1e-13):
+            raise ArithmeticError("invalid argument(s) given: both quaternions must be unitary")
+    dots = np.sum(a*b, axis=-1).reshape(-1)
+    return np.arccos(np.clip(2*dots*dots - 1, -1, 1))
+
+# Default thresholds (lists, arrays): on lists the conversions to and from Quaternion objects
+# often cost more than the scalar loop
+register('normalize', 'numpy', batch.normalize, (64, 2))
+register('conjugate', 'numpy', batch.conjugate, (1024, 0))
+register('inverse', 'numpy', __inverse, (1024, 2))
+register('rotate_point', 'numpy', lambda q, p, passive=False: batch.rotate_points(q, p, passive).reshape(-1, 3), (4, 2))
+register('dot', 'numpy', lambda a, b: np.sum(a[..., 1:]*b[..., 1:], axis=-1).reshape(-1), (32, 2))
+register('cross', 'numpy', lambda a, b: np.cross(a[..., 1:], b[..., 1:]).reshape(-1, 3), (64, 4))
+register('commutator', 'numpy', lambda a, b: 2*np.cross(a[..., 1:], b[..., 1:]).reshape(-1, 3), (32, 4))
+register('exp', 'numpy', __exp, (1024, 4))
+register('log2', 'numpy', __log2, (1024, 4))
+register('geodesic_dist', 'numpy', __geodesic_dist, (16, 8))
+
+
+
+## Calibration ##
+def __sample(op:str, n:int, container:str) -> tuple:
+    '''Returns random arguments of the operation for a batch of n elements.'''
+    kinds, _ = OPERATIONS[op]
+    out = []
+    for kind in kinds:
+        if kind == 'p':
+            arr = np.random.randn(n, 3)
+            out.append(arr if container == 'array' else [tuple(p) for p in arr.tolist()])
+            continue
+
+        arr = np.random.randn(n, 4)
+        if op in ('geodesic_dist', 'rotate_point'):
+            arr = batch.normalize(arr)
+        if op == 'log2':
+            arr[:, 0] = 0.5*np.linalg.norm(arr[:, 1:], axis=1)      # domain of acos
+        out.append(arr if container == 'array' else batch.to_quaternions(arr))
+    return tuple(out)
+
+def __time(op:str, args:tuple, repeat:int) -> float:
+    '''Returns the best time of repeat calls of the operation.'''
+    best = float('inf')
+    for _ in range(repeat):
+        t = perf_counter()
+        apply(op, *args)
+        best = min(best, perf_counter() - t)
+    return best
+
+def calibrate(ops:Iterable[str]=None, sizes:Iterable[int]=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+              repeat:int=5, path:str=None) -> dict:
+    '''Measures every backend on random lists and arrays of the given sizes and sets the
+    thresholds: each backend is used from the size where it becomes the fastest (a backend that
+    is never the fastest gets a threshold above the largest size).
+
+    Arguments:
+    - ops: operations to calibrate; default value is all of them
+    - sizes: batch sizes to measure
+    - repeat[int]: number of timings per size (the minimum is kept)
+    - path[str]: if given, the thresholds are saved there as JSON
+
+    Returns the dictionary THRESHOLDS.
+    '''
+    sizes = sorted(sizes)
+    for op in OPERATIONS if ops is None else ops:
+        backends = list(KERNELS[op])
+        for container in CONTAINERS:
+            old = THRESHOLDS[op][container]
+            new = {b: sizes[-1] + 1 for b in backends}
+            previous = None
+
+            try:
+                for n in sizes:
+                    args = __sample(op, n, container)
+                    timings = {}
+                    for b in backends:
+                        # force the backend b
+                        THRESHOLDS[op][container] = {c: (0 if c == b else n + 1) for c in backends}
+                        timings[b] = __time(op, args, repeat)
+
+                    winner = min(timings, key=timings.get)
+                    if winner != previous:
+                        new[winner] = min(new[winner], 0 if previous is None else n)
+                        previous = winner
+            except Exception:
+                THRESHOLDS[op][container] = old
+                raise
+
+            THRESHOLDS[op][container] = new
+
+    if path is not None:
+        save(path)
+    return THRESHOLDS
+
+
+def save(path:str):
+    '''Saves the thresholds to a JSON file.'''
+    with open(path, 'w') as f:
+        json.dump(THRESHOLDS, f, indent=4)
+
+def load(path:str):
+    '''Loads the thresholds from a JSON file (operations, containers and backends that are not
+    registered are ignored).'''
+    with open(path) as f:
+        data = json.load(f)
+
+    for op, tables in data.items():
+        if op not in THRESHOLDS:
+            continue
+        for container, table in tables.items():
+            if container in CONTAINERS:
+                THRESHOLDS[op][container].update({b: int(t) for b, t in table.items() if b in KERNELS[op]})
+
+# Thresholds calibrated on this machine, if any (a path set in the environment must exist)
+if os.environ.get(ENVIRONMENT):
+    load(os.environ[ENVIRONMENT])
+elif os.path.isfile(DEFAULT_PATH):
+    load(DEFAULT_PATH)
+
+
+
+if __name__ == '__main__':
+    import sys
+    table = calibrate(path=sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)
+    for op, thresholds in table.items():
+        print(f'{op}: {thresholds}')
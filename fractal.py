@@ -0,0 +1,178 @@
+# Quaternion Julia and Mandelbrot sets for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains an escape-time engine for quaternionic dynamics: the map q -> f(q) + c is
+# iterated over the points of a 3D slice of H (one component fixed) until |q| exceeds the
+# bailout radius, and the number of iterations is recorded.
+#
+# Julia sets iterate the points of the slice with a fixed c; Mandelbrot sets iterate a fixed
+# starting point with c taken from the slice.
+#
+# The points still iterating are kept in compact arrays: at every iteration the escaped ones are
+# retired (selected by a boolean mask), so the cost of an iteration is proportional to the
+# points left, not to the whole grid. The slice is split in slabs along its first axis, which
+# can be computed by worker processes.
+#
+# Maps: f is q^2 by default; an integer d gives q^d, computed with complex arithmetic (for
+# q = a + r*u, with u unitary and pure, q^d = Re(z^d) + Im(z^d)*u, z = a + r*i); a
+# QuaternionPolynomial is evaluated by Horner's method; any other callable f(Q, C) -> Q on
+# (n, 4) arrays is the whole map (with worker processes it must be a module-level function).
+
+import numpy as np
+import batch
+from QuaternionPolynomial import QuaternionPolynomial
+from concurrent.futures import ProcessPoolExecutor
+
+
+## Grid ##
+def slice_points(bounds, resolution, fixed:float=0.0, axis:int=3) -> np.ndarray:
+    '''Returns the (nx, ny, nz, 4) array of the points of a 3D slice of H.
+
+    Arguments:
+    - bounds: three pairs (low, high) of the ranges of the free components, in order
+    - resolution: number of points along each free component (an int or three ints)
+    - fixed[float]: value of the fixed component
+    - axis[int]: index of the fixed component (0 real, 1 i, 2 j, 3 k)
+    '''
+    lows, highs, shape = __grid(bounds, resolution)
+    return __points(lows, highs, shape, fixed, axis, 0, shape[0])
+
+def __grid(bounds, resolution) -> tuple:
+    '''Checks the arguments of a slice and returns the lows, the highs and the shape.'''
+    bounds = np.asarray(bounds, dtype=float)
+    if bounds.shape != (3, 2) or np.any(bounds[:, 1] <= bounds[:, 0]):
+        raise ValueError("bounds must be three pairs (low, high) with low < high")
+    shape = (resolution,)*3 if isinstance(resolution, int) else tuple(resolution)
+    if len(shape) != 3 or min(shape) < 1:
+        raise ValueError("resolution must be a positive int or three positive ints")
+    return bounds[:, 0], bounds[:, 1], shape
+
+def __points(lows, highs, shape, fixed, axis, start, stop) -> np.ndarray:
+    '''Returns the points of the rows start:stop (along the first free axis) of a slice.'''
+    if axis not in range(4):
+        raise ValueError("axis must be 0, 1, 2 or 3")
+    axes = [np.linspace(lows[a], highs[a], shape[a]) for a in range(3)]
+    grid = np.meshgrid(axes[0][start:stop], axes[1], axes[2], indexing='ij')
+    free = [c for c in range(4) if c != axis]
+
+    P = np.empty((stop - start, shape[1], shape[2], 4))
+    P[..., axis] = fixed
+    for c, g in zip(free, grid):
+        P[..., c] = g
+    return P
+
+
+
+## Maps ##
+def __power(Q:np.ndarray, C:np.ndarray, d:int) -> np.ndarray:
+    '''Returns q^d + c for the rows of Q.'''
+    r = np.sqrt(np.einsum('ij,ij->i', Q[:, 1:], Q[:, 1:]))
+    if d == 2:
+        out = np.empty_like(Q)
+        out[:, 0] = Q[:, 0]*Q[:, 0] - r*r
+        np.multiply(Q[:, 1:], 2*Q[:, :1], out=out[:, 1:])
+        return np.add(out, C, out=out)
+
+    z = (Q[:, 0] + 1j*r)**d
+    out = Q*(z.imag/np.where(r > 0, r, 1))[:, None]
+    out[:, 0] = z.real
+    return np.add(out, C, out=out)
+
+def __step(Q:np.ndarray, C:np.ndarray, f) -> np.ndarray:
+    '''Applies the map q -> f(q) + c to the rows of Q (see the top of the file).'''
+    if f is None:
+        return __power(Q, C, 2)
+    if isinstance(f, int):
+        return __power(Q, C, f)
+    if isinstance(f, QuaternionPolynomial):
+        return np.add(f(Q), C)
+    return f(Q, C)
+
+
+
+## Engine ##
+def escape_time(Z, C, f=None, max_iter:int=64, bailout:float=4.0) -> np.ndarray:
+    '''Returns the escape times of the orbits of the map q -> f(q) + c.
+
+    Arguments:
+    - Z: (N, 4) array of the starting points (or a single quaternion for all of them)
+    - C: (N, 4) array of the constants (or a single quaternion for all of them)
+    - f: None (q^2), an int d (q^d), a QuaternionPolynomial or a callable f(Q, C) (see the top
+    of the file)
+    - max_iter[int]: maximum number of iterations
+    - bailout[float]: an orbit escapes when |q| > bailout
+
+    Returns the (N,) array of the number of iterations after which every orbit escaped, or
+    max_iter for the orbits that did not.
+    '''
+    Z, C = batch.as_array(Z), batch.as_array(C)
+    N = max(Z.shape[0], C.shape[0])
+    Q = np.broadcast_to(Z, (N, 4)).copy()
+    uniform = C.shape[0] == 1
+
+    counts = np.full(N, max_iter, dtype=np.int32)
+    alive = np.arange(N)
+    C_alive = C if uniform else np.broadcast_to(C, (N, 4)).copy()
+    limit = bailout*bailout
+
+    for it in range(1, max_iter + 1):
+        Q = __step(Q, C_alive, f)
+        escaped = np.einsum('ij,ij->i', Q, Q) > limit
+        escaped |= ~np.isfinite(Q[:, 0])
+        if escaped.any():
+            counts[alive[escaped]] = it
+            kept = ~escaped
+            alive, Q = alive[kept], Q[kept]
+            if not uniform:
+                C_alive = C_alive[kept]
+            if not alive.size:
+                break
+    return counts
+
+def __slab(args) -> np.ndarray:
+    '''Computes the escape times of a slab (run by the worker processes).'''
+    lows, highs, shape, fixed, axis, start, stop, c, z0, f, max_iter, bailout = args
+    P = __points(lows, highs, shape, fixed, axis, start, stop).reshape(-1, 4)
+    if c is None:
+        counts = escape_time(z0, P, f, max_iter, bailout)
+    else:
+        counts = escape_time(P, c, f, max_iter, bailout)
+    return counts.reshape(stop - start, shape[1], shape[2])
+
+def __render(bounds, resolution, fixed, axis, c, z0, f, max_iter, bailout, workers, slabs) -> np.ndarray:
+    '''Splits the slice in slabs and computes them, in process or on worker processes.'''
+    lows, highs, shape = __grid(bounds, resolution)
+    slabs = min(shape[0], slabs or max(1, 4*workers))
+    cuts = np.linspace(0, shape[0], slabs + 1).astype(int)
+    tasks = [(lows, highs, shape, fixed, axis, s, e, c, z0, f, max_iter, bailout)
+             for s, e in zip(cuts[:-1], cuts[1:]) if e > s]
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            return np.concatenate(list(pool.map(__slab, tasks)))
+    return np.concatenate([__slab(task) for task in tasks])
+
+
+def julia(c, bounds=((-1.5, 1.5),)*3, resolution=128, fixed:float=0.0, axis:int=3, f=None,
+          max_iter:int=64, bailout:float=4.0, workers:int=1, slabs:int=None) -> np.ndarray:
+    '''Returns the (nx, ny, nz) array of the escape times of the points of a 3D slice of H under
+    the map q -> f(q) + c (see escape_time and slice_points).
+
+    Arguments:
+    - c: the constant of the map (a quaternion)
+    - bounds, resolution, fixed, axis: see slice_points
+    - f, max_iter, bailout: see escape_time
+    - workers[int]: number of worker processes (1 runs in process)
+    - slabs[int]: number of slabs along the first axis; default value is 4*workers
+    '''
+    return __render(bounds, resolution, fixed, axis, batch.as_array(c), None, f, max_iter, bailout, workers, slabs)
+
+
+def mandelbrot(bounds=((-2, 1), (-1.5, 1.5), (-1.5, 1.5)), resolution=128, fixed:float=0.0,
+               axis:int=3, z0=(0, 0, 0, 0), f=None, max_iter:int=64, bailout:float=4.0,
+               workers:int=1, slabs:int=None) -> np.ndarray:
+    '''Returns the (nx, ny, nz) array of the escape times of the orbits of z0 under the maps
+    q -> f(q) + c, for c in a 3D slice of H (see julia for the arguments).'''
+    return __render(bounds, resolution, fixed, axis, None, batch.as_array(z0), f, max_iter, bailout, workers, slabs)
@@ -4,74 +4,130 @@
 # Licence:      MIT 2025
 
 # This class contains functions that operates in quaternionic space.
+#
+# Every function accepts also lists of quaternions or numpy arrays of shape (N, 4): such calls are
+# routed by dispatch.py to the fastest kernel for their size.
 
 from Quaternion import Quaternion
-from math import sqrt, sin, cos, e, log2, acos
+from math import sqrt, sin, cos, e, acos
+import math
+
+
+def __batched(q1, q2=None) -> bool:
+    '''Checks if the arguments are batches of quaternions, rather than single ones.'''
+    # no loops nor unions: it runs before every call on single quaternions, which must not allocate
+    if isinstance(q1, Quaternion) and (q2 is None or isinstance(q2, Quaternion)):
+        return False
+    return hasattr(q1, '__iter__') and (q2 is None or hasattr(q2, '__iter__'))
+
+def __dispatch(op:str, *args, out=None):
+    '''Routes a batched call to dispatch.apply (imported here, since it depends on numpy).'''
+    from dispatch import apply
+    return apply(op, *args, out=out)
+
+def __store_vector(out, x:float, y:float, z:float):
+    '''Writes a vector into out, a buffer of length 3 or a Quaternion (as a pure quaternion),
+    and returns out.'''
+    if isinstance(out, Quaternion):
+        return Quaternion.store(out, 0, x, y, z)
+    out[0] = x
+    out[1] = y
+    out[2] = z
+    return out
 
 
 def dot(q1: Quaternion, q2: Quaternion) -> float:
     '''Performs Euclidean dot product between vector parts of the two given quaternions.'''
 
+    if __batched(q1, q2):
+        return __dispatch('dot', q1, q2)
+
     if not (isinstance(q1, Quaternion) and isinstance(q2, Quaternion)):
         raise TypeError("unsupported operand type(s) for dot: arguments must be 'Quaternion'")
 
     return q1.i*q2.i + q1.j*q2.j + q1.k*q2.k
 
 
-def cross(q1: Quaternion, q2: Quaternion) -> tuple[float]:
+def cross(q1: Quaternion, q2: Quaternion, out=None) -> tuple[float]:
     '''Performs the cross product of two given quaternions relative to the orientation
     determined by the ordered basis i, j, and k of R3.
     It returns a 3-tuple of floats representing the orthogonal vector to vector parts of the
-    two given quaternions.
+    two given quaternions; if out (a buffer of length 3 or a Quaternion) is given, the vector is
+    written there and out is returned.
     '''
+    if __batched(q1, q2):
+        return __dispatch('cross', q1, q2, out=out)
+
     if not (isinstance(q1, Quaternion) and isinstance(q2, Quaternion)):
         raise TypeError("unsupported operand type(s) for cross: arguments must be 'Quaternion'")
 
     _i = q1.j*q2.k - q1.k*q2.j
     _j = q1.k*q2.i - q1.i*q2.k
     _k = q1.i*q2.j - q1.j*q2.i
-    return _i, _j, _k
+    if out is None:
+        return _i, _j, _k
+    return __store_vector(out, _i, _j, _k)
 
 
-def commutator(q1: Quaternion, q2: Quaternion) -> tuple[float]:
-    '''Performs the commutator of the vector parts of two given quaternions.'''
-    C = Quaternion.cross(q1, q2)
-    return 2*C[0], 2*C[1], 2*C[2]
+def commutator(q1: Quaternion, q2: Quaternion, out=None) -> tuple[float]:
+    '''Performs the commutator of the vector parts of two given quaternions (see cross for out).'''
+    if __batched(q1, q2):
+        return __dispatch('commutator', q1, q2, out=out)
 
+    if out is None:
+        C = cross(q1, q2)
+        return 2*C[0], 2*C[1], 2*C[2]
+
+    if not (isinstance(q1, Quaternion) and isinstance(q2, Quaternion)):
+        raise TypeError("unsupported operand type(s) for commutator: arguments must be 'Quaternion'")
+
+    return __store_vector(out, 2*(q1.j*q2.k - q1.k*q2.j), 2*(q1.k*q2.i - q1.i*q2.k), 2*(q1.i*q2.j - q1.j*q2.i))
+
+
+def exp(Q: Quaternion, out=None) -> Quaternion:
+    '''Quaternionic exponential function. If out (a Quaternion or a buffer of length 4) is given,
+    the result is written there and out is returned.'''
+    if __batched(Q):
+        return __dispatch('exp', Q, out=out)
 
-def exp(Q: Quaternion) -> Quaternion:
-    '''Quaternionic exponential function.'''
     if Q.is_real():
         raise ZeroDivisionError("This is real number, isn't it?")
 
-    v = Q.vector
-    v_norm = sqrt(v[0]**2 + v[1]**2 + v[2]**2)
+    _, x, y, z = Q.q
+    v_norm = sqrt(x**2 + y**2 + z**2)
 
     ecos = (e**Q.real)*cos(v_norm)
     esin = (e**Q.real)*sin(v_norm)
 
-    i = (v[0]/v_norm) * esin
-    j = (v[1]/v_norm) * esin
-    k = (v[2]/v_norm) * esin
+    i = (x/v_norm) * esin
+    j = (y/v_norm) * esin
+    k = (z/v_norm) * esin
 
+    if out is not None:
+        return Quaternion.store(out, ecos, i, j, k)
     return Quaternion(ecos, i, j, k)
 
 
-def log2(Q: Quaternion) -> Quaternion:
-    '''Quaternionic logarithmic function.'''
+def log2(Q: Quaternion, out=None) -> Quaternion:
+    '''Quaternionic logarithmic function (see exp for out).'''
+    if __batched(Q):
+        return __dispatch('log2', Q, out=out)
+
     if Q.is_real():
         raise ZeroDivisionError("This is real number, isn't it?")
 
-    v = Q.vector
-    v_norm = sqrt(v[0]**2 + v[1]**2 + v[2]**2)
+    _, x, y, z = Q.q
+    v_norm = sqrt(x**2 + y**2 + z**2)
 
-    lnq = log2(v_norm)
+    lnq = math.log2(v_norm)
     a_acos = acos(Q.real/v_norm)
 
-    i = (v[0]/v_norm) * a_acos
-    j = (v[1]/v_norm) * a_acos
-    k = (v[2]/v_norm) * a_acos
+    i = (x/v_norm) * a_acos
+    j = (y/v_norm) * a_acos
+    k = (z/v_norm) * a_acos
 
+    if out is not None:
+        return Quaternion.store(out, lnq, i, j, k)
     return Quaternion(lnq, i, j, k)
 
 
@@ -80,10 +136,14 @@ def geodesic_dist(q1: Quaternion, q2: Quaternion) -> float:
     
     It is the absolute value of half the angle subtended by them along a great arc of the 3-sphere.
     '''
+    if __batched(q1, q2):
+        return __dispatch('geodesic_dist', q1, q2)
+
     if not (isinstance(q1, Quaternion) and isinstance(q2, Quaternion)):
         raise TypeError("unsupported operand type(s) for geodesic_dist: arguments must be 'Quaternion'")
 
     if not q1.is_unit() or not q2.is_unit():
         raise ArithmeticError("invalid argument(s) given: both quaternions must be unitary")
 
-    return acos(2*(Quaternion.dot(q1,q2))**2 - 1)
+    inner = q1.real*q2.real + q1.i*q2.i + q1.j*q2.j + q1.k*q2.k
+    return acos(min(2*inner**2 - 1, 1))
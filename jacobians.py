@@ -0,0 +1,208 @@
+# Analytic Jacobians of batched quaternion operations for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains the closed-form Jacobians of the functions of batch.py, for nonlinear least
+# squares over many rotations. Every function takes the same arguments of its counterpart in
+# batch.py and returns arrays of shape (N, m, n): entry [i, r, c] is the derivative of the
+# component r of the output of row i with respect to the component c of the input (in the order
+# real, i, j, k for quaternions and x, y, z for points).
+#
+# Local (3-DoF) parametrization: a versor q is perturbed on its tangent space as q * exp(d/2),
+# with d a rotation vector in the body frame (the convention of kinematics.py and spline.py).
+# plus gives the (N, 4, 3) Jacobian of this map at d = 0, so that J @ plus(q) is the Jacobian of
+# any function with respect to d; minus is its left inverse.
+
+import numpy as np
+import batch
+
+_CONJUGATE = np.diag([1.0, -1.0, -1.0, -1.0])
+_SMALL = 1e-4       # below this angle the coefficients are computed by their Taylor series
+
+
+## Auxiliary functions ##
+def skew(v:np.ndarray) -> np.ndarray:
+    '''Returns the (N, 3, 3) matrices [v]x such that [v]x @ p == cross(v, p).'''
+    v = np.asarray(v, dtype=float).reshape(-1, 3)
+    S = np.zeros((v.shape[0], 3, 3))
+    S[:, 0, 1], S[:, 0, 2], S[:, 1, 2] = -v[:, 2], v[:, 1], -v[:, 0]
+    S[:, 1, 0], S[:, 2, 0], S[:, 2, 1] = v[:, 2], -v[:, 1], v[:, 0]
+    return S
+
+def left_matrices(H_points) -> np.ndarray:
+    '''Returns the (N, 4, 4) matrices L(p) such that L(p) @ q == p * q.'''
+    a, b, c, d = batch.as_array(H_points).T
+    return np.stack((np.stack((a, -b, -c, -d), axis=1),
+                     np.stack((b, a, -d, c), axis=1),
+                     np.stack((c, d, a, -b), axis=1),
+                     np.stack((d, -c, b, a), axis=1)), axis=1)
+
+def right_matrices(H_points) -> np.ndarray:
+    '''Returns the (N, 4, 4) matrices R(q) such that R(q) @ p == p * q.'''
+    a, b, c, d = batch.as_array(H_points).T
+    return np.stack((np.stack((a, -b, -c, -d), axis=1),
+                     np.stack((b, a, d, -c), axis=1),
+                     np.stack((c, -d, a, b), axis=1),
+                     np.stack((d, c, -b, a), axis=1)), axis=1)
+
+
+
+## Algebra ##
+def multiply(p, q) -> tuple[np.ndarray]:
+    '''Returns the (N, 4, 4) Jacobians of p * q with respect to p and to q (the product is
+    bilinear, so they are R(q) and L(p)).'''
+    return right_matrices(q), left_matrices(p)
+
+
+def conjugate(H_points) -> np.ndarray:
+    '''Returns the (N, 4, 4) Jacobians of the conjugation (constant matrices).'''
+    return np.broadcast_to(_CONJUGATE, (batch.as_array(H_points).shape[0], 4, 4)).copy()
+
+
+def normalize(H_points) -> np.ndarray:
+    '''Returns the (N, 4, 4) Jacobians of q/|q|, that is (I - u u^T)/|q| with u = q/|q|.'''
+    arr = batch.as_array(H_points)
+    norm = np.linalg.norm(arr, axis=1)
+    if np.any(norm == 0):
+        raise ZeroDivisionError("It's not possible to normalize the zero quaternion")
+
+    u = arr / norm[:, None]
+    return (np.eye(4) - u[:, :, None]*u[:, None, :]) / norm[:, None, None]
+
+
+def exp(H_points) -> np.ndarray:
+    '''Returns the (N, 4, 4) Jacobians of the quaternionic exponential (see batch.exp).'''
+    arr = batch.as_array(H_points)
+    v = arr[:, 1:]
+    theta = np.linalg.norm(v, axis=1)
+    small = theta < _SMALL
+    safe = np.where(small, 1.0, theta)
+    t2 = theta*theta
+
+    sinc = np.where(small, 1 - t2/6, np.sin(theta)/safe)
+    # (cos - sinc)/theta^2, the derivative of sinc divided by theta
+    dsinc = np.where(small, -1/3 + t2/30, (np.cos(theta) - sinc)/(safe*safe))
+    e = np.exp(arr[:, 0])
+
+    J = np.empty((arr.shape[0], 4, 4))
+    J[:, :, 0] = batch.exp(arr)
+    J[:, 0, 1:] = -(e*sinc)[:, None]*v
+    J[:, 1:, 1:] = e[:, None, None]*(sinc[:, None, None]*np.eye(3) + dsinc[:, None, None]*v[:, :, None]*v[:, None, :])
+    return J
+
+
+def log(H_points) -> np.ndarray:
+    '''Returns the (N, 4, 4) Jacobians of the quaternionic logarithm (see batch.log).
+
+    Note: the logarithm is not differentiable at the negative real quaternions, whose rows are
+    set to nan.
+    '''
+    arr = batch.as_array(H_points)
+    w, v = arr[:, 0], arr[:, 1:]
+    n2 = np.einsum('ij,ij->i', arr, arr)
+    if np.any(n2 == 0):
+        raise ZeroDivisionError("The logarithm of the zero quaternion is not defined")
+
+    r = np.linalg.norm(v, axis=1)
+    series = (r < _SMALL*np.abs(w)) & (w > 0)
+    singular = (r == 0) & (w < 0)
+    safe = np.where(series | singular, 1.0, r)
+    phi = np.arctan2(r, w)
+    ws = np.where(series, w, 1.0)
+
+    # g = (phi/r) v, dg/dv = (phi/r) I + c v v^T
+    ratio = np.where(series, 1/ws - r*r/(3*ws**3), phi/safe)
+    c = np.where(series, -2/(3*ws**3) + 4*r*r/(5*ws**5), w/(safe*safe*n2) - phi/safe**3)
+
+    J = np.empty((arr.shape[0], 4, 4))
+    J[:, 0, :] = arr / n2[:, None]
+    J[:, 1:, 0] = -v / n2[:, None]
+    J[:, 1:, 1:] = ratio[:, None, None]*np.eye(3) + c[:, None, None]*v[:, :, None]*v[:, None, :]
+    J[singular] = np.nan
+    return J
+
+
+
+## Geometry ##
+def rotate_points(H_points, points:np.ndarray, passive:bool=False, local:bool=False) -> tuple[np.ndarray]:
+    '''Returns the Jacobians of batch.rotate_points with respect to the quaternions and to the
+    points.
+
+    Arguments:
+    - H_points: batch of N quaternions (normalized if not unitary, as batch.rotate_points does)
+    - points: array of shape (N, 3) (or (3,))
+    - passive[bool]: if set to True, the rotation is the inverse one
+    - local[bool]: if set to True, the Jacobian with respect to the quaternion is taken on its
+    tangent space (see plus), with shape (N, 3, 3); otherwise it is (N, 3, 4)
+
+    Returns the pair (dq, dp), where dp has shape (N, 3, 3) (the rotation matrices).
+    '''
+    q = batch.normalize(H_points)
+    p = np.broadcast_to(np.asarray(points, dtype=float), (q.shape[0], 3))
+    M = batch.rotation_matrices(q, passive)
+
+    if local:
+        # q * exp(d/2) rotates passively as M (p + d x p), actively as exp(-d/2) applied to M p
+        if passive:
+            return -M @ skew(p), M
+        return skew((M @ p[..., None])[..., 0]), M
+
+    # passive: F(u) = p + 2w (v x p) + 2 v x (v x p) on the sphere; active: w -> -w
+    w = q[:, :1] if passive else -q[:, :1]
+    v = q[:, 1:]
+    vp = np.einsum('ij,ij->i', v, p)[:, None, None]
+    dF = np.empty((q.shape[0], 3, 4))
+    dF[:, :, 0] = 2*np.cross(v, p) * (1 if passive else -1)
+    dF[:, :, 1:] = (-2*w[:, :, None]*skew(p) + 2*(vp*np.eye(3) + v[:, :, None]*p[:, None, :]
+                                                  - 2*p[:, :, None]*v[:, None, :]))
+    return dF @ normalize(H_points), M
+
+
+
+## Local parametrization ##
+def plus(H_points) -> np.ndarray:
+    '''Returns the (N, 4, 3) Jacobians of q * exp(d/2) with respect to the rotation vector d,
+    at d = 0 (the columns are q*i/2, q*j/2, q*k/2).'''
+    return left_matrices(batch.normalize(H_points))[:, :, 1:] / 2
+
+
+def minus(H_points) -> np.ndarray:
+    '''Returns the (N, 3, 4) Jacobians of d = 2*log(q0^-1 * q) with respect to q, at q = q0:
+    the left inverse of plus (minus(q) @ plus(q) is the identity).'''
+    return 2*np.transpose(left_matrices(batch.normalize(H_points)), (0, 2, 1))[:, 1:, :]
+
+
+def local(J:np.ndarray, H_points) -> np.ndarray:
+    '''Returns the Jacobians J (shape (N, m, 4), with respect to the versors q) taken with
+    respect to the rotation vectors of their tangent spaces, with shape (N, m, 3).'''
+    return np.asarray(J) @ plus(H_points)
+
+
+def right_jacobian(rotvecs:np.ndarray) -> np.ndarray:
+    '''Returns the (N, 3, 3) right Jacobians Jr of the rotation vectors phi of SO(3):
+    exp((phi + d)/2) ~ exp(phi/2) * exp(Jr d/2) for small d.'''
+    phi = np.asarray(rotvecs, dtype=float).reshape(-1, 3)
+    theta = np.linalg.norm(phi, axis=1)
+    small = theta < _SMALL
+    safe = np.where(small, 1.0, theta)
+    t2 = theta*theta
+
+    a = np.where(small, 0.5 - t2/24, (1 - np.cos(theta))/(safe*safe))
+    b = np.where(small, 1/6 - t2/120, (theta - np.sin(theta))/safe**3)
+    S = skew(phi)
+    return np.eye(3) - a[:, None, None]*S + b[:, None, None]*(S @ S)
+
+
+def right_jacobian_inv(rotvecs:np.ndarray) -> np.ndarray:
+    '''Returns the (N, 3, 3) inverses of the right Jacobians (see right_jacobian), for rotation
+    angles below 2*pi.'''
+    phi = np.asarray(rotvecs, dtype=float).reshape(-1, 3)
+    theta = np.linalg.norm(phi, axis=1)
+    small = theta < _SMALL
+    safe = np.where(small, 1.0, theta)
+
+    c = np.where(small, 1/12 + theta*theta/720,
+                 1/(safe*safe) - (1 + np.cos(theta))/(2*safe*np.where(small, 1.0, np.sin(safe))))
+    S = skew(phi)
+    return np.eye(3) + S/2 + c[:, None, None]*(S @ S)
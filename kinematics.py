@@ -0,0 +1,235 @@
+# Kinematics of orientation sequences for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains batched kernels to recover angular velocities and accelerations from
+# sequences of orientations (arrays of shape (N, 4)) and to integrate angular velocities back.
+#
+# Conventions (as in spline.py): the body-frame angular velocity w satisfies dq/dt = q*w/2, with
+# w as pure quaternion; the world-frame one is q*w*q^-1 (batch.rotate_points with
+# passive=True). Angles are in radians and velocities in radians per unit of time.
+#
+# The step between consecutive samples is the relative rotation q_k^-1 * q_{k+1}, taken with
+# non-negative real part: a sign flip between samples (q and -q are the same rotation) does not
+# produce a spurious turn of 2*pi. Its rotation vector f_k = 2*log(q_k^-1 * q_{k+1}) is the
+# exact rotation of the interval, so integrating f_k/h_k over each interval gives back the
+# sequence.
+
+import numpy as np
+import batch
+from typing import Iterable, Iterator
+
+FRAMES = ('body', 'world')
+
+
+## Auxiliary functions ##
+def __intervals(n:int, times, dt) -> np.ndarray:
+    '''Returns the (n-1,) array of the lengths of the intervals between samples.'''
+    if times is None:
+        if dt is None or dt <= 0:
+            raise ValueError("a positive dt is needed when times are not given")
+        return np.full(max(n - 1, 0), float(dt))
+
+    times = np.asarray(times, dtype=float).reshape(-1)
+    if times.shape[0] != n:
+        raise ValueError(f"expected {n} timestamps, got {times.shape[0]}")
+    h = np.diff(times)
+    if np.any(h <= 0):
+        raise ValueError("times must be strictly increasing")
+    return h
+
+def __check_frame(frame:str):
+    '''Raises an exception if the frame is not valid.'''
+    if frame not in FRAMES:
+        raise ValueError(f"invalid frame `{frame}`: it must be one of {FRAMES}")
+
+def __pure(v:np.ndarray) -> np.ndarray:
+    '''Returns the (N, 4) pure quaternions of the (N, 3) vectors.'''
+    return np.concatenate((np.zeros((v.shape[0], 1)), v), axis=1)
+
+def steps(H_points) -> np.ndarray:
+    '''Returns the (N-1, 3) rotation vectors f_k = 2*log(q_k^-1 * q_{k+1}) of the steps between
+    consecutive versors, taking the shortest of the two signs of every step.'''
+    q = batch.normalize(H_points)
+    rel = batch.multiply(batch.conjugate(q[:-1]), q[1:])
+    rel[rel[:, 0] < 0] *= -1
+    return 2*batch.log(rel)[:, 1:]
+
+def __to_world(q:np.ndarray, v:np.ndarray) -> np.ndarray:
+    '''Returns the body-frame vectors v expressed in the world frame of the versors q.'''
+    return batch.rotate_points(q, v, passive=True)
+
+
+
+## Derivatives ##
+def angular_velocity(H_points, times=None, dt:float=None, frame:str='body',
+                     method:str='central') -> np.ndarray:
+    '''Returns the angular velocities of a sequence of orientations.
+
+    Arguments:
+    - H_points: iterable of quaternions or (N, 4) array (normalized if not unitary)
+    - times: (N,) increasing timestamps of the samples (possibly non-uniform)
+    - dt[float]: constant time between samples, used if times is None
+    - frame[str]: 'body' or 'world'
+    - method[str]:
+        'central': (N, 3) velocities at the samples, by second order central differences of the
+        rotation vectors around each sample (valid for non-uniform timestamps); first and last
+        samples use one-sided differences
+        'forward': (N-1, 3) mean velocities f_k/h_k over the intervals, the exact inverse of
+        integrate (in the world frame, expressed at the start of each interval)
+    '''
+    __check_frame(frame)
+    q = batch.normalize(H_points)
+    if q.shape[0] < 2:
+        raise ValueError("at least two orientations are needed")
+    h = __intervals(q.shape[0], times, dt)
+    f = steps(q)
+
+    if method == 'forward':
+        omega = f / h[:, None]
+        return __to_world(q[:-1], omega) if frame == 'world' else omega
+    if method != 'central':
+        raise ValueError(f"invalid method `{method}`: it must be 'central' or 'forward'")
+
+    # f(t) = 2*log(q_k^-1 * q(t)) is f_k at t_{k+1} and -f_{k-1} at t_{k-1}
+    omega = np.empty((q.shape[0], 3))
+    omega[0], omega[-1] = f[0]/h[0], f[-1]/h[-1]
+    a, b = h[:-1, None], h[1:, None]
+    omega[1:-1] = (a*a*f[1:] + b*b*f[:-1]) / (a*b*(a + b))
+    return __to_world(q, omega) if frame == 'world' else omega
+
+
+def angular_acceleration(H_points, times=None, dt:float=None, frame:str='body') -> np.ndarray:
+    '''Returns the (N, 3) angular accelerations of a sequence of orientations: the derivative
+    of the central angular velocities (see angular_velocity), by second order differences.
+    The world-frame acceleration is the body-frame one rotated to the world, since the term
+    w x w of the derivative of the rotation vanishes.'''
+    __check_frame(frame)
+    q = batch.normalize(H_points)
+    h = __intervals(q.shape[0], times, dt)
+    t = np.concatenate(([0], np.cumsum(h)))
+    alpha = np.gradient(angular_velocity(q, t), t, axis=0)
+    return __to_world(q, alpha) if frame == 'world' else alpha
+
+
+
+## Integration ##
+def __prefix_products(D:np.ndarray, left:bool=False) -> np.ndarray:
+    '''Returns the cumulative products D_0*D_1*...*D_k (or D_k*...*D_1*D_0 if left is True) of
+    the rows, by log2(N) rounds of batched multiplications (Hillis-Steele scan).'''
+    P = D.copy()
+    shift = 1
+    while shift < P.shape[0]:
+        if left:
+            P[shift:] = batch.multiply(P[shift:], P[:-shift])
+        else:
+            P[shift:] = batch.multiply(P[:-shift], P[shift:])
+        shift *= 2
+    return P
+
+def integrate(q0, omega, times=None, dt:float=None, frame:str='body') -> np.ndarray:
+    '''Integrates angular velocities, constant over each interval, from the orientation q0:
+    q_{k+1} = q_k * exp(w_k*h_k/2) in the body frame, exp(w_k*h_k/2) * q_k in the world frame.
+    With the velocities of angular_velocity(..., method='forward') it gives back the sequence
+    (with the signs of consecutive rows aligned).
+
+    Arguments:
+    - q0: initial orientation (a quaternion or a (4,) array, normalized if not unitary)
+    - omega: (N-1, 3) angular velocities of the intervals
+    - times: (N,) increasing timestamps, or None to use the constant step dt
+    - frame[str]: 'body' or 'world'
+
+    Returns the (N, 4) array of the orientations. The products are accumulated by a parallel
+    scan, so the whole sequence is computed by about log2(N) batched multiplications.
+    '''
+    __check_frame(frame)
+    omega = np.asarray(omega, dtype=float).reshape(-1, 3)
+    h = __intervals(omega.shape[0] + 1, times, dt)
+    q0 = batch.normalize(q0)
+
+    D = batch.exp(__pure(omega*h[:, None]/2))
+    if frame == 'world':
+        # world-frame velocities are expressed at the start of each interval
+        return np.concatenate((q0, batch.normalize(batch.multiply(__prefix_products(D, left=True), q0))))
+    return np.concatenate((q0, batch.normalize(batch.multiply(q0, __prefix_products(D)))))
+
+
+
+## Streaming ##
+def __timed_chunks(chunks, dt) -> Iterator[tuple]:
+    '''Yields (times, quaternions) from chunks given as arrays of quaternions (with constant
+    step dt) or as pairs (times, quaternions).'''
+    start = 0.0
+    for chunk in chunks:
+        if isinstance(chunk, tuple):
+            times, arr = chunk
+            times, arr = np.asarray(times, dtype=float).reshape(-1), batch.as_array(arr)
+        else:
+            if dt is None:
+                raise ValueError("dt is needed when the chunks do not contain their timestamps")
+            arr = batch.as_array(chunk)
+            times = start + dt*np.arange(arr.shape[0])
+            start += dt*arr.shape[0]
+        if arr.shape[0]:
+            yield times, arr
+
+
+def stream_angular_velocity(chunks:Iterable, dt:float=None, frame:str='body') -> Iterator[tuple]:
+    '''Central angular velocities of a long sequence of orientations, read chunk by chunk.
+
+    The result of the last sample of every chunk depends on the first sample of the next one,
+    so it is yielded with the next chunk: the concatenation of the results equals
+    angular_velocity(sequence, times, frame=frame).
+
+    Arguments:
+    - chunks: iterable of (n, 4) arrays (with constant step dt) or of pairs (times, array)
+    - dt[float]: time between samples, when the chunks have no timestamps
+    - frame[str]: 'body' or 'world'
+
+    Yields pairs (times, omega) of arrays of shape (m,) and (m, 3).
+    '''
+    __check_frame(frame)
+    tail_t, tail_q = np.empty(0), np.empty((0, 4))
+    first = True
+    for times, q in __timed_chunks(chunks, dt):
+        T, Q = np.concatenate((tail_t, times)), np.concatenate((tail_q, batch.normalize(q)))
+        if Q.shape[0] < 3:
+            tail_t, tail_q = T, Q
+            continue
+
+        omega = angular_velocity(Q, T, frame=frame)
+        start = 0 if first else 1
+        yield T[start:-1], omega[start:-1]
+        first = False
+        tail_t, tail_q = T[-2:], Q[-2:]
+
+    if tail_q.shape[0] >= 2:
+        start = 0 if first else 1
+        yield tail_t[start:], angular_velocity(tail_q, tail_t, frame=frame)[start:]
+
+
+def stream_integrate(q0, chunks:Iterable, dt:float=None, frame:str='body') -> Iterator[np.ndarray]:
+    '''Integrates a long sequence of angular velocities chunk by chunk (see integrate).
+
+    Arguments:
+    - q0: initial orientation
+    - chunks: iterable of (n, 3) arrays of the velocities of the intervals (with constant step
+    dt) or of pairs (h, array), where h are the (n,) lengths of the intervals
+    - dt[float]: length of the intervals, when the chunks do not contain them
+    - frame[str]: 'body' or 'world'
+
+    Yields the (n, 4) orientations at the end of the intervals of every chunk (q0 excluded).
+    '''
+    __check_frame(frame)
+    q = batch.normalize(q0)
+    for chunk in chunks:
+        if isinstance(chunk, tuple):
+            h, omega = chunk
+            times = np.concatenate(([0], np.cumsum(np.asarray(h, dtype=float))))
+        else:
+            omega, times = chunk, None
+        out = integrate(q[-1], omega, times, dt, frame)[1:]
+        if out.shape[0]:
+            q = out[-1:]
+            yield out
@@ -0,0 +1,206 @@
+# Quaternion Fourier transform for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains the discrete quaternion Fourier transform (QFT) of 1D and 2D signals,
+# whose samples are quaternions stored in real arrays of shape (N, 4) or (H, W, 4).
+#
+# Given a pure unitary axis mu, every quaternion is split (symplectic decomposition) as
+#           q = q1 + q2*nu,     with q1, q2 in C_mu = span{1, mu},
+# where nu is a pure unitary quaternion orthogonal to mu. Since C_mu is a copy of the complex
+# numbers commuting with exp(mu*t), and nu*exp(mu*t) = exp(-mu*t)*nu, every QFT is a pair of
+# complex FFTs: on q1 always with the exponent's sign, on q2 with the sign flipped along the
+# axes where the exponential acts on the right.
+#
+# Kinds of transform (x is the position, u the frequency, N the length along an axis):
+# - 'left':      F(u) = sum exp(-mu*2pi*u*x/N) f(x)
+# - 'right':     F(u) = sum f(x) exp(-mu*2pi*u*x/N)
+# - 'two-sided': F(u,v) = sum exp(-mu*2pi*u*x/H) f(x,y) exp(-mu*2pi*v*y/W), only in 2D
+
+import numpy as np
+from batch import as_array
+
+KINDS = ('left', 'right', 'two-sided')
+GRAY = (1, 1, 1)
+
+
+## Symplectic decomposition ##
+def basis(axis:tuple=GRAY) -> np.ndarray:
+    '''Returns the 3x3 array whose rows are mu, nu and xi = mu*nu, an orthonormal basis of the
+    pure quaternions adapted to the given axis (by default, the gray line of RGB colours).'''
+    mu = np.asarray(axis, dtype=float)
+    if mu.shape != (3,) or not np.any(mu):
+        raise ValueError("axis must be a non-zero vector of R3")
+
+    mu = mu / np.linalg.norm(mu)
+    helper = np.eye(3)[np.argmin(np.abs(mu))]
+    nu = np.cross(mu, helper)
+    nu /= np.linalg.norm(nu)
+    return np.stack((mu, nu, np.cross(mu, nu)))
+
+
+def __change_of_basis(axis:tuple) -> np.ndarray:
+    '''Returns the orthogonal 4x4 matrix T such that q @ T = (a, b, c, d), with
+    q = a + b*mu + (c + d*mu)*nu.'''
+    T = np.eye(4)
+    T[1:, 1:] = basis(axis).T
+    return T
+
+
+def split(signal:np.ndarray, axis:tuple=GRAY) -> tuple[np.ndarray]:
+    '''Returns the 2-tuple (q1, q2) of complex arrays of the symplectic decomposition
+    q = q1 + q2*nu, where the complex unit stands for mu.'''
+    Z = __symplectic(signal, axis)
+    return Z[..., 0], Z[..., 1]
+
+
+def merge(q1:np.ndarray, q2:np.ndarray, axis:tuple=GRAY) -> np.ndarray:
+    '''Inverse of split: returns the real array (..., 4) of the quaternions q1 + q2*nu.'''
+    return __unsymplectic(np.stack((q1, q2), axis=-1), axis)
+
+
+def __symplectic(signal:np.ndarray, axis:tuple) -> np.ndarray:
+    '''Returns the complex array (..., 2) whose last axis holds q1 and q2.'''
+    signal = np.asarray(signal, dtype=float)
+    return np.ascontiguousarray(signal @ __change_of_basis(axis)).view(complex)
+
+def __unsymplectic(Z:np.ndarray, axis:tuple) -> np.ndarray:
+    '''Inverse of __symplectic.'''
+    return np.ascontiguousarray(Z, dtype=complex).view(float) @ __change_of_basis(axis).T
+
+
+
+## Transforms ##
+def __as_signal(signal, ndim:int) -> np.ndarray:
+    '''Returns the signal as a real array with ndim axes of samples and a last axis of length 4.'''
+    if ndim == 1 and not isinstance(signal, np.ndarray):
+        return as_array(signal)
+
+    signal = np.asarray(signal, dtype=float)
+    if signal.ndim != ndim + 1 or signal.shape[-1] != 4:
+        raise ValueError(f"invalid shape {signal.shape}: a {ndim}D signal must have {ndim+1} axes, the last of length 4")
+    return signal
+
+def __right_axes(kind:str, ndim:int) -> tuple[int]:
+    '''Returns the axes along which the exponential acts on the right.'''
+    match kind:
+        case 'left':
+            return ()
+        case 'right':
+            return tuple(range(ndim))
+        case 'two-sided':
+            if ndim != 2:
+                raise ValueError("the two-sided transform is defined only for 2D signals")
+            return (1,)
+        case _:
+            raise AttributeError(f"invalid kind `{kind}`: it must be one of {KINDS}")
+
+def __transform(signal, ndim:int, kind:str, axis:tuple, inverse:bool) -> np.ndarray:
+    '''Core of the forward and inverse transforms.'''
+    signal = __as_signal(signal, ndim)
+    right = __right_axes(kind, ndim)
+    Z = __symplectic(signal, axis)
+
+    # Along the right axes the sign of the exponent is flipped for q2: the unnormalized
+    # inverse FFT (norm='forward') plays the role of the forward one, and vice versa
+    axes = tuple(range(ndim))
+    left = tuple(a for a in axes if a not in right)
+    same, flipped = (np.fft.ifftn, np.fft.fftn) if inverse else (np.fft.fftn, np.fft.ifftn)
+
+    if not right:
+        return __unsymplectic(same(Z, axes=axes), axis)
+
+    Q1, Q2 = same(Z[..., 0], axes=axes), Z[..., 1]
+    if left:
+        Q2 = same(Q2, axes=left)
+    Q2 = flipped(Q2, axes=right, norm='forward')
+
+    return merge(Q1, Q2, axis)
+
+
+def qfft(signal, kind:str='left', axis:tuple=GRAY) -> np.ndarray:
+    '''Discrete quaternion Fourier transform of a 1D signal.
+
+    Arguments:
+    - signal: iterable of quaternions or array of shape (N, 4)
+    - kind[str]: 'left' or 'right'
+    - axis[tuple]: the pure axis mu of the exponential (normalized)
+    '''
+    return __transform(signal, 1, kind, axis, False)
+
+def iqfft(spectrum, kind:str='left', axis:tuple=GRAY) -> np.ndarray:
+    '''Inverse of qfft.'''
+    return __transform(spectrum, 1, kind, axis, True)
+
+def qfft2(signal, kind:str='two-sided', axis:tuple=GRAY) -> np.ndarray:
+    '''Discrete quaternion Fourier transform of a 2D signal (for example a colour image, whose
+    pixels are the pure quaternions r*i + g*j + b*k).
+
+    Arguments:
+    - signal: array of shape (H, W, 4)
+    - kind[str]: 'left', 'right' or 'two-sided'
+    - axis[tuple]: the pure axis mu of the exponentials (normalized)
+    '''
+    return __transform(signal, 2, kind, axis, False)
+
+def iqfft2(spectrum, kind:str='two-sided', axis:tuple=GRAY) -> np.ndarray:
+    '''Inverse of qfft2.'''
+    return __transform(spectrum, 2, kind, axis, True)
+
+
+
+## Convolution and correlation ##
+def convolve(kernel, signal, mode:str='full', axis:tuple=GRAY) -> np.ndarray:
+    '''Quaternionic convolution (h*f)(x) = sum h(y) f(x-y), with the kernel on the left.
+
+    With h = h1 + h2*nu and f = f1 + f2*nu, the product is
+        h*f = (h1 f1 - h2 conj(f2)) + (h1 f2 + h2 conj(f1))*nu,
+    so it is computed by complex FFTs of the symplectic parts.
+
+    Arguments:
+    - kernel, signal: arrays of shape (N, 4) or (H, W, 4), with the same number of axes
+    - mode[str]: 'full' (linear convolution), 'same' (cropped to the signal's shape, centered)
+    or 'circular' (periodic, kernel and signal of the same shape)
+    - axis[tuple]: the pure axis mu of the decomposition; the result does not depend on it
+    '''
+    kernel = np.asarray(as_array(kernel) if not isinstance(kernel, np.ndarray) else kernel, dtype=float)
+    signal = np.asarray(as_array(signal) if not isinstance(signal, np.ndarray) else signal, dtype=float)
+    ndim = signal.ndim - 1
+    if kernel.ndim != signal.ndim or signal.shape[-1] != 4 or kernel.shape[-1] != 4:
+        raise ValueError("kernel and signal must be arrays of quaternions with the same number of axes")
+
+    if mode == 'circular':
+        if kernel.shape != signal.shape:
+            raise ValueError("circular convolution needs kernel and signal of the same shape")
+        shape = signal.shape[:-1]
+    elif mode in ('full', 'same'):
+        shape = tuple(n + k - 1 for n, k in zip(signal.shape[:-1], kernel.shape[:-1]))
+    else:
+        raise AttributeError(f"invalid mode `{mode}`: it must be 'full', 'same' or 'circular'")
+
+    axes = tuple(range(ndim))
+    h1, h2 = (np.fft.fftn(h, shape, axes) for h in split(kernel, axis))
+    f1, f2 = split(signal, axis)
+    F1, F2 = np.fft.fftn(f1, shape, axes), np.fft.fftn(f2, shape, axes)
+    # fft(conj(f))[u] = conj(fft(f)[-u])
+    C1, C2 = (np.roll(np.flip(F, axes), 1, axes).conj() for F in (F1, F2))
+
+    out = merge(np.fft.ifftn(h1*F1 - h2*C2, axes=axes), np.fft.ifftn(h1*F2 + h2*C1, axes=axes), axis)
+    if mode != 'same':
+        return out
+
+    starts = [(k - 1)//2 for k in kernel.shape[:-1]]
+    return out[tuple(slice(s, s + n) for s, n in zip(starts, signal.shape[:-1]))]
+
+
+def correlate(kernel, signal, mode:str='full', axis:tuple=GRAY) -> np.ndarray:
+    '''Quaternionic correlation c(x) = sum conj(h(y)) f(x+y), that is, the convolution with the
+    conjugated and reversed kernel (see convolve for the arguments).'''
+    kernel = np.asarray(as_array(kernel) if not isinstance(kernel, np.ndarray) else kernel, dtype=float)
+    ndim = kernel.ndim - 1
+    reversed_kernel = kernel[(slice(None, None, -1),)*ndim] * np.array([1.0, -1.0, -1.0, -1.0])
+
+    if mode == 'circular':
+        reversed_kernel = np.roll(reversed_kernel, 1, axis=tuple(range(ndim)))
+    return convolve(reversed_kernel, signal, mode, axis)
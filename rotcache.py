@@ -0,0 +1,179 @@
+# Rotation cache for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains an opt-in memoization layer for data derived from 3D rotations.
+
+from Quaternion import Quaternion
+from typing import Iterable
+from functools import lru_cache
+from math import sqrt, pi, sin, cos, acos
+
+
+class RotationCache:
+    '''Class to memoize rotation matrices, axis-angle pairs and quaternions built from
+    rotations.
+
+    Orientations are keyed by their quantized, sign-canonical components, so q and -q (and
+    any quaternion with the same direction) hit the same entry. Every table is a bounded LRU.
+
+    A lookup costs about as much as a dozen float operations in python: it pays off for
+    axis_angle (acos, sin and a normalization on a miss) and when the matrices themselves are
+    needed, not for rotate_point, whose closed form is cheaper than the lookup.
+
+    Attributes:
+    - step: side of the grid used to quantize the normalized quaternions
+    - maxsize: maximum number of entries of each table
+    '''
+
+    def __init__(self, maxsize:int=1024, step:float=1e-12):
+        '''Initializer of RotationCache object.
+
+        Arguments:
+        - maxsize[int]: maximum number of entries of each table; default value is 1024
+        - step[float]: side of the quantization grid; default value is 1e-12
+        '''
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+
+        if not isinstance(step, float) or step <= 0:
+            raise ValueError("step must be a positive float")
+
+        self.step = step
+        self.maxsize = maxsize
+        self._matrix = lru_cache(maxsize)(self.__matrix)
+        self._axis_angle = lru_cache(maxsize)(self.__axis_angle)
+        self._from_rotation = lru_cache(maxsize)(self.__from_rotation)
+
+
+    ## Keys ##
+    def key(self, q:Quaternion) -> tuple[int]:
+        '''Returns the key of the orientation represented by q.
+
+        The quaternion is normalized, its sign is chosen so that the real part is not negative
+        and each component is truncated to a grid of side step, with a single multiplication.
+
+        Note: rotations by pi (real part 0) and their opposites can get different keys; they
+        are only cached twice.
+        '''
+        if not isinstance(q, Quaternion):
+            raise TypeError("unsupported operand type for key: argument must be 'Quaternion'")
+
+        w, x, y, z = q.q
+        n = w*w + x*x + y*y + z*z
+        if not n:
+            raise ZeroDivisionError("The zero quaternion does not represent a rotation")
+
+        f = 1/(sqrt(n)*self.step)
+        if w < 0:
+            f = -f
+        return int(w*f), int(x*f), int(y*f), int(z*f)
+
+    def __unkey(self, key:tuple[int]) -> tuple[float]:
+        '''Returns the unit quaternion, as a 4-tuple, at the corner of the cell key nearest to 0.'''
+        a, b, c, d = (x*self.step for x in key)
+        n = sqrt(a*a + b*b + c*c + d*d)
+        return a/n, b/n, c/n, d/n
+
+
+    ## Computations (on cache miss) ##
+    def __matrix(self, key:tuple[int]) -> tuple[tuple[float]]:
+        '''Builds the rotation matrix of the given key.'''
+        w, x, y, z = self.__unkey(key)
+        return ((1-2*(y*y+z*z), 2*(x*y+w*z), 2*(x*z-w*y)),
+                (2*(x*y-w*z), 1-2*(x*x+z*z), 2*(y*z+w*x)),
+                (2*(x*z+w*y), 2*(y*z-w*x), 1-2*(x*x+y*y)))
+
+    def __axis_angle(self, key:tuple[int]) -> tuple:
+        '''Builds the axis-angle pair of the given key.'''
+        w, x, y, z = self.__unkey(key)
+        if w >= 1.0:
+            return 0, (1, 0, 0)
+
+        theta = 2*acos(w)
+        s = sin(theta/2)
+        return theta, (x/s, y/s, z/s)
+
+    @staticmethod
+    def __from_rotation(theta:float, axis:tuple[float]) -> tuple[float]:
+        '''Builds the components of the quaternion associated to the given rotation.'''
+        theta_rad = (theta/180)*pi
+        s = sin(theta_rad/2)
+        return cos(theta_rad/2), axis[0]*s, axis[1]*s, axis[2]*s
+
+
+    ## Cached methods ##
+    def matrix(self, q:Quaternion, passive:bool=False) -> tuple[tuple[float]]:
+        '''Returns the 3x3 rotation matrix M (as tuple of rows) associated to q, such that
+        M @ p == q.rotate_point(p, passive).
+
+        The passive matrix is the transpose of the active one.
+        '''
+        M = self._matrix(self.key(q))
+        if not passive:
+            return M
+
+        return tuple(zip(*M))
+
+    def axis_angle(self, q:Quaternion) -> tuple:
+        '''Returns the 2-tuple (theta, (x, y, z)) associated to q, with the same convention of
+        Quaternion.rotation.
+
+        Note: since the key is sign-canonical, the pair of the representative with non-negative
+        real part is returned, that is, the same rotation with theta in [0, pi].
+        '''
+        return self._axis_angle(self.key(q))
+
+    def from_rotation(self, theta:float=0, axis:Iterable[int|float]=(0,0,0)) -> Quaternion:
+        '''Cached version of Quaternion.from_rotation.
+
+        A new quaternion is returned at every call, so it can be freely modified.
+
+        Arguments:
+        - theta[float]: angle in degrees
+        - axis[iterable]: vector in R3 representing the axis
+        '''
+        if not len(axis)==3:
+            raise TypeError("invalid length of axis: must be 3")
+
+        return Quaternion(*self._from_rotation(theta, tuple(axis)))
+
+    def rotate_point(self, q:Quaternion, point:Iterable[int|float], passive:bool=False) -> tuple:
+        '''Version of Quaternion.rotate_point which uses the memoized rotation matrix.
+
+        Note: the closed form of Quaternion.rotate_point costs less than a cache lookup, so this
+        method is not faster; it is useful when the matrices are cached anyway (see matrix).
+        '''
+        if not len(point)==3:
+            raise TypeError("point must be a 3-dimensional iterable of floats")
+
+        x, y, z = point
+        a, b, c = self._matrix(self.key(q))
+        if passive:
+            return a[0]*x + b[0]*y + c[0]*z, a[1]*x + b[1]*y + c[1]*z, a[2]*x + b[2]*y + c[2]*z
+        return a[0]*x + a[1]*y + a[2]*z, b[0]*x + b[1]*y + b[2]*z, c[0]*x + c[1]*y + c[2]*z
+
+
+    ## Statistics ##
+    @property
+    def stats(self) -> dict:
+        '''Returns a dict with hits, misses and current size of every table.'''
+        ans = {}
+        for name, table in (('matrix', self._matrix), ('axis_angle', self._axis_angle),
+                            ('from_rotation', self._from_rotation)):
+            info = table.cache_info()
+            ans[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+
+        hits = sum(t['hits'] for t in ans.values())
+        misses = sum(t['misses'] for t in ans.values())
+        ans['hits'], ans['misses'] = hits, misses
+        return ans
+
+    def clear(self):
+        '''Empties every table and resets the statistics.'''
+        self._matrix.cache_clear()
+        self._axis_angle.cache_clear()
+        self._from_rotation.cache_clear()
+
+# End of RotationCache class
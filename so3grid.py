@@ -0,0 +1,265 @@
+# Uniform grids of rotations for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains a quasi-uniform grid of SO(3), with a precomputed structure to find the
+# nearest grid rotation of any versor in constant time.
+#
+# The nodes are the super-Fibonacci spiral of Alexa (2022), which covers S^3 evenly; since the
+# distance between rotations identifies q and -q (2*acos|<p, q>|, as functions.geodesic_dist),
+# the same points are an even grid of SO(3). With n nodes, every rotation is within about
+# (53/n)^(1/3) radians of a node.
+#
+# Lookup: a versor with canonical sign lies on one of the 4 faces of the cube [-1, 1]^4, the one
+# of its largest component; the other three components divided by it are coordinates in
+# [-1, 1]^3, split into m^3 cells (about one cell per node). For every cell, with centre c,
+# radius r (largest distance of its points from c) and nearest node at distance d from c, the
+# grid stores the nodes within 2r + d of c: the nearest node of any point of the cell is within
+# r + d of the point, so it is among them. A query computes its cell and compares the versor
+# with the few nodes of the list.
+
+import os
+import numpy as np
+import batch
+from Quaternion import Versor
+
+_PHI = np.sqrt(2)
+_PSI = 1.533751168755204288118041      # real root of x^4 = x + 4
+_OTHERS = np.array([[1,2,3], [0,2,3], [0,1,3], [0,1,2]])
+_CORNERS = np.array([[a, b, c] for a in (0, 1) for b in (0, 1) for c in (0, 1)])
+
+
+## Nodes ##
+def super_fibonacci(n:int) -> np.ndarray:
+    '''Returns the (n, 4) array of the versors of the super-Fibonacci spiral, with canonical
+    sign (see batch.canonical).'''
+    if not isinstance(n, int) or n <= 0:
+        raise ValueError("n must be a positive integer")
+
+    s = np.arange(n) + 0.5
+    r, R = np.sqrt(s/n), np.sqrt(1 - s/n)
+    alpha, beta = 2*np.pi*s/_PHI, 2*np.pi*s/_PSI
+    return batch.canonical(np.stack((r*np.sin(alpha), r*np.cos(alpha), R*np.sin(beta), R*np.cos(beta)), axis=1))
+
+
+def nodes_for_resolution(angle:float, degrees:bool=False) -> int:
+    '''Returns the number of nodes of a grid whose rotations are all within about the given angle
+    of a node (estimated from the measured covering of the spiral, n*angle^3 ~ 53). The
+    resolution of the grid, being a guaranteed bound, is larger (see SO3Grid).'''
+    if degrees:
+        angle = np.radians(angle)
+    if angle <= 0:
+        raise ValueError("angle must be positive")
+    return int(np.ceil(53/angle**3))
+
+
+
+## Grid ##
+class SO3Grid:
+    '''Class to represent a quasi-uniform grid of rotations.
+
+    Attributes:
+    - nodes: array of shape (n, 4) of the versors of the grid (canonical sign)
+    - neighbours: array of shape (n, k) of the k nearest nodes of every node, nearest first
+    - resolution: upper bound of the distance (rotation angle, in radians) of any rotation from
+    its nearest node; the actual largest distance is usually about half of it
+    '''
+
+    def __init__(self, n:int, neighbours:int=12):
+        '''Initializer of SO3Grid object: builds the grid and its lookup tables.
+
+        Arguments:
+        - n[int]: number of nodes (see nodes_for_resolution)
+        - neighbours[int]: number of neighbours stored for every node
+        '''
+        self.nodes = super_fibonacci(n)
+        m = max(1, round((n/4)**(1/3)))
+        if m >= 8:
+            m = 4*round(m/4)
+        self._m = m
+
+        centres, radii = self.__cell_geometry(m)
+        if m < 8:
+            lists, d = self.__balls(centres, 2*radii, self.nodes, np.arange(n))
+        else:
+            lists, d = self.__nested_balls(centres, radii)
+
+        self._offsets = np.concatenate(([0], np.cumsum([len(l) for l in lists])))
+        self._members = np.concatenate(lists).astype(np.intp)
+        # every point of a cell is within r of its centre, which is within d of a node
+        self.resolution = 2*float((d + radii).max())
+        self.neighbours = self.__neighbours(neighbours, centres, radii, d)
+
+    ## Cube map ##
+    @staticmethod
+    def __cells(X:np.ndarray, m:int) -> np.ndarray:
+        '''Returns the cell index of every row (unitary quaternions) on the cube map with m^3
+        cells per face.'''
+        face = np.argmax(np.abs(X), axis=1)
+        rows = np.arange(X.shape[0])
+        u = X[rows[:, None], _OTHERS[face]] / X[rows, face][:, None]
+        a, b, c = np.clip(np.floor((u + 1)*m/2), 0, m - 1).astype(np.intp).T
+        return ((face*m + a)*m + b)*m + c
+
+    @staticmethod
+    def __cell_geometry(m:int) -> tuple[np.ndarray]:
+        '''Returns the centres (4*m^3, 4) and the radii (4*m^3,) of the cells, in angles of S^3.'''
+        face, a, b, c = np.unravel_index(np.arange(4*m**3), (4, m, m, m))
+        low = np.stack((a, b, c), axis=1)*2/m - 1
+
+        def points(u):
+            P = np.empty((u.shape[0], 4))
+            P[np.arange(u.shape[0]), face] = 1
+            P[np.arange(u.shape[0])[:, None], _OTHERS[face]] = u
+            return P / np.linalg.norm(P, axis=1)[:, None]
+
+        centres = points(low + 1/m)
+        corners = np.stack([np.abs(np.einsum('ij,ij->i', centres, points(low + 2*k/m))) for k in _CORNERS])
+        return centres, np.arccos(np.minimum(corners.min(axis=0), 1))
+
+    @staticmethod
+    def __balls(C:np.ndarray, extra:np.ndarray, X:np.ndarray, ids:np.ndarray, block:int=1<<24) -> tuple:
+        '''For every centre (rows of C), returns the indices (taken from ids) of the rows of X
+        within extra + d of it, where d is the distance of the nearest row, and d itself. The
+        centres are processed in groups, so that at most block dot products are stored at once.'''
+        lists, d = [], np.empty(len(C))
+        step = max(1, block // max(1, len(X)))
+        for s in range(0, len(C), step):
+            dots = np.abs(C[s:s + step] @ X.T)
+            d[s:s + step] = np.arccos(np.minimum(dots.max(axis=1), 1))
+            limit = np.cos(np.minimum(extra[s:s + step] + d[s:s + step], np.pi/2)) - 1e-12
+            lists.extend(ids[row] for row in dots >= limit[:, None])
+        return lists, d
+
+    def __nested_balls(self, centres:np.ndarray, radii:np.ndarray) -> tuple:
+        '''Builds the lists of the cells from the lists of coarser cells, 4^3 cells each (the
+        nodes near a fine cell are searched among the nodes near its coarse cell).'''
+        m, M = self._m, self._m//4
+        coarse, coarse_radii = self.__cell_geometry(M)
+
+        # Fine lists reach 2r + d <= 2r + R + D of a fine centre, which is within R of the
+        # coarse centre (R, D: radius and nearest distance of the coarse cell)
+        face, a, b, c = np.unravel_index(np.arange(4*m**3), (4, m, m, m))
+        parent = ((face*M + a//4)*M + b//4)*M + c//4
+        order = np.argsort(parent, kind='stable')
+        largest = np.zeros(4*M**3)
+        np.maximum.at(largest, parent, radii)
+
+        pools, _ = self.__balls(coarse, 2*coarse_radii + 2*largest, self.nodes, np.arange(len(self.nodes)))
+
+        lists, d = [None]*len(centres), np.empty(len(centres))
+        for P, children in enumerate(np.split(order, np.cumsum(np.bincount(parent, minlength=4*M**3))[:-1])):
+            pool = pools[P]
+            found, d[children] = self.__balls(centres[children], 2*radii[children], self.nodes[pool], pool)
+            for child, members in zip(children, found):
+                lists[child] = members
+        return lists, d
+
+    def __neighbours(self, k:int, centres:np.ndarray, radii:np.ndarray, d:np.ndarray) -> np.ndarray:
+        '''Returns the k nearest nodes of every node. The list of the cell of a node contains all
+        the nodes within 2r + d - |node - centre| of it: the nodes whose k-th neighbour is
+        farther are searched among all the nodes.'''
+        n = len(self.nodes)
+        k = min(k, n - 1)
+        if k <= 0:
+            return np.empty((n, 0), dtype=np.intp)
+
+        cells = self.__cells(self.nodes, self._m)
+        cand, valid = self.__candidates(cells)
+        dots = np.abs(np.einsum('nkj,nj->nk', self.nodes[cand], self.nodes))
+        dots[~valid | (cand == np.arange(n)[:, None])] = -1
+        best = np.argsort(-dots, axis=1, kind='stable')[:, :k]
+        out = np.take_along_axis(cand, best, axis=1)
+
+        # check: k-th distance within the radius of the list, seen from the node
+        kth = np.arccos(np.minimum(np.take_along_axis(dots, best[:, -1:], axis=1)[:, 0], 1))
+        offset = np.arccos(np.minimum(np.abs(np.einsum('ij,ij->i', centres[cells], self.nodes)), 1))
+        for i in np.flatnonzero((kth > 2*radii[cells] + d[cells] - offset - 1e-12) | (dots[np.arange(n), best[:, -1]] < 0)):
+            row = np.abs(self.nodes @ self.nodes[i])
+            row[i] = -1
+            top = np.argpartition(-row, k - 1)[:k]
+            out[i] = top[np.argsort(-row[top], kind='stable')]
+        return out
+
+    def __candidates(self, cells:np.ndarray) -> tuple[np.ndarray]:
+        '''Returns the padded (N, K) array of the candidate nodes of the given cells, and the mask
+        of the valid entries.'''
+        start, stop = self._offsets[cells], self._offsets[cells + 1]
+        K = int((stop - start).max()) if len(cells) else 0
+        pos = start[:, None] + np.arange(K)
+        valid = pos < stop[:, None]
+        return self._members[np.where(valid, pos, 0)], valid
+
+
+    ## Lookup ##
+    def __len__(self) -> int:
+        '''Returns the number of nodes.'''
+        return len(self.nodes)
+
+    def __getitem__(self, index:int) -> Versor:
+        '''Returns the node of the given index as a Versor.'''
+        return Versor(*(float(x) for x in self.nodes[index]))
+
+    def nearest(self, H_points, return_angle:bool=False, chunk:int=16384):
+        '''Returns the index of the nearest node of every versor (normalized if not unitary),
+        as an array of shape (N,), or an int for a single Versor.
+
+        Arguments:
+        - H_points: a Versor, an iterable of quaternions or an array of shape (N, 4)
+        - return_angle[bool]: if True, returns also the distances (rotation angles, in radians)
+        - chunk[int]: number of versors processed at once
+        '''
+        X = batch.normalize(H_points)
+        cells = self.__cells(X, self._m)
+
+        # sorted by length of the candidate lists, so that each chunk is padded to similar lengths
+        order = np.argsort(self._offsets[cells + 1] - self._offsets[cells], kind='stable')
+        index, angle = np.empty(len(X), dtype=np.intp), np.empty(len(X))
+        for s in range(0, len(X), chunk):
+            rows = order[s:s + chunk]
+            cand, valid = self.__candidates(cells[rows])
+            dots = np.abs(np.einsum('nkj,nj->nk', self.nodes[cand], X[rows]))
+            dots[~valid] = -1
+            best = np.argmax(dots, axis=1)
+            index[rows] = cand[np.arange(len(rows)), best]
+            angle[rows] = 2*np.arccos(np.minimum(dots[np.arange(len(rows)), best], 1))
+
+        if isinstance(H_points, Versor):
+            index, angle = int(index[0]), float(angle[0])
+        return (index, angle) if return_angle else index
+
+    def snap(self, H_points) -> np.ndarray:
+        '''Returns the nodes nearest to the given versors, as an array of shape (N, 4).'''
+        return self.nodes[self.nearest(H_points)]
+
+
+    ## Persistence ##
+    def save(self, path:str):
+        '''Saves the grid and its lookup tables to a .npz file.'''
+        with open(path, 'wb') as file:
+            np.savez(file, nodes=self.nodes, neighbours=self.neighbours, offsets=self._offsets,
+                     members=self._members, m=self._m, resolution=self.resolution)
+
+    @classmethod
+    def load(cls, path:str):
+        '''Returns the grid saved at the given path (see save).'''
+        data = np.load(path)
+        grid = cls.__new__(cls)
+        grid.nodes, grid.neighbours = data['nodes'], data['neighbours']
+        grid._offsets, grid._members = data['offsets'], data['members']
+        grid._m, grid.resolution = int(data['m']), float(data['resolution'])
+        return grid
+
+    @classmethod
+    def cached(cls, path:str, n:int, neighbours:int=12):
+        '''Returns the grid saved at the given path if it has n nodes and the given number of
+        neighbours; otherwise builds it and saves it there.'''
+        if os.path.exists(path):
+            grid = cls.load(path)
+            if len(grid) == n and grid.neighbours.shape[1] == min(neighbours, n - 1):
+                return grid
+
+        grid = cls(n, neighbours)
+        grid.save(path)
+        return grid
@@ -0,0 +1,237 @@
+# Quaternion splines for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains smooth trajectories of rotations through keyframes (versors).
+#
+# Every class precomputes the control data of its segments once; then it evaluates
+# orientations, angular velocities and angular accelerations at whole arrays of timestamps,
+# finding the segment of each timestamp with numpy.searchsorted.
+#
+# Angular velocities are in the body frame: dq/dt = q*w/2, as quaternionic product with the
+# pure quaternion w. The world-frame velocity is q*w*q^-1 (see batch.rotate_points with
+# passive=True).
+
+import numpy as np
+import batch
+
+
+## Cumulative B-spline ##
+class CumulativeBSpline:
+    '''Class to represent a cumulative cubic B-spline of rotations with uniform knots.
+
+    With control versors q_0, ..., q_n and relative rotations W_k = log(q_{k-1}^-1 * q_k), in
+    the segment starting at the control k the curve is
+        q(u) = q_{k-1} * exp(B1(u) W_k) * exp(B2(u) W_{k+1}) * exp(B3(u) W_{k+2})
+    where B1, B2, B3 are the cumulative cubic basis functions and u in [0, 1). The curve is C2,
+    so angular velocity and acceleration are continuous; it approximates (it does not pass
+    through) the keyframes. The first and the last keyframes are repeated, so that the curve is
+    defined from the first to the last timestamp.
+
+    Attributes:
+    - t0: timestamp of the first keyframe
+    - dt: time between two keyframes
+    - controls: (n+2, 4) array of the control versors
+    - omegas: (n+2, 4) array of the pure quaternions W_k (W_0 = 0)
+    '''
+
+    # Coefficients of 1, u, u^2, u^3 in B1, B2, B3
+    BASIS = np.array([[5, 3, -3, 1], [1, 3, 3, -2], [0, 0, 0, 1]]) / 6
+
+    def __init__(self, keyframes, t0:float=0, dt:float=1):
+        '''Initializer of CumulativeBSpline object.
+
+        Arguments:
+        - keyframes: iterable of quaternions or (N, 4) array (normalized if not unitary)
+        - t0[float]: timestamp of the first keyframe
+        - dt[float]: time between consecutive keyframes
+        '''
+        if dt <= 0:
+            raise ValueError("dt must be positive")
+
+        q = batch.continuous(batch.normalize(keyframes))
+        if q.shape[0] < 2:
+            raise ValueError("at least two keyframes are needed")
+        self.t0, self.dt = float(t0), float(dt)
+        self.controls = np.concatenate((q[:1], q, q[-1:]))
+
+        self.omegas = np.zeros_like(self.controls)
+        self.omegas[1:] = batch.log(batch.multiply(batch.conjugate(self.controls[:-1]), self.controls[1:]))
+        self.omegas[:, 0] = 0
+
+    @property
+    def duration(self) -> tuple[float]:
+        '''Returns the interval (start, end) of definition.'''
+        return self.t0, self.t0 + self.dt*(self.controls.shape[0] - 3)
+
+    def __locate(self, times) -> tuple[np.ndarray]:
+        '''Returns segment indices and local parameters u of the given timestamps.'''
+        s = (np.asarray(times, dtype=float).reshape(-1) - self.t0) / self.dt
+        k = np.clip(np.floor(s).astype(np.intp), 0, self.controls.shape[0] - 4)
+        return k, np.clip(s - k, 0.0, 1.0)
+
+    def __basis(self, u:np.ndarray, order:int) -> np.ndarray:
+        '''Returns the (N, 3) values of the order-th derivative (in time) of B1, B2, B3.'''
+        powers = np.stack((np.ones_like(u), u, u*u, u*u*u), axis=1)
+        C = self.BASIS
+        for _ in range(order):
+            C = C[:, 1:] * np.arange(1, C.shape[1])
+            powers = powers[:, :-1]
+        return (powers @ C.T) / self.dt**order
+
+    def evaluate(self, times, derivatives:int=0):
+        '''Evaluates the spline at the given timestamps.
+
+        Returns the (N, 4) array of the orientations; if derivatives is 1 or 2, returns also the
+        (N, 3) arrays of angular velocities and angular accelerations (body frame).
+        '''
+        k, u = self.__locate(times)
+        B = self.__basis(u, 0)
+        W = np.stack([self.omegas[k + j] for j in (1, 2, 3)], axis=1)
+        A = batch.exp((B[:, :, None] * W).reshape(-1, 4)).reshape(-1, 3, 4)
+
+        q = self.controls[k]
+        for j in range(3):
+            q = batch.multiply(q, A[:, j])
+        if not derivatives:
+            return q
+
+        dB, ddB = self.__basis(u, 1), self.__basis(u, 2)
+        w, dw = dB[:, :1]*W[:, 0], ddB[:, :1]*W[:, 0]
+        for j in (1, 2):
+            step = dB[:, j:j+1]*W[:, j]
+            r = self.__conj_rotate(A[:, j], w)
+            dr = self.__conj_rotate(A[:, j], dw) + self.__bracket(r, step)
+            w, dw = r + step, dr + ddB[:, j:j+1]*W[:, j]
+
+        if derivatives == 1:
+            return q, 2*w[:, 1:]
+        return q, 2*w[:, 1:], 2*dw[:, 1:]
+
+    def __call__(self, times) -> np.ndarray:
+        '''Magic method to evaluate the orientations at the given timestamps.'''
+        return self.evaluate(times)
+
+    def angular_velocity(self, times) -> np.ndarray:
+        '''Returns the (N, 3) array of the angular velocities (body frame).'''
+        return self.evaluate(times, 1)[1]
+
+    def angular_acceleration(self, times) -> np.ndarray:
+        '''Returns the (N, 3) array of the angular accelerations (body frame).'''
+        return self.evaluate(times, 2)[2]
+
+    @staticmethod
+    def __conj_rotate(A:np.ndarray, v:np.ndarray) -> np.ndarray:
+        '''Returns the rowwise product A^-1 * v * A for unitary A.'''
+        return batch.multiply(batch.multiply(batch.conjugate(A), v), A)
+
+    @staticmethod
+    def __bracket(x:np.ndarray, y:np.ndarray) -> np.ndarray:
+        '''Returns the rowwise commutator x*y - y*x.'''
+        return batch.multiply(x, y) - batch.multiply(y, x)
+
+# End of CumulativeBSpline class
+
+
+
+## SQUAD ##
+class SquadSpline:
+    '''Class to represent a SQUAD (spherical quadrangle) spline through keyframes.
+
+    In the segment between the keyframes q_i and q_{i+1} the curve is
+        squad(h) = slerp(slerp(q_i, q_{i+1}, h), slerp(s_i, s_{i+1}, h), 2h(1-h))
+    with h in [0, 1] and inner controls s_i = q_i * exp(-(log(q_i^-1 q_{i+1}) + log(q_i^-1 q_{i-1}))/4).
+    The curve passes through the keyframes and its tangent is continuous. Timestamps can be
+    non-uniform.
+
+    Attributes:
+    - times: (N,) array of the timestamps of the keyframes
+    - keyframes: (N, 4) array of the keyframes
+    - inner: (N, 4) array of the inner controls s_i
+    - step: time step of the central differences used for the derivatives
+    '''
+
+    def __init__(self, keyframes, times=None, step:float=1e-4):
+        '''Initializer of SquadSpline object.
+
+        Arguments:
+        - keyframes: iterable of quaternions or (N, 4) array (normalized if not unitary)
+        - times: increasing timestamps of the keyframes; default value is 0, 1, ..., N-1
+        - step[float]: time step of the central differences, relative to the segment length
+        '''
+        q = batch.continuous(batch.normalize(keyframes))
+        if q.shape[0] < 2:
+            raise ValueError("at least two keyframes are needed")
+        times = np.arange(q.shape[0], dtype=float) if times is None else np.asarray(times, dtype=float)
+        if times.shape != (q.shape[0],) or np.any(np.diff(times) <= 0):
+            raise ValueError("times must be an increasing array with one timestamp per keyframe")
+
+        self.times, self.keyframes, self.step = times, q, step
+
+        prev = np.concatenate((q[:1], q[:-1]))
+        succ = np.concatenate((q[1:], q[-1:]))
+        inv = batch.conjugate(q)
+        tangent = batch.log(batch.multiply(inv, succ)) + batch.log(batch.multiply(inv, prev))
+        tangent[:, 0] = 0
+        self.inner = batch.multiply(q, batch.exp(-tangent/4))
+
+        # Per segment: p*exp(h*L) is slerp(p, q, h)
+        self._outer_log = batch.log(batch.multiply(inv[:-1], q[1:]))
+        self._inner_log = batch.log(batch.multiply(batch.conjugate(self.inner[:-1]), self.inner[1:]))
+
+    @property
+    def duration(self) -> tuple[float]:
+        '''Returns the interval (start, end) of definition.'''
+        return float(self.times[0]), float(self.times[-1])
+
+    def __call__(self, times) -> np.ndarray:
+        '''Magic method to evaluate the orientations at the given timestamps.'''
+        t = np.clip(np.asarray(times, dtype=float).reshape(-1), self.times[0], self.times[-1])
+        i = np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, self.times.shape[0] - 2)
+        h = ((t - self.times[i]) / (self.times[i+1] - self.times[i]))[:, None]
+
+        a = batch.multiply(self.keyframes[i], batch.exp(h*self._outer_log[i]))
+        b = batch.multiply(self.inner[i], batch.exp(h*self._inner_log[i]))
+        return batch.slerp(a, b, (2*h*(1 - h)).reshape(-1), shortest=False)
+
+    def evaluate(self, times, derivatives:int=0):
+        '''Evaluates the spline at the given timestamps.
+
+        Returns the (N, 4) array of the orientations; if derivatives is 1 or 2, returns also the
+        (N, 3) arrays of angular velocities and angular accelerations (body frame), computed by
+        finite differences of the curve. Near the ends of the interval of definition the stencil
+        is shifted inwards, so that it never reaches the clamped part of the curve.
+        '''
+        t = np.asarray(times, dtype=float).reshape(-1)
+        q = self(t)
+        if not derivatives:
+            return q
+
+        t = np.clip(t, self.times[0], self.times[-1])
+        i = np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, self.times.shape[0] - 2)
+        d = self.step * (self.times[i+1] - self.times[i])
+        c = np.clip(t, self.times[0] + d, self.times[-1] - d)
+        lo, mid, hi = self(c - d), self(c), self(c + d)
+
+        # body-frame velocities w = 2 q^-1 dq/dt on the two halves of the stencil
+        w_lo = 2*batch.log(batch.multiply(batch.conjugate(lo), mid))[:, 1:] / d[:, None]
+        w_hi = 2*batch.log(batch.multiply(batch.conjugate(mid), hi))[:, 1:] / d[:, None]
+        dw = (w_hi - w_lo) / d[:, None]
+
+        # central difference at c, moved to t by a first order step (c == t away from the ends)
+        w = 2*batch.log(batch.multiply(batch.conjugate(lo), hi))[:, 1:] / (2*d)[:, None]
+        w += (t - c)[:, None]*dw
+        if derivatives == 1:
+            return q, w
+        return q, w, dw
+
+    def angular_velocity(self, times) -> np.ndarray:
+        '''Returns the (N, 3) array of the angular velocities (body frame).'''
+        return self.evaluate(times, 1)[1]
+
+    def angular_acceleration(self, times) -> np.ndarray:
+        '''Returns the (N, 3) array of the angular accelerations (body frame).'''
+        return self.evaluate(times, 2)[2]
+
+# End of SquadSpline class
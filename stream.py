@@ -0,0 +1,350 @@
+# Streaming ingestion of quaternions for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains an asyncio pipeline that reads framed binary quaternions from streams,
+# groups them into batches and applies vectorized transforms (see batch.py) to them.
+#
+# Wire format: every frame is a little-endian uint32 n, followed by n records of four
+# little-endian float64 (real, i, j, k), that is, 32 bytes per quaternion.
+
+import asyncio
+import struct
+import numpy as np
+from typing import Callable, Iterable
+from time import monotonic
+from batch import as_array
+
+HEADER = struct.Struct('<I')
+RECORD_SIZE = 32
+
+
+## Framing ##
+def encode_frame(H_points) -> bytes:
+    '''Returns the frame containing the given quaternions.'''
+    arr = as_array(H_points).astype('<f8', copy=False)
+    return HEADER.pack(arr.shape[0]) + arr.tobytes()
+
+
+def decode_frame(data:bytes) -> np.ndarray:
+    '''Returns the (N, 4) array of quaternions contained in a whole frame.'''
+    if len(data) < HEADER.size:
+        raise ValueError(f"invalid frame: {len(data)} bytes are too few for the header")
+
+    (n,) = HEADER.unpack_from(data)
+    if len(data) != HEADER.size + n*RECORD_SIZE:
+        raise ValueError(f"invalid frame: expected {n} records, got {len(data)} bytes")
+
+    return np.frombuffer(data, dtype='<f8', offset=HEADER.size).reshape(n, 4).astype(float)
+
+
+async def read_frame(reader:asyncio.StreamReader) -> np.ndarray|None:
+    '''Reads a single frame from the stream. Returns None at the end of the stream.'''
+    try:
+        (n,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+        payload = await reader.readexactly(n*RECORD_SIZE)
+    except asyncio.IncompleteReadError as err:
+        if err.partial:
+            raise ValueError("the stream ended in the middle of a frame") from err
+        return None
+
+    return np.frombuffer(payload, dtype='<f8').reshape(n, 4).astype(float)
+
+
+async def write_frames(writer:asyncio.StreamWriter, H_points, frame_size:int=256):
+    '''Writes the given quaternions to the stream, frame_size records per frame.'''
+    arr = as_array(H_points)
+    for start in range(0, arr.shape[0], frame_size):
+        writer.write(encode_frame(arr[start:start+frame_size]))
+        await writer.drain()
+
+
+
+## Pipeline ##
+class Pipeline:
+    '''Class to batch and transform streams of quaternions.
+
+    Readers push the decoded frames into a bounded queue; the batching task collects them
+    until max_batch quaternions are ready or max_latency seconds have passed from the first
+    one, applies the transforms to the whole (N, 4) array and pushes the result in a bounded
+    output queue. When a queue is full the stage before it waits, so a slow consumer slows
+    down the reading of the sockets (backpressure).
+
+    Attributes:
+    - transforms: list of callables from (N, 4) arrays to arrays
+    - max_batch: maximum number of quaternions in a batch
+    - max_latency: maximum waiting time (in seconds) of a quaternion before its batch is emitted
+    - received, emitted: counters of the quaternions read and of the batches produced
+    - dropped: counter of the datagrams dropped, because malformed or because the input queue
+    was full
+
+    If a transform raises, the batching task stops and the exception is raised by get (and by
+    async for) once the batches emitted before it have been returned.
+    '''
+
+    def __init__(self, transforms:Callable|Iterable[Callable]=(), max_batch:int=4096,
+                 max_latency:float=0.01, maxsize:int=64):
+        '''Initializer of Pipeline object.
+
+        Arguments:
+        - transforms: a callable or an iterable of callables, applied in order to each batch
+        - max_batch[int]: maximum number of quaternions in a batch; default value is 4096
+        - max_latency[float]: maximum delay of a quaternion, in seconds; default value is 0.01
+        - maxsize[int]: capacity of the input and output queues; default value is 64
+        '''
+        if callable(transforms):
+            transforms = [transforms]
+
+        if not isinstance(max_batch, int) or max_batch <= 0:
+            raise ValueError("max_batch must be a positive integer")
+
+        if max_latency < 0:
+            raise ValueError("max_latency must be a non-negative number")
+
+        self.transforms = list(transforms)
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.received = 0
+        self.emitted = 0
+        self.dropped = 0
+        self._input = asyncio.Queue(maxsize)
+        self._output = asyncio.Queue(maxsize)
+        self._task = None
+        self._getter = None
+        self._closed = False
+        self._error = None
+
+
+    ## Input side ##
+    async def put(self, H_points):
+        '''Pushes quaternions into the pipeline, waiting if the input queue is full. Raises the
+        exception that stopped the batching task, if any.'''
+        if self._error is not None:
+            raise self._error
+        arr = as_array(H_points)
+        if arr.shape[0]:
+            self.received += arr.shape[0]
+            await self._input.put(arr)
+
+    async def ingest(self, reader:asyncio.StreamReader):
+        '''Reads frames from the stream until its end.'''
+        while (arr := await read_frame(reader)) is not None:
+            await self.put(arr)
+
+    def put_datagram(self, data:bytes) -> bool:
+        '''Pushes the frame contained in a datagram without waiting.
+
+        Since datagrams can't be slowed down, it returns False (and drops the frame) if the
+        input queue is full or if the datagram is not a valid frame. Empty frames are skipped.
+        '''
+        try:
+            arr = decode_frame(data)
+        except ValueError:
+            self.dropped += 1
+            return False
+
+        if not arr.shape[0]:
+            return True
+        try:
+            self._input.put_nowait(arr)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self.received += arr.shape[0]
+        return True
+
+    def datagram_protocol(self) -> asyncio.DatagramProtocol:
+        '''Returns a protocol, for loop.create_datagram_endpoint, that feeds the pipeline.'''
+        pipeline = self
+
+        class _Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                pipeline.put_datagram(data)
+
+        return _Protocol()
+
+
+    ## Batching ##
+    async def __get(self, timeout:float=None):
+        '''Returns the next item of the input queue, waiting at most timeout seconds (raises
+        asyncio.TimeoutError). The pending get survives the timeouts, so no item is lost.'''
+        if self._getter is None:
+            self._getter = asyncio.ensure_future(self._input.get())
+
+        done, _ = await asyncio.wait({self._getter}, timeout=timeout)
+        if not done:
+            raise asyncio.TimeoutError
+        item, self._getter = self._getter.result(), None
+        return item
+
+    async def __next_batch(self) -> np.ndarray|None:
+        '''Collects the next batch, respecting size and latency bounds.'''
+        first = None if self._closed else await self.__get()
+        if first is None:
+            self._closed = True
+            return None
+
+        chunks, size = [first], first.shape[0]
+        deadline = monotonic() + self.max_latency
+        while size < self.max_batch:
+            timeout = deadline - monotonic()
+            if timeout <= 0:
+                break
+            try:
+                arr = await self.__get(timeout)
+            except asyncio.TimeoutError:
+                break
+
+            if arr is None:
+                self._closed = True
+                break
+            chunks.append(arr)
+            size += arr.shape[0]
+
+        return np.concatenate(chunks) if len(chunks) > 1 else first
+
+    async def __run(self):
+        '''Main loop of the batching task.'''
+        try:
+            try:
+                while (arr := await self.__next_batch()) is not None:
+                    for start in range(0, arr.shape[0], self.max_batch):
+                        out = arr[start:start+self.max_batch]
+                        for f in self.transforms:
+                            out = f(out)
+                        self.emitted += 1
+                        await self._output.put(out)
+            except Exception as err:
+                self._error = err
+            finally:
+                await self._output.put(None)
+
+            # after a failure the input is discarded until close, so no producer waits forever
+            while not self._closed:
+                self._closed = await self.__get() is None
+        finally:
+            if self._getter is not None:
+                self._getter.cancel()
+                self._getter = None
+
+    def start(self):
+        '''Starts the batching task in the running event loop.'''
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.__run())
+        return self._task
+
+    async def close(self):
+        '''Signals the end of the input: pending quaternions are still emitted.'''
+        await self._input.put(None)
+
+
+    ## Output side ##
+    async def get(self) -> np.ndarray|None:
+        '''Returns the next transformed batch, or None once the pipeline is closed. Raises the
+        exception that stopped the batching task, if any.'''
+        out = await self._output.get()
+        if out is None:
+            # the batching task is over: the end of the output stays visible to every consumer
+            self._output.put_nowait(None)
+            if self._error is not None:
+                raise self._error
+        return out
+
+    def __aiter__(self):
+        '''Magic method to iterate over the transformed batches with async for.'''
+        self.start()
+        return self
+
+    async def __anext__(self) -> np.ndarray:
+        '''Returns the next transformed batch.'''
+        out = await self.get()
+        if out is None:
+            raise StopAsyncIteration
+        return out
+
+# End of Pipeline class
+
+
+
+## Loopback harness ##
+async def replay(writer:asyncio.StreamWriter, H_points, rate:float=0, frame_size:int=256):
+    '''Replays a recorded stream of quaternions at the target rate.
+
+    Arguments:
+    - writer: stream where the frames are written
+    - H_points: recorded quaternions, as an iterable of quaternions or an array of shape (N, 4)
+    - rate[float]: target rate in quaternions per second; 0 means as fast as possible
+    - frame_size[int]: number of quaternions in each frame
+    '''
+    arr = as_array(H_points)
+    start = monotonic()
+    for first in range(0, arr.shape[0], frame_size):
+        if rate > 0:
+            delay = start + first/rate - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        writer.write(encode_frame(arr[first:first+frame_size]))
+        await writer.drain()
+
+    writer.close()
+    await writer.wait_closed()
+
+
+async def loopback(pipeline:Pipeline, streams:Iterable, rate:float=0, frame_size:int=256,
+                   host:str='127.0.0.1') -> list[np.ndarray]:
+    '''Replays recorded streams through a local TCP server feeding the pipeline.
+
+    A connection is opened for every stream, as many devices would do. Returns the list of
+    the transformed batches; the errors of the readers and of the transforms are raised once
+    every connection is over.
+
+    Arguments:
+    - pipeline[Pipeline]: the pipeline under test
+    - streams: iterable of recorded streams (iterables of quaternions or (N, 4) arrays)
+    - rate[float]: target rate of each stream, in quaternions per second
+    - frame_size[int]: number of quaternions in each frame
+    - host[str]: address of the loopback interface
+    '''
+    streams = list(streams)
+    done = asyncio.Event()
+    pending, errors = len(streams), []
+
+    async def handle(reader, writer):
+        nonlocal pending
+        try:
+            await pipeline.ingest(reader)
+        except Exception as err:
+            errors.append(err)
+        finally:
+            writer.close()
+            pending -= 1
+            if not pending:
+                done.set()
+
+    server = await asyncio.start_server(handle, host, 0)
+    port = server.sockets[0].getsockname()[1]
+    pipeline.start()
+
+    async def collect():
+        return [out async for out in pipeline]
+
+    collector = asyncio.get_running_loop().create_task(collect())
+
+    async with server:
+        clients = []
+        for recorded in streams:
+            _, writer = await asyncio.open_connection(host, port)
+            clients.append(replay(writer, recorded, rate, frame_size))
+        await asyncio.gather(*clients)
+
+        if streams:
+            await done.wait()
+        await pipeline.close()
+
+    out = await collector
+    if errors:
+        raise errors[0]
+    return out
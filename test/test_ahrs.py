@@ -0,0 +1,44 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+import numpy as np
+import batch
+import ahrs
+from time import perf_counter
+
+if __name__ == "__main__":
+    D, T, dt = 1000, 2000, 0.01
+
+    ## Synthetic logs: still devices with random orientations, noisy sensors with gyro bias
+    truth = batch.normalize(np.random.randn(D, 4))
+    to_sensor = lambda v: batch.rotate_points(truth, np.broadcast_to(v, (D, 3)))
+    gyro = 0.02 + 0.01*np.random.randn(T, D, 3)
+    accel = to_sensor([0, 0, 9.81]) + 0.1*np.random.randn(T, D, 3)
+    mag = to_sensor([0.2, 0, -0.4]) + 0.01*np.random.randn(T, D, 3)
+
+    # some devices drop samples
+    accel[np.random.rand(T, D) < 0.1] = np.nan
+    gyro[np.random.rand(T, D) < 0.05] = np.nan
+
+    for flt in (ahrs.Madgwick(D, beta=0.5), ahrs.Mahony(D, kp=5.0, ki=0.1), ahrs.MEKF(D)):
+        t = perf_counter()
+        for q in flt.run(gyro, accel, mag, dt, chunk=500):
+            pass
+        t = perf_counter() - t
+        error = 2*np.degrees(np.arccos(np.clip(np.abs(np.einsum('ij,ij->i', q[-1], truth)), 0, 1)))
+        print(f'{type(flt).__name__}: {T} steps of {D} devices in {t:.2f}s, '
+              f'final error median {np.median(error):.2f} deg, max {error.max():.2f} deg')
@@ -0,0 +1,72 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+from Quaternion import Quaternion, Versor
+import batch
+import numpy as np
+from time import perf_counter
+
+if __name__ == "__main__":
+    ## Equality and hashing
+    x = Quaternion(1,2,3,4)
+    y = Quaternion(1,2,3,4+1e-15)
+    print(f'{x} == {y}: {x==y}, hash equal: {hash(x)==hash(y)}')
+    print(f'Quaternion(1) == 1: {Quaternion(1)==1}, Quaternion(1,2) == 1+2j: {Quaternion(1,2)==1+2j}')
+
+    v = Versor(1,1,0,0)
+    print(f'set of [x, y, v, v] has length {len({x, y, v, v})}')
+
+    # equal quaternions and versors share the hash; q and -q are told apart (use batch.dedup)
+    p, u = Quaternion(-0.6,0.8,0,0), Versor(-0.6,0.8,0,0)
+    print(f'{p} == {u}: {p==u}, hash equal: {hash(p)==hash(u)}')
+    print(f'set of [p, u, -u] has length {len({p, u, -u})}')
+    assert hash(p) == hash(u) and len({p, u}) == 1 and len({p, u, -u}) == 2
+
+    # non-finite components are hashed too
+    nan, inf = float('nan'), float('inf')
+    print(f'set of non-finite quaternions has length {len({Quaternion(nan, 0, 0, 0), Quaternion(inf, 1, 0, 0), Quaternion(1e300, 0, 0, 0)})}')
+
+    ## Deduplication
+    N = 1_000_000
+    L = np.random.randn(N, 4)
+    L /= np.linalg.norm(L, axis=1)[:, None]
+    L = np.concatenate([L, -L, L + 1e-15])
+
+    t = perf_counter()
+    unique, index = batch.dedup(L, tol=1e-9)
+    t = perf_counter() - t
+    print(f'dedup of {len(L)} versors -> {len(unique)} orientations in {t:.3f}s')
+    print(f'max reconstruction error: {np.abs(unique[index] - batch.canonical(L)).max()}')
+
+    ## Predicates and validation
+    H = np.concatenate([L[:N], np.random.randn(1000, 4), np.zeros((10, 4))])
+    H[5, 2] = np.nan
+    print(f'isclose to -L with antipodal: {batch.allclose(L[:N], -L[:N], antipodal=True)}')
+    print(f'unit: {batch.is_unit(H).sum()}, real: {batch.is_real(H).sum()}, pure: {batch.is_pure(H).sum()}')
+
+    t = perf_counter()
+    report = batch.validate_batch(H, unit=True)
+    t = perf_counter() - t
+    print(f'validate_batch of {report["rows"]} rows in {t:.3f}s: {report["counts"]}, nonfinite at {report["nonfinite"]}')
+
+    Q = batch.to_quaternions(H[:100000])
+    t = perf_counter()
+    mask = [q.is_unit() for q in Q]
+    t_scalar = perf_counter() - t
+    t = perf_counter()
+    assert np.array_equal(mask, batch.is_unit(H[:100000]))
+    print(f'is_unit on 100000 rows: {t_scalar/(perf_counter() - t):.0f}x faster than the scalar method')
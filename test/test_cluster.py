@@ -0,0 +1,46 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+import numpy as np
+import batch
+import cluster
+from time import perf_counter
+
+if __name__ == "__main__":
+    ## Eight blobs of orientations, with random signs (q and -q are the same rotation)
+    centers = batch.normalize(np.random.randn(8, 4))
+    truth = np.random.randint(0, 8, 500000)
+    X = batch.normalize(centers[truth] + 0.03*np.random.randn(len(truth), 4))
+    X[np.random.rand(len(truth)) < 0.5] *= -1
+    match = lambda C: np.degrees(cluster.distances(centers, C).min(axis=1)).max()
+
+    for workers in (1, 4):
+        t = perf_counter()
+        C, labels = cluster.kmeans(X, 8, chunk=100000, workers=workers, seed=0)
+        t = perf_counter() - t
+        print(f'k-means on {len(X)} rows with {workers} worker(s) in {t:.2f}s, '
+              f'farthest blob from a centroid: {match(C):.2f} deg')
+
+    t = perf_counter()
+    modes, labels = cluster.mean_shift(X[:50000], bandwidth=0.3)
+    t = perf_counter() - t
+    print(f'mean-shift on 50000 rows in {t:.2f}s: {len(modes)} modes, farthest blob from a mode: {match(modes):.2f} deg')
+
+    t = perf_counter()
+    labels = cluster.dbscan(np.concatenate((X[:10000], batch.normalize(np.random.randn(500, 4)))), eps=0.1, min_samples=10)
+    t = perf_counter() - t
+    print(f'DBSCAN on 10500 rows in {t:.2f}s: {labels.max() + 1} clusters, {np.sum(labels < 0)} noise rows')
@@ -0,0 +1,45 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+from Quaternion import Versor
+import compress
+import numpy as np
+from time import perf_counter
+
+if __name__ == "__main__":
+    v = Versor.random()
+    for fmt in compress.FORMATS:
+        data = compress.pack(v, fmt)
+        print(f'{fmt}: {v} -> {data.hex()} -> {compress.unpack(data, fmt)}')
+
+    ## Error bounds and throughput (MB/s of float64 input, 32 bytes per versor)
+    N = 1_000_000
+    L = np.random.randn(N, 4)
+    L /= np.linalg.norm(L, axis=1)[:, None]
+
+    for fmt, size in compress.FORMATS.items():
+        t = perf_counter()
+        data = compress.encode(L, fmt).tobytes()
+        t_enc = perf_counter() - t
+
+        t = perf_counter()
+        D = compress.decode(data, fmt)
+        t_dec = perf_counter() - t
+
+        angle = 2*np.arccos(np.clip(np.abs(np.einsum('ij,ij->i', L, D)), 0, 1))
+        print(f'{fmt}: {size} bytes/versor ({32/size:.0f}x), max angle error {angle.max():.2e} rad, '
+              f'encode {32*N/t_enc/1e6:.0f} MB/s, decode {32*N/t_dec/1e6:.0f} MB/s')
@@ -0,0 +1,43 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+import numpy as np
+import batch
+import crystal
+from time import perf_counter
+
+if __name__ == "__main__":
+    for name in crystal.SYMMETRIES:
+        print(f'{name}: {len(crystal.group(name))} operators')
+
+    ## Fundamental zone and maximum disorientation of random pairs
+    p, q = batch.normalize(np.random.randn(100000, 4)), batch.normalize(np.random.randn(100000, 4))
+    r = crystal.reduce(p, 'cubic')
+    print(f'reduced orientations in the fundamental zone: {crystal.in_fundamental_zone(r, "cubic").all()}')
+    print(f'max cubic disorientation {crystal.disorientation(p, q, "cubic", degrees=True).max():.2f} deg (bound 62.80)')
+    print(f'max hexagonal disorientation {crystal.disorientation(p, q, "hexagonal", degrees=True).max():.2f} deg (bound 93.84)')
+
+    ## EBSD-like 1000x1000 map: 400 square grains with small orientation noise
+    grains = batch.normalize(np.random.randn(400, 4))
+    labels = np.arange(400).reshape(20, 20).repeat(50, axis=0).repeat(50, axis=1)
+    orientation_map = batch.normalize(grains[labels].reshape(-1, 4) + 0.002*np.random.randn(10**6, 4)).reshape(1000, 1000, 4)
+
+    t = perf_counter()
+    right, down = crystal.neighbour_disorientation(orientation_map, 'cubic', degrees=True)
+    t = perf_counter() - t
+    print(f'neighbour disorientations of a 1000x1000 map in {t:.2f}s, '
+          f'{np.sum(right > 5) + np.sum(down > 5)} grain boundary segments above 5 deg')
@@ -0,0 +1,62 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+import numpy as np
+import batch
+import dispatch
+import functions
+from Quaternion import Quaternion
+from time import perf_counter
+
+if __name__ == "__main__":
+    ## The same entry points accept a quaternion, a list of them or an array
+    q = Quaternion(1, 2, 3, 4)
+    print(f'single: {q.normalize()}')
+    print(f'list: {Quaternion.normalize([q, Quaternion(0, 1, 1, 0)])}')
+    print(f'array:\n{Quaternion.normalize(np.array([[1., 2, 3, 4], [0, 1, 1, 0]]))}')
+    print(f'single array: {Quaternion.normalize(np.array([1., 2, 3, 4]))}')
+    assert Quaternion.normalize(np.array([1., 2, 3, 4])).shape == (4,)
+    print(f'rotation of a list of points: {q.rotate_point([(1, 0, 0), (0, 1, 0)])}')
+
+    ## Backend chosen by size and container
+    for n in (1, 8, 64, 1024):
+        H = np.random.randn(n, 4)
+        L = batch.to_quaternions(H)
+        for name, data in (('list', L), ('array', H)):
+            t = perf_counter()
+            functions.dot(data, data)
+            t = perf_counter() - t
+            print(f'dot of a {name} of {n}: {dispatch.backend("dot", n, name)} backend, {1e6*t:.1f} us')
+
+    ## Calibration of the crossovers on this machine
+    for op, thresholds in dispatch.calibrate(ops=('normalize', 'rotate_point'), repeat=3).items():
+        if op in ('normalize', 'rotate_point'):
+            print(f'{op}: {thresholds}')
+
+    ## Saved thresholds are read back, also at import through the environment variable
+    import os, json, subprocess, tempfile
+    path = os.path.join(tempfile.mkdtemp(), 'dispatch.json')
+    dispatch.THRESHOLDS['dot']['array']['numpy'] = 123
+    dispatch.save(path)
+    dispatch.THRESHOLDS['dot']['array']['numpy'] = 0
+    dispatch.load(path)
+    print(f'load restores the saved thresholds: {dispatch.THRESHOLDS["dot"]["array"]["numpy"] == 123}')
+
+    code = 'import json, dispatch; print(json.dumps(dispatch.THRESHOLDS))'
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path), **{dispatch.ENVIRONMENT: path})
+    loaded = json.loads(subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout)
+    print(f'thresholds loaded at import: {loaded == dispatch.THRESHOLDS}')
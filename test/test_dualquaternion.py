@@ -0,0 +1,48 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+from Quaternion import Quaternion
+from DualQuaternion import DualQuaternion, DualQuaternionArray
+import numpy as np
+from time import perf_counter
+
+if __name__ == "__main__":
+    r = Quaternion.from_rotation(90, (0,0,1))
+    x = DualQuaternion.from_pose(r, (1,2,3))
+    y = DualQuaternion.from_translation((0,0,-3))
+    p = (1,0,0)
+
+    print(f'x = {x}\nx.rotation = {x.rotation}, x.translation = {x.translation}')
+    print(f'x moves {p} to {x.transform_point(p)}')
+    print(f'(y*x) moves {p} to {(y*x).transform_point(p)}')
+    print(f'x * x^-1 = {x * x.inverse()}')
+    print(f'x.to_matrix() =\n{x.to_matrix().round(6)}')
+    print(f'from_matrix(x.to_matrix()) == x: {DualQuaternion.from_matrix(x.to_matrix()) == x}')
+    print(f'sclerp(x, y, 0.5) = {x.sclerp(y, 0.5)}')
+
+    ## Skinning: 100k vertices, 200 bones, 4 bones per vertex
+    V, B, K = 100_000, 200, 4
+    bones = DualQuaternionArray.from_poses(np.random.randn(B, 4), np.random.randn(B, 3))
+    indices = np.random.randint(0, B, (V, K))
+    weights = np.random.rand(V, K)
+    weights /= weights.sum(axis=1)[:, None]
+    vertices = np.random.randn(V, 3)
+
+    t = perf_counter()
+    skinned = DualQuaternionArray.skin(bones, indices, weights, vertices)
+    t = perf_counter() - t
+    print(f'skinned {V} vertices against {B} bones in {1000*t:.1f} ms')
@@ -0,0 +1,66 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+
+import numpy as np
+import fractal
+from Quaternion import Quaternion
+from QuaternionPolynomial import QuaternionPolynomial
+from time import perf_counter
+
+def reference(z:Quaternion, c:Quaternion, max_iter:int, bailout:float=4.0) -> int:
+    '''Escape time of a single orbit of q^2 + c, with Quaternion operators.'''
+    for it in range(1, max_iter + 1):
+        z = z*z + c
+        if abs(z) > bailout:
+            return it
+    return max_iter
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    c = [-0.2, 0.8, 0, 0]
+
+    ## Compared with Quaternion operators
+    Z = rng.uniform(-1.5, 1.5, (500, 4))
+    counts = fractal.escape_time(Z, c, max_iter=32)
+    print('mismatches with Quaternion:', np.count_nonzero(counts != [reference(Quaternion(*z), Quaternion(*c), 32) for z in Z.tolist()]))
+    print('q^2 as int, as polynomial:', np.array_equal(counts, fractal.escape_time(Z, c, 2, 32)),
+          np.array_equal(counts, fractal.escape_time(Z, c, QuaternionPolynomial([0, 0, 1]), 32)))
+
+    ## The slice j = k = 0 of the Mandelbrot set is the complex one
+    M = fractal.mandelbrot(((-2, 1), (-1.5, 1.5), (0, 1)), (300, 300, 1), axis=2, max_iter=50)[:, :, 0]
+    C = np.linspace(-2, 1, 300)[:, None] + 1j*np.linspace(-1.5, 1.5, 300)[None, :]
+    z, complex_counts = np.zeros_like(C), np.full(C.shape, 50)
+    for it in range(1, 51):
+        z = np.where(complex_counts == 50, z*z + C, z)
+        complex_counts[(np.abs(z) > 4) & (complex_counts == 50)] = it
+    print('mismatches with the complex Mandelbrot set:', np.count_nonzero(M != complex_counts))
+
+    ## Julia set of 128^3 points: escaped points are retired at every iteration
+    start = perf_counter()
+    J = fractal.julia(c, resolution=128, max_iter=64)
+    print(f'Julia set 128^3 in {perf_counter() - start:.2f}s, {np.mean(J == 64):.2%} of the points inside')
+    start = perf_counter()
+    J2 = fractal.julia(c, resolution=128, max_iter=64, workers=2)
+    print(f'with 2 worker processes in {perf_counter() - start:.2f}s, same result:', np.array_equal(J, J2))
+
+    ## Other maps: q^3 + c and a polynomial with quaternionic coefficients
+    for f in (3, QuaternionPolynomial([0, Quaternion(0, 0, 0.3), 1])):
+        start = perf_counter()
+        J = fractal.julia([0.3, 0.5, 0, 0], resolution=96, f=f, max_iter=32)
+        print(f'{f}: {perf_counter() - start:.2f}s, {np.mean(J == 32):.2%} inside')
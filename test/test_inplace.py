@@ -0,0 +1,84 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+import tracemalloc
+import numpy as np
+import batch
+import functions
+from Quaternion import Quaternion, Versor
+from time import perf_counter
+
+def allocated(f, *args, n:int=1000, warmup:int=100) -> int:
+    '''Returns the largest number of bytes allocated by a single call of f(*args), in steady
+    state: tracing starts before the warm-up, and the samples of the warm-up calls are
+    discarded, so that the one-time allocations of the interpreter (the first runs of the
+    measuring loop itself included) are not counted. The samples are stored in a preallocated
+    array, so that the loop creates no objects between the reads of the traced memory.'''
+    samples = np.zeros((warmup + n, 2), dtype=np.int64)
+    tracemalloc.start()
+    for i in range(warmup + n):
+        samples[i, 0] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        f(*args)
+        samples[i, 1] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return int(np.max(samples[warmup:, 1] - samples[warmup:, 0]))
+
+if __name__ == "__main__":
+    ## In-place operators and out= parameters do not allocate
+    p, q, u = Quaternion(1, 2, 3, 4), Versor(1, 2, 3, 4), Quaternion(0.1, 0.2, 0.3, 0.4)
+    out, point, vector = Quaternion(), [0.0]*3, [0.0]*3
+
+    cases = {
+        'p *= q': (Quaternion.__imul__, p, q),
+        'p /= q': (Quaternion.__itruediv__, p, q),
+        'p += q': (Quaternion.__iadd__, p, q),
+        'p @= 1.0': (Quaternion.__imatmul__, p, 1.0),
+        'v **= 2': (Quaternion.__ipow__, Versor(1, 2, 3, 4), 2),
+        'normalize(out)': (Quaternion.normalize, p, out),
+        'conjugate(out)': (Quaternion.conjugate, p, out),
+        'inverse(out)': (Quaternion.inverse, p, out),
+        'rotate_point(out)': (Versor.rotate_point, q, (1.0, 2.0, 3.0), False, point),
+        'exp(out)': (functions.exp, u, out),
+        'log2(out)': (functions.log2, q, out),
+        'cross(out)': (functions.cross, p, q, vector),
+        'commutator(out)': (functions.commutator, p, q, vector),
+    }
+    for name, (f, *args) in cases.items():
+        size = allocated(f, *args)
+        print(f'{name}: {size} bytes per call')
+        assert size == 0, f'{name} allocated {size} bytes'
+    print(f'p * q (new quaternion): {allocated(Quaternion.__mul__, p, q)} bytes per call')
+
+    ## Same results of the allocating versions
+    a, b = Quaternion(1, -2, 0.5, 3), Versor(0.3, 1, -1, 2)
+    c = Quaternion(*a.q)
+    c *= b
+    assert np.allclose(c.q, (a*b).q)
+    assert np.allclose(b.rotate_point((1, 2, 3), out=[0]*3), b.rotate_point((1, 2, 3)))
+    assert np.allclose(a.inverse(out=Quaternion()).q, a.inverse().q)
+
+    ## Batched kernels write into preallocated arrays
+    H, G = np.random.randn(100000, 4), np.random.randn(100000, 4)
+    buffer = np.empty_like(H)
+    for name, f in (('new array', lambda: batch.multiply(H, G)), ('out=', lambda: batch.multiply(H, G, out=buffer))):
+        t = perf_counter()
+        for _ in range(20):
+            f()
+        print(f'batch.multiply, {name}: {1e3*(perf_counter() - t)/20:.2f} ms')
+    assert np.allclose(buffer, batch.multiply(H, G))
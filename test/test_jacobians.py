@@ -0,0 +1,75 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+
+import numpy as np
+import batch
+import jacobians
+
+def numeric(f, X, eps=1e-6):
+    '''Central finite differences of the rowwise function f, with shape (N, m, n).'''
+    return np.stack([(f(X + eps*e) - f(X - eps*e))/(2*eps) for e in np.eye(X.shape[1])], axis=-1)
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    p, q = rng.normal(size=(1000, 4)), rng.normal(size=(1000, 4))
+    points = rng.normal(size=(1000, 3))
+
+    ## Compared with finite differences
+    dp, dq = jacobians.multiply(p, q)
+    print('multiply:', np.abs(dp - numeric(lambda X: batch.multiply(X, q), p)).max(),
+          np.abs(dq - numeric(lambda X: batch.multiply(p, X), q)).max())
+    print('conjugate:', np.abs(jacobians.conjugate(q) - numeric(batch.conjugate, q)).max())
+    print('normalize:', np.abs(jacobians.normalize(q) - numeric(batch.normalize, q)).max())
+    print('exp:', np.abs(jacobians.exp(q) - numeric(batch.exp, q)).max())
+    print('log:', np.abs(jacobians.log(q) - numeric(batch.log, q)).max())
+    print('log at 1:', jacobians.log([1, 0, 0, 0])[0].diagonal(), 'at -1:', jacobians.log([-1, 0, 0, 0])[0, 0])
+
+    for passive in (False, True):
+        dq, dp = jacobians.rotate_points(q, points, passive)
+        print(f'rotate_points (passive={passive}):',
+              np.abs(dq - numeric(lambda X: batch.rotate_points(X, points, passive), q)).max(),
+              np.abs(dp - numeric(lambda X: batch.rotate_points(q, X, passive), points)).max())
+
+    ## Local parametrization
+    u = batch.normalize(q)
+    perturb = lambda d: batch.multiply(u, batch.exp(np.concatenate((np.zeros((len(d), 1)), d/2), axis=1)))
+    zero = np.zeros((len(u), 3))
+    print('plus:', np.abs(jacobians.plus(u) - numeric(perturb, zero)).max())
+    print('minus @ plus:', np.abs(jacobians.minus(u) @ jacobians.plus(u) - np.eye(3)).max())
+    dl, _ = jacobians.rotate_points(u, points, local=True)
+    print('local rotate_points:', np.abs(dl - numeric(lambda d: batch.rotate_points(perturb(d), points), zero)).max(),
+          np.abs(dl - jacobians.local(jacobians.rotate_points(u, points)[0], u)).max())
+    phi = rng.normal(size=(1000, 3))
+    print('right jacobian inverse:', np.abs(jacobians.right_jacobian_inv(phi) @ jacobians.right_jacobian(phi) - np.eye(3)).max())
+
+    ## Gauss-Newton on the tangent space: 1000 rotations, each fitted to 20 observed points
+    truth = batch.normalize(rng.normal(size=(1000, 4)))
+    X = rng.normal(size=(1000, 20, 3))
+    Y = np.stack([batch.rotate_points(truth, X[:, k]) for k in range(20)], axis=1) + 1e-3*rng.normal(size=X.shape)
+    est = batch.normalize(truth + 0.3*rng.normal(size=truth.shape))
+    for it in range(8):
+        r, JJ = [], []
+        for k in range(20):
+            r.append(batch.rotate_points(est, X[:, k]) - Y[:, k])
+            JJ.append(jacobians.rotate_points(est, X[:, k], local=True)[0])
+        r, JJ = np.concatenate(r, axis=1), np.concatenate(JJ, axis=1)
+        d = np.linalg.solve(np.swapaxes(JJ, 1, 2) @ JJ, -(np.swapaxes(JJ, 1, 2) @ r[..., None]))[..., 0]
+        est = batch.normalize(batch.multiply(est, batch.exp(np.concatenate((np.zeros((1000, 1)), d/2), axis=1))))
+        print(f'iteration {it}: rms residual {np.sqrt(np.mean(r**2)):.2e}')
+    print('largest error (rad):', (2*np.arccos(np.minimum(np.abs(np.einsum('ij,ij->i', est, truth)), 1))).max())
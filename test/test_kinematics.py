@@ -0,0 +1,64 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+
+import numpy as np
+import batch
+import kinematics
+import spline
+from time import perf_counter
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    ## Constant body rate with non-uniform timestamps and random sign flips
+    w = np.array([0.3, -1.2, 0.7])
+    t = np.concatenate(([0], np.sort(rng.uniform(0, 5, 999))))
+    q = batch.multiply(batch.normalize(rng.normal(size=4)),
+                       batch.exp(np.concatenate((np.zeros((len(t), 1)), t[:, None]*w/2), axis=1)))
+    q[rng.random(len(t)) < 0.5] *= -1
+    print('body error:', np.abs(kinematics.angular_velocity(q, t) - w).max())
+    print('world error:', np.abs(kinematics.angular_velocity(q, t, frame='world')
+                                 - batch.rotate_points(q, w, passive=True)).max())
+    print('acceleration (zero):', np.abs(kinematics.angular_acceleration(q, t)).max())
+
+    ## Compared with the analytic derivatives of a spline
+    s = spline.CumulativeBSpline(batch.normalize(rng.normal(size=(8, 4))))
+    t = np.sort(rng.uniform(*s.duration, 4000))
+    q, w, a = s.evaluate(t, 2)
+    print('spline velocity error:', np.abs(kinematics.angular_velocity(q, t) - w)[1:-1].max())
+    print('spline acceleration error:', np.abs(kinematics.angular_acceleration(q, t) - a)[2:-2].max())
+
+    ## Integration back
+    for frame in kinematics.FRAMES:
+        omega = kinematics.angular_velocity(q, t, frame=frame, method='forward')
+        back = kinematics.integrate(q[0], omega, t, frame=frame)
+        print(f'{frame} round trip:', np.abs(np.abs(np.einsum('ij,ij->i', back, q)) - 1).max())
+
+    ## Streaming in chunks of a long sequence (one hour at 1 kHz)
+    n, dt, size = 3_600_000, 1e-3, 100_000
+    omega = rng.normal(scale=0.5, size=(n - 1, 3))
+    start = perf_counter()
+    chunks = list(kinematics.stream_integrate([1, 0, 0, 0], (omega[i:i + size] for i in range(0, n - 1, size)), dt))
+    q = np.concatenate([[[1, 0, 0, 0]]] + chunks)
+    print(f'integrated {n} samples in {perf_counter() - start:.2f}s')
+
+    start = perf_counter()
+    parts = list(kinematics.stream_angular_velocity((q[i:i + size] for i in range(0, n, size)), dt))
+    print(f'velocities in {perf_counter() - start:.2f}s,',
+          'error:', np.abs(np.concatenate([w for _, w in parts])[1:-1] - (omega[1:] + omega[:-1])/2).max())
@@ -0,0 +1,56 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+from Quaternion import Quaternion
+from QuaternionMatrix import QuaternionMatrix
+import numpy as np
+from time import perf_counter
+
+if __name__ == "__main__":
+    A = QuaternionMatrix([[Quaternion(1,2,0,0), Quaternion(0,0,1,0)],
+                          [Quaternion(0,0,0,1), 2]])
+    print(f'A = {A}\nA[0,1] = {A[0,1]}')
+    print(f'A @ A^-1 = {A @ A.inverse()}')
+    print(f'A.H = {A.H}')
+    print(f'j*A = {Quaternion(0,0,1,0)*A}\nA*j = {A*Quaternion(0,0,1,0)}')
+
+    B = QuaternionMatrix.random(6, 4)
+    Q, R = B.qr()
+    print(f'qr: |QR - B| = {(Q @ R - B).norm():.2e}, |Q.H Q - I| = {(Q.H @ Q - QuaternionMatrix.identity(4)).norm():.2e}')
+
+    U, s, V = B.svd()
+    S = QuaternionMatrix(np.stack([np.diag(s)] + [np.zeros((4, 4))]*3, axis=-1))
+    print(f'svd: singular values {s.round(3)}, |U S V.H - B| = {(U @ S @ V.H - B).norm():.2e}')
+
+    X = QuaternionMatrix.random(4, 1)
+    C = QuaternionMatrix.random(4, 4)
+    print(f'solve: |C X - b| = {(C @ C.solve(C @ X) - C @ X).norm():.2e}')
+
+    ## Products: embedding vs nested lists of quaternions
+    n = 60
+    A, B = QuaternionMatrix.random(n, n), QuaternionMatrix.random(n, n)
+    LA, LB = A.to_list(), B.to_list()
+
+    t = perf_counter()
+    P = [[sum((LA[i][k]*LB[k][j] for k in range(n)), Quaternion(0)) for j in range(n)] for i in range(n)]
+    t_list = perf_counter() - t
+
+    t = perf_counter()
+    C = A @ B
+    t_chi = perf_counter() - t
+    print(f'{n}x{n} product: nested lists {t_list:.3f}s, embedding {t_chi:.5f}s, '
+          f'same result: {all(C[i,j] == P[i][j] or abs(C[i,j] - P[i][j]) < 1e-9 for i in range(n) for j in range(n))}')
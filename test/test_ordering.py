@@ -0,0 +1,60 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+
+import numpy as np
+import batch
+import ordering
+import so3grid
+from time import perf_counter
+
+def steps(H:np.ndarray) -> np.ndarray:
+    '''Rotation angles between consecutive rows.'''
+    return 2*np.arccos(np.minimum(np.abs(np.einsum('ij,ij->i', H[:-1], H[1:])), 1))
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    H = batch.normalize(rng.normal(size=(1_000_000, 4)))
+
+    ## Keys and locality of the sorted set
+    for curve in ordering.CURVES:
+        start = perf_counter()
+        k = ordering.keys(H, curve)
+        print(f'{curve}: {len(H)} keys in {perf_counter() - start:.2f}s,',
+              'antipodal invariant:', np.array_equal(k, ordering.keys(-H, curve)))
+        s = steps(H[np.argsort(k, kind='stable')])
+        print(f'  median step {np.degrees(np.median(s)):.2f} deg, 99th percentile {np.degrees(np.quantile(s, 0.99)):.2f} deg')
+    print(f'unsorted: median step {np.degrees(np.median(steps(H))):.2f} deg')
+
+    ## Reorder with attached data, and shards
+    colours = rng.random((len(H), 3))
+    sorted_H, sorted_colours, order = ordering.reorder(H, colours)
+    print('reorder consistent:', np.array_equal(sorted_H, H[order]), np.array_equal(sorted_colours, colours[order]))
+    shards = ordering.spatial_chunks(H, n_chunks=64)
+    spread = []
+    for shard in shards:
+        S = H[shard] * np.sign(H[shard] @ H[shard[0]])[:, None]     # same sign of q and -q
+        spread.append(np.degrees(2*np.arccos(np.minimum(np.abs(S @ batch.normalize(S.mean(axis=0))[0]), 1))).mean())
+    print(f'{len(shards)} shards of {len(shards[0])} points, mean distance from their centre {np.mean(spread):.1f} deg')
+
+    ## Nearest-node lookups are faster on ordered queries (memory access of the tables)
+    grid = so3grid.SO3Grid(so3grid.nodes_for_resolution(5, degrees=True))
+    for name, Q in (('shuffled', H), ('ordered', sorted_H)):
+        start = perf_counter()
+        grid.nearest(Q)
+        print(f'nearest node of {len(Q)} {name} versors in {perf_counter() - start:.2f}s')
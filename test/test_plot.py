@@ -17,6 +17,7 @@ if __name__ == '__main__':
     
 from Quaternion import Quaternion
 import Hplot
+import numpy as np
 from multiprocessing import Process
 
 def specialPrint(L:list):
@@ -51,8 +52,24 @@ if __name__ == '__main__':
     # Uncomment what plot you want to see
     # Hplot.Hplot(L)
     # Hplot.pathplot(L)
+    # Hplot.pathplot(L, geodesic=True, view='stereo')
     # Hplot.stereo_pjrN(L)
     # Hplot.stereo_prjS(L)
     # Hplot.stereo_432(L)
     # Hplot.imagy_stereo(L)
+    # Hplot.hopfplot(L)
+    # Hplot.hopfplot(np.random.randn(1_000_000, 4), fibres=64)   # arrays of orientations
+
+    # Live plot of a stream, or its animation
+    # live = Hplot.LivePlot(capacity=500, mode='hopf')
+    # live.show()
+    # for q in L * 20:
+    #     live.append(q)
+    # Hplot.LivePlot(capacity=20).animate([[q] for q in L], path='stream.gif')
+
+    # Escape-time sets: Julia set of q^2 + c on the slice k = 0
+    # import fractal
+    # J = fractal.julia([-0.2, 0.8, 0, 0], resolution=128)
+    # Hplot.escapeplot(J, ((-1.5, 1.5),)*3)
+    # Hplot.escapeplot(J, ((-1.5, 1.5),)*3, view='voxels')
     Hplot.stereo_4321(L)
\ No newline at end of file
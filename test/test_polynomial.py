@@ -0,0 +1,64 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+
+import numpy as np
+import batch
+from Quaternion import Quaternion
+from QuaternionPolynomial import QuaternionPolynomial
+from time import perf_counter
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    ## Definition and printing
+    p = QuaternionPolynomial([1, Quaternion(0, 1, 2, 3), 0, 2.5])
+    print(p, '| degree', p.degree)
+    print('derivative:', p.derivative())
+    print('right:', QuaternionPolynomial(p.coefficients, 'right'))
+
+    ## Evaluation: single quaternions and batches
+    x = Quaternion(1, -1, 0.5, 2)
+    print(f'p({x}) =', p(x), '| Horner on a batch:', p([x])[0])
+    for side in ('left', 'right'):
+        q = QuaternionPolynomial(rng.normal(size=(9, 4)), side)
+        X = rng.normal(size=(1_000_000, 4)) / 2
+        start = perf_counter()
+        q(X)
+        print(f'{side} polynomial of degree {q.degree} at {len(X)} points in {perf_counter() - start:.2f}s')
+
+        eps, Y = 1e-6, X[:1000]
+        numeric = np.stack([(q(Y + eps*e) - q(Y - eps*e))/(2*eps) for e in np.eye(4)], axis=-1)
+        print('  jacobian error:', np.abs(q.jacobian(Y) - numeric).max() / np.abs(numeric).max())
+
+    ## Roots: isolated (random coefficients) ...
+    for side in ('left', 'right'):
+        q = QuaternionPolynomial(rng.normal(size=(7, 4)), side)
+        isolated, spherical = q.roots()
+        print(f'{side}: {len(isolated)} isolated roots, {len(spherical)} spheres, largest |p(root)| {np.abs(q(isolated)).max():.1e}')
+
+    ## ... and spherical: x^2 + 1 vanishes on all the unitary pure quaternions
+    isolated, spherical = QuaternionPolynomial([1, 0, 1]).roots()
+    print('x^2+1:', len(isolated), 'isolated roots, spheres (alpha, beta):', spherical)
+    u = batch.normalize(np.concatenate((np.zeros((5, 1)), rng.normal(size=(5, 3))), axis=1))
+    print('  |p| on the sphere:', np.abs(QuaternionPolynomial([1, 0, 1])(u)).max())
+
+    ## From roots: (x - 2)(x - r)(x - conj(r)) has the real root 2 and the sphere of r
+    r = batch.normalize(rng.normal(size=4))[0]
+    isolated, spherical = QuaternionPolynomial.from_roots([[2, 0, 0, 0], r, r*[1, -1, -1, -1]]).roots()
+    print('isolated:', isolated.round(8), '| sphere:', spherical, '| expected', [r[0], np.linalg.norm(r[1:])])
@@ -0,0 +1,51 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+from Quaternion import Quaternion
+import qfft
+import numpy as np
+from time import perf_counter
+
+if __name__ == "__main__":
+    ## 1D signal of quaternions
+    L = [Quaternion.random() for _ in range(8)]
+    for kind in ('left', 'right'):
+        F = qfft.qfft(L, kind)
+        back = qfft.iqfft(F, kind)
+        print(f'{kind} QFT, round trip error: {np.abs(back - [q.q for q in L]).max():.2e}')
+
+    ## Colour image as pure quaternions r*i + g*j + b*k
+    H, W = 2160, 3840
+    image = np.zeros((H, W, 4))
+    image[..., 1:] = np.random.rand(H, W, 3)
+
+    for kind in qfft.KINDS:
+        t = perf_counter()
+        F = qfft.qfft2(image, kind)
+        t = perf_counter() - t
+        err = np.abs(qfft.iqfft2(F, kind) - image).max()
+        print(f'{kind} QFT of a {W}x{H} frame in {t:.3f}s, round trip error: {err:.2e}')
+
+    ## Smoothing with a 5x5 box kernel (real kernel: it acts channel by channel)
+    kernel = np.zeros((5, 5, 4))
+    kernel[..., 0] = 1/25
+    small = image[:256, :256]
+    t = perf_counter()
+    blurred = qfft.convolve(kernel, small, mode='same')
+    t = perf_counter() - t
+    print(f'box blur of a 256x256 frame in {t:.3f}s, '
+          f'center pixel matches the mean: {np.allclose(blurred[100, 100], small[98:103, 98:103].mean(axis=(0, 1)))}')
@@ -0,0 +1,46 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+from Quaternion import Quaternion
+from rotcache import RotationCache
+from time import perf_counter
+
+if __name__ == "__main__":
+    cache = RotationCache(maxsize=64)
+
+    poses = [Quaternion.random() for _ in range(16)]
+    p = (1, 2, 3)
+
+    q = poses[0]
+    print(f'rotate_point {p} by {q} = {q.rotate_point(p)}')
+    print(f'cached rotate_point {p} by {q} = {cache.rotate_point(q, p)}')
+    print(f'cached rotate_point {p} by {-q} = {cache.rotate_point(-q, p)}')
+    print(f'rotation = {q.rotation}\ncached axis_angle = {cache.axis_angle(q)}')
+    print(f'from_rotation(90,(0,0,1)) = {cache.from_rotation(90, (0,0,1))}')
+
+    def timing(f) -> float:
+        t = perf_counter()
+        for _ in range(10_000):
+            for q in poses:
+                f(q)
+        return perf_counter() - t
+
+    # the lookup pays off for axis_angle, not for the closed form of rotate_point
+    for name, plain, cached in (('rotate_point', lambda q: q.rotate_point(p), lambda q: cache.rotate_point(q, p)),
+                                ('axis_angle', lambda q: q.rotation, cache.axis_angle)):
+        print(f'{name}: plain {timing(plain):.3f}s, cached {timing(cached):.3f}s')
+    print(cache.stats)
@@ -0,0 +1,53 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+import os
+import tempfile
+import numpy as np
+import functions
+import so3grid
+from Quaternion import Versor
+from time import perf_counter
+
+if __name__ == "__main__":
+    ## Grid of about 5 degrees, saved for the next runs
+    n = so3grid.nodes_for_resolution(5, degrees=True)
+    path = os.path.join(tempfile.gettempdir(), f'so3grid_{n}.npz')
+    t = perf_counter()
+    grid = so3grid.SO3Grid.cached(path, n)
+    print(f'{len(grid)} nodes, resolution {np.degrees(grid.resolution):.2f} deg, ready in {perf_counter() - t:.2f}s ({path})')
+
+    ## Nearest node of a Versor, and its neighbours
+    v = Versor.random()
+    i = grid.nearest(v)
+    print(f'{v} -> node {i}: {grid[i]}, neighbours {grid.neighbours[i][:4]}...')
+
+    ## Batches, compared with brute force on functions.geodesic_dist
+    N = 1_000_000
+    Q = np.random.randn(N, 4)
+    t = perf_counter()
+    index, angle = grid.nearest(Q, return_angle=True)
+    print(f'{N} lookups in {perf_counter() - t:.2f}s, largest distance {np.degrees(angle.max()):.2f} deg')
+    assert angle.max() <= grid.resolution
+
+    Q = Q[:200] / np.linalg.norm(Q[:200], axis=1)[:, None]
+    t = perf_counter()
+    nodes = [Versor(*row) for row in grid.nodes]
+    brute = [min(range(len(nodes)), key=lambda j: functions.geodesic_dist(Versor(*q), nodes[j])) for q in Q[:20]]
+    print(f'brute force: {(perf_counter() - t)/20*1e3:.0f} ms per lookup')
+    assert np.array_equal(brute, index[:20])
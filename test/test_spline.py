@@ -0,0 +1,48 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+from Quaternion import Versor
+import spline
+import numpy as np
+from time import perf_counter
+
+if __name__ == "__main__":
+    keyframes = [Versor.random() for _ in range(5000)]
+
+    ## SQUAD through keyframes with non-uniform timestamps
+    times = np.cumsum(np.random.uniform(0.05, 0.15, len(keyframes)))
+    squad = spline.SquadSpline(keyframes, times)
+    print(f'squad passes through the keyframes: {np.allclose(np.abs(np.einsum("ij,ij->i", squad(times), squad.keyframes)), 1)}')
+
+    ## Cumulative B-spline, keyframes every 0.1s
+    bspline = spline.CumulativeBSpline(keyframes, t0=0, dt=0.1)
+
+    for curve in (bspline, squad):
+        start, end = curve.duration
+        samples = np.arange(start, end, 1e-3)        # 1 kHz
+        t = perf_counter()
+        q, w, a = curve.evaluate(samples, derivatives=2)
+        t = perf_counter() - t
+        print(f'{type(curve).__name__}: {len(samples)} samples at 1 kHz with velocity and acceleration '
+              f'in {t:.3f}s, max |w| = {np.linalg.norm(w, axis=1).max():.2f} rad/s')
+
+    ## Derivatives of the SQUAD at the ends of the interval: they extend those just inside
+    start, end = squad.duration
+    h0, h1 = 1e-3*(times[1] - times[0]), 1e-3*(times[-1] - times[-2])
+    _, w, a = squad.evaluate([start, start + h0, start + 2*h0, end, end - h1, end - 2*h1], derivatives=2)
+    print(f'squad velocity at the ends: {np.allclose(w[[0, 3]], 2*w[[1, 4]] - w[[2, 5]], rtol=1e-3, atol=1e-3)}')
+    print(f'squad acceleration at the ends: {np.allclose(a[[0, 3]], 2*a[[1, 4]] - a[[2, 5]], rtol=1e-2, atol=1e-1)}')
@@ -0,0 +1,96 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+import batch
+import stream
+import asyncio
+import numpy as np
+from time import perf_counter
+
+if __name__ == "__main__":
+    devices, samples, rate = 100, 2000, 10_000
+
+    recorded = [np.random.randn(samples, 4) for _ in range(devices)]
+    target = batch.normalize(np.random.randn(1, 4))
+
+    pipeline = stream.Pipeline([batch.normalize, lambda arr: batch.slerp(arr, target, 0.5)],
+                               max_batch=8192, max_latency=0.005)
+
+    t = perf_counter()
+    out = asyncio.run(stream.loopback(pipeline, recorded, rate=rate, frame_size=100))
+    t = perf_counter() - t
+
+    total = sum(len(b) for b in out)
+    print(f'{devices} devices x {samples} samples at {rate}/s each: {total} quaternions in {t:.2f}s')
+    print(f'{len(out)} batches, largest {max(len(b) for b in out)}, received {pipeline.received}')
+    print(f'all unitary: {np.allclose(np.linalg.norm(np.concatenate(out), axis=1), 1)}')
+
+    # Round trip of a single frame
+    frame = stream.encode_frame(recorded[0][:3])
+    print(f'frame of 3 quaternions: {len(frame)} bytes, '
+          f'decoded correctly: {np.array_equal(stream.decode_frame(frame), recorded[0][:3])}')
+
+    # Items arriving at the latency deadline are not lost, even with a queue of one frame
+    async def trickle(frames:int) -> list:
+        pipeline = stream.Pipeline(max_batch=64, max_latency=0.0005, maxsize=1)
+
+        async def produce():
+            for i in range(frames):
+                await pipeline.put(np.full((3, 4), 0.5))
+                if i % 3 == 0:
+                    await asyncio.sleep(0.0005)
+            await pipeline.close()
+
+        async def consume():
+            return [b async for b in pipeline]
+
+        return (await asyncio.gather(produce(), consume()))[1]
+
+    out = asyncio.run(trickle(2000))
+    print(f'trickled 6000 quaternions, emitted {sum(len(b) for b in out)} in {len(out)} batches')
+    assert sum(len(b) for b in out) == 6000
+
+    # A failing transform is raised by the consumers instead of leaving them waiting
+    def failing(arr):
+        raise RuntimeError("transform failed")
+
+    async def fail() -> str:
+        pipeline = stream.Pipeline(failing, maxsize=1)
+        pipeline.start()
+        await pipeline.put(np.full((3, 4), 0.5))
+        await pipeline.close()
+        try:
+            await asyncio.wait_for(pipeline.get(), 3)
+        except RuntimeError as err:
+            return str(err)
+
+    print(f'failing transform raised by get: {asyncio.run(fail())}')
+    try:
+        asyncio.run(asyncio.wait_for(stream.loopback(stream.Pipeline(failing, maxsize=1), recorded[:3], frame_size=10), 10))
+    except RuntimeError as err:
+        print(f'failing transform raised by loopback: {err}')
+
+    # Malformed datagrams are dropped, empty ones skipped
+    async def datagrams() -> stream.Pipeline:
+        pipeline = stream.Pipeline()
+        for data in (b'\x01', frame[:-1], stream.encode_frame(np.empty((0, 4))), frame):
+            pipeline.put_datagram(data)
+        return pipeline
+
+    pipeline = asyncio.run(datagrams())
+    print(f'datagrams: {pipeline.received} quaternions received, {pipeline.dropped} dropped')
+    assert pipeline.received == 3 and pipeline.dropped == 2
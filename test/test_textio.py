@@ -0,0 +1,66 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+
+import io
+import re
+import numpy as np
+import textio
+from Quaternion import Quaternion
+from time import perf_counter
+
+if __name__ == "__main__":
+    ## The form printed by Quaternion.__str__, with missing terms
+    text = '\n'.join(str(q) for q in (Quaternion(1, 2, 3, 4), Quaternion(0, 0, -2.5, 0), Quaternion()))
+    print(f'{text!r} ->\n{textio.parse_text(text)}')
+    print(textio.parse_text('inf+nani\n1e+20i-1E-5k  # comment\n\n-2j'))
+    for bad in ('1i+2', '1+2', '1.5x', '2ii'):
+        try:
+            textio.parse_text('1+1i\n' + bad)
+        except ValueError as err:
+            print(err)
+
+    ## CSV with extra columns and scalar part last
+    csv = 't,x,y,z,w\n0.0,0,0,0,1\n0.1,0.5,0.5,0.5,0.5\n'
+    print(textio.read_quaternions(io.StringIO(csv), order='xyzw', columns=(1, 2, 3, 4), skip_header=1))
+
+    ## Full precision round trip, in both formats
+    N = 200_000
+    H = np.random.randn(N, 4) * 10.0**np.random.randint(-20, 20, (N, 1))
+    H[::3, 2] = 0
+    for fmt in ('text', 'csv'):
+        buffer = io.StringIO()
+        t = perf_counter()
+        textio.write_quaternions(buffer, H, fmt)
+        t_write = perf_counter() - t
+
+        data = buffer.getvalue()
+        t = perf_counter()
+        blocks = list(textio.iter_quaternions(io.StringIO(data), fmt, chunk_size=1<<20))
+        t_read = perf_counter() - t
+
+        assert np.array_equal(np.concatenate(blocks), H)
+        print(f'{fmt}: {len(data)/1e6:.1f} MB in {len(blocks)} blocks, '
+              f'write {len(data)/t_write/1e6:.0f} MB/s, read {len(data)/t_read/1e6:.0f} MB/s')
+
+    ## Line by line parsing into Quaternion objects, for comparison
+    data = textio.format_quaternions(H)
+    t = perf_counter()
+    objects = [Quaternion(seq=[float(x.rstrip('ijk')) for x in re.split(r'(?<=[\dijk])(?=[+-])', line)])
+               for line in data.splitlines()]
+    print(f'line by line: {len(data)/(perf_counter() - t)/1e6:.0f} MB/s')
+    assert np.array_equal([q.q for q in objects], H)
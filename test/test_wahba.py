@@ -0,0 +1,50 @@
+if __name__ == '__main__':
+    import sys
+    import os
+
+    # getting the name of the directory
+    # where the this file is present.
+    current = os.path.dirname(os.path.realpath(__file__))
+
+    # Getting the parent directory name
+    # where the current directory is present.
+    parent = os.path.dirname(current)
+
+    # adding the parent directory to
+    # the sys.path.
+    sys.path.append(parent)
+
+
+import numpy as np
+import batch
+import wahba
+from Quaternion import Versor
+from time import perf_counter
+
+if __name__ == "__main__":
+    ## A single problem: three observed directions of a known rotation
+    v = Versor.from_rotation(60, (1, 1, 0))
+    ref = np.eye(3)
+    obs = np.array([v.rotate_point(r) for r in ref])
+    print(f'rotation {v}\ndavenport {wahba.davenport(ref, obs)}\nquest {wahba.quest(ref, obs)}\nhorn {wahba.horn(ref, obs)}')
+
+    ## Many noisy point-set registrations at once
+    P, N = 10000, 50
+    truth = batch.canonical(batch.normalize(np.random.randn(P, 4)))
+    ref = np.random.randn(P, N, 3)
+    obs = batch.rotate_points(np.repeat(truth, N, axis=0), ref.reshape(-1, 3)).reshape(P, N, 3)
+    obs += 0.01*np.random.randn(P, N, 3) + np.random.randn(P, 1, 3)      # noise and translation
+    weights = np.random.uniform(0.5, 1, (P, N))
+
+    # davenport and quest work on directions: the translation is removed beforehand
+    centered = lambda x: x - np.sum(weights[..., None]*x, axis=1, keepdims=True)/weights.sum(axis=1)[:, None, None]
+
+    for solver in (wahba.davenport, wahba.quest, wahba.horn):
+        t = perf_counter()
+        if solver is wahba.horn:
+            q = solver(ref, obs, weights, versors=False)
+        else:
+            q = solver(centered(ref), centered(obs), weights, versors=False)
+        t = perf_counter() - t
+        error = 2*np.degrees(np.arccos(np.clip(np.abs(np.einsum('ij,ij->i', q, truth)), 0, 1)))
+        print(f'{solver.__name__}: {P} problems of {N} points in {t:.3f}s, max error {error.max():.3f} deg')
@@ -0,0 +1,248 @@
+# Text input and output of quaternions for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains readers and writers of quaternion datasets stored as text, in two formats:
+# - 'text': one quaternion per line in the form "a+bi+cj+dk" printed by Quaternion.__str__
+#   (missing terms are zero, the terms must follow the order real, i, j, k)
+# - 'csv': one quaternion per line as delimited columns, with the scalar part first ('wxyz') or
+#   last ('xyzw'), possibly among other columns
+#
+# Files are read in blocks of about chunk_size characters, cut at the last newline, and every
+# block is parsed at once into an (N, 4) array (numpy's fromstring on the terms split by a
+# regular expression for 'text', numpy's loadtxt for 'csv'), so the memory needed is bounded by the size of a block.
+#
+# The writers use the shortest representation that round-trips (repr of floats), so reading a
+# written file gives back the same array; Quaternion.__str__ instead drops the components below
+# ACCURACY.
+
+import io
+import re
+import warnings
+import numpy as np
+from itertools import chain
+from typing import Iterator
+from batch import as_array
+
+ORDERS = ('wxyz', 'xyzw')
+
+_NUMBER = r'[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|inf|nan)'
+_TERMS = re.compile(rf'^({_NUMBER}(?![\d.eEijk]))?(?:({_NUMBER})i)?(?:({_NUMBER})j)?(?:({_NUMBER})k)?$',
+                    re.MULTILINE)
+_BLANKS = str.maketrans('', '', ' \t\r')
+
+
+## Auxiliary functions ##
+def __check_order(order:str):
+    '''Raises an exception if the column order is not valid.'''
+    if order not in ORDERS:
+        raise ValueError(f"invalid order `{order}`: it must be one of {ORDERS}")
+
+def __open(source, mode:str):
+    '''Returns the file object and whether it must be closed by the caller.'''
+    if isinstance(source, str):
+        return open(source, mode, newline=''), True
+    return source, False
+
+def __blocks(file, chunk_size:int) -> Iterator[str]:
+    '''Yields the content of the file in blocks of whole lines.'''
+    rest = ''
+    while True:
+        block = file.read(chunk_size)
+        if not block:
+            break
+        cut = block.rfind('\n') + 1
+        if not cut:
+            rest += block
+            continue
+        yield rest + block[:cut]
+        rest = block[cut:]
+    if rest:
+        yield rest
+
+
+def __parse_terms(text:str) -> np.ndarray:
+    '''Parses the lines (without blanks) in a few passes over the whole text: the terms are
+    split before their signs, the units are read from the last byte of every term and blanked,
+    and all the numbers are converted by numpy at once. Returns None if the text is not valid.'''
+    text = text.replace('+', ' +').replace('-', ' -')
+    for e in 'eE':
+        if e in text:
+            text = text.replace(e + ' +', e + '+').replace(e + ' -', e + '-')
+    data = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8).copy()
+    newline = data == 10
+    separator = newline | (data == 32)
+    ends = np.flatnonzero(~separator & np.append(separator[1:], True))
+
+    # unit of every term (0 real, 1 i, 2 j, 3 k) and its line; the units of a line must
+    # follow the order real, i, j, k
+    unit = data[ends].astype(np.intp) - ord('h')
+    unit[(unit < 1) | (unit > 3)] = 0
+    line = np.searchsorted(np.flatnonzero(newline), ends)
+    same = line[1:] == line[:-1]
+    if np.any(unit[1:][same] <= unit[:-1][same]):
+        return None
+
+    data[ends[unit > 0]] = 32
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            values = np.fromstring(data.tobytes(), sep=' ')
+    except (ValueError, DeprecationWarning):
+        return None
+    if values.size != ends.size:
+        return None
+
+    out = np.zeros((int(line[-1]) + 1 if line.size else 1, 4))
+    out[line, unit] = values
+    return out
+
+def parse_text(text:str, comments:str='#') -> np.ndarray:
+    '''Returns the (N, 4) array of the quaternions written one per line in the form "a+bi+cj+dk".
+
+    Blank lines and the text after the comments character are ignored.
+    '''
+    text = text.translate(_BLANKS)
+    if comments and comments in text:
+        text = re.sub(rf'{re.escape(comments)}[^\n]*', '', text)
+    text = re.sub(r'\n\n+', '\n', text).strip('\n')
+    if not text:
+        return np.empty((0, 4))
+
+    arr = __parse_terms(text)
+    if arr is not None:
+        return arr
+
+    # invalid text: the regular expression of a quaternion finds the offending line
+    for line in text.split('\n'):
+        if not _TERMS.fullmatch(line):
+            raise ValueError(f"invalid quaternion `{line}`")
+    raise ValueError("invalid quaternions")
+
+
+def parse_csv(text:str, order:str='wxyz', delimiter:str=',', columns=None, comments:str='#') -> np.ndarray:
+    '''Returns the (N, 4) array of the quaternions written one per line as delimited columns.
+
+    Arguments:
+    - text[str]: lines of the file (without header)
+    - order[str]: 'wxyz' if the scalar part comes first, 'xyzw' if it comes last
+    - delimiter[str]: separator of the columns
+    - columns: indices of the four columns of the components (in the given order); default
+    value is the first four columns
+    - comments[str]: the text after this character is ignored
+    '''
+    __check_order(order)
+    arr = np.loadtxt(io.StringIO(text), delimiter=delimiter, usecols=columns, comments=comments, ndmin=2)
+    if arr.size == 0:
+        return np.empty((0, 4))
+    if columns is None:
+        arr = arr[:, :4]
+    if arr.shape[1] != 4:
+        raise ValueError(f"expected 4 columns, got {arr.shape[1]}")
+
+    return arr[:, [3, 0, 1, 2]] if order == 'xyzw' else arr
+
+
+
+## Readers ##
+def iter_quaternions(source, fmt:str='auto', order:str='wxyz', delimiter:str=',', columns=None,
+                     skip_header:int=0, comments:str='#', chunk_size:int=1<<22) -> Iterator[np.ndarray]:
+    '''Yields the quaternions of a text file as (n, 4) arrays, one for each block of about
+    chunk_size characters, so that the memory needed does not depend on the size of the file.
+
+    Arguments:
+    - source: path or text file object
+    - fmt[str]: 'text', 'csv' or 'auto' (csv if the delimiter appears in the first line)
+    - order, delimiter, columns, comments: see parse_csv
+    - skip_header[int]: number of lines to skip at the beginning
+    - chunk_size[int]: number of characters read at once
+    '''
+    if fmt not in ('auto', 'text', 'csv'):
+        raise ValueError(f"invalid format `{fmt}`: it must be 'auto', 'text' or 'csv'")
+    __check_order(order)
+
+    file, owned = __open(source, 'r')
+    try:
+        for _ in range(skip_header):
+            file.readline()
+
+        for block in __blocks(file, chunk_size):
+            if fmt == 'auto':
+                first = next((line for line in block.split('\n', 64) if line.strip()), '')
+                fmt = 'csv' if delimiter in first else 'text'
+
+            if fmt == 'csv':
+                arr = parse_csv(block, order, delimiter, columns, comments)
+            else:
+                arr = parse_text(block, comments)
+            if arr.shape[0]:
+                yield arr
+    finally:
+        if owned:
+            file.close()
+
+
+def read_quaternions(source, fmt:str='auto', order:str='wxyz', delimiter:str=',', columns=None,
+                     skip_header:int=0, comments:str='#', chunk_size:int=1<<22) -> np.ndarray:
+    '''Returns the (N, 4) array of all the quaternions of a text file (see iter_quaternions).'''
+    blocks = list(iter_quaternions(source, fmt, order, delimiter, columns, skip_header, comments, chunk_size))
+    return np.concatenate(blocks) if blocks else np.empty((0, 4))
+
+
+
+## Writers ##
+def format_quaternions(H_points, fmt:str='text', order:str='wxyz', delimiter:str=',') -> str:
+    '''Returns the given quaternions as lines of text, at full precision: every component is
+    written (zeros included) with the shortest representation that reads back the same float.'''
+    __check_order(order)
+    arr = as_array(H_points)
+    if fmt == 'text':
+        template = '{}{:+}i{:+}j{:+}k\n'
+    elif fmt == 'csv':
+        template = delimiter.join(['{!r}']*4) + '\n'
+        if order == 'xyzw':
+            arr = arr[:, [1, 2, 3, 0]]
+    else:
+        raise ValueError(f"invalid format `{fmt}`: it must be 'text' or 'csv'")
+
+    return ''.join([template.format(*row) for row in arr.tolist()])
+
+
+def write_quaternions(dest, H_points, fmt:str='text', order:str='wxyz', delimiter:str=',',
+                      header:str|bool|None=None, chunk:int=65536):
+    '''Writes the given quaternions to a text file, chunk rows at a time.
+
+    Arguments:
+    - dest: path or text file object (opened for writing)
+    - H_points: iterable of quaternions, (N, 4) array or iterable of such arrays (for example
+    the generator returned by iter_quaternions)
+    - fmt, order, delimiter: see format_quaternions
+    - header[str]: first line of the file; with fmt='csv' and header=True, it is the names of
+    the columns in the given order
+    - chunk[int]: number of rows formatted at once
+    '''
+    if header is True:
+        header = delimiter.join(order)
+
+    if isinstance(H_points, np.ndarray):
+        blocks = (H_points,)
+    else:
+        H_points = iter(H_points)
+        first = next(H_points, None)
+        if isinstance(first, np.ndarray) and first.ndim == 2:
+            blocks = chain((first,), H_points)
+        else:
+            blocks = ([] if first is None else [first, *H_points],)
+
+    file, owned = __open(dest, 'w')
+    try:
+        if header is not None:
+            file.write(header + '\n')
+        for block in blocks:
+            block = as_array(block)
+            for start in range(0, block.shape[0], chunk):
+                file.write(format_quaternions(block[start:start + chunk], fmt, order, delimiter))
+    finally:
+        if owned:
+            file.close()
@@ -0,0 +1,163 @@
+# Attitude determination for python 3.10
+
+# Author:       Samuele Ferri (@ferrixio)
+# Licence:      MIT 2025
+
+# This file contains solvers of Wahba's problem: given the vectors r_i (reference frame), their
+# observations b_i (body frame) and weights w_i, find the rotation minimizing
+#           sum w_i |b_i - R r_i|^2.
+# The optimal versor is the eigenvector of the largest eigenvalue of a symmetric traceless 4x4
+# matrix K built from the weighted correlation of the vectors. The solvers differ in how they
+# find it: Davenport's q-method diagonalizes K, QUEST finds the eigenvalue by Newton's method on
+# the characteristic polynomial and Horn's method by the closed-form roots of the quartic.
+#
+# The returned versor q satisfies q.rotate_point(r_i) ~ b_i. All the solvers accept a single
+# problem, arrays of shape (N, 3), or a stack of P independent problems, arrays of shape
+# (P, N, 3), solved in one vectorized call.
+
+import numpy as np
+import batch
+from Quaternion import Versor
+
+
+## Auxiliary functions ##
+def __problems(ref, obs, weights) -> tuple[np.ndarray]:
+    '''Returns ref, obs with shape (P, N, 3), weights with shape (P, N) and whether the input
+    was a single problem.'''
+    ref, obs = np.asarray(ref, dtype=float), np.asarray(obs, dtype=float)
+    if ref.shape != obs.shape or ref.shape[-1] != 3 or ref.ndim not in (2, 3):
+        raise ValueError("ref and obs must be arrays of the same shape, (N, 3) or (P, N, 3)")
+
+    single = ref.ndim == 2
+    if single:
+        ref, obs = ref[None], obs[None]
+
+    if weights is None:
+        weights = np.ones(ref.shape[:2])
+    else:
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), ref.shape[:2])
+        if np.any(weights < 0):
+            raise ValueError("weights must be non-negative")
+    return ref, obs, weights, single
+
+def __davenport_matrix(ref:np.ndarray, obs:np.ndarray, weights:np.ndarray) -> np.ndarray:
+    '''Returns the (P, 4, 4) matrices K whose top eigenvector is the optimal versor.'''
+    S = np.einsum('pn,pni,pnj->pij', weights, obs, ref)
+    Sxx, Sxy, Sxz = S[:, 0, 0], S[:, 0, 1], S[:, 0, 2]
+    Syx, Syy, Syz = S[:, 1, 0], S[:, 1, 1], S[:, 1, 2]
+    Szx, Szy, Szz = S[:, 2, 0], S[:, 2, 1], S[:, 2, 2]
+
+    K = np.empty((S.shape[0], 4, 4))
+    K[:, 0] = np.stack((Sxx + Syy + Szz, Syz - Szy, Szx - Sxz, Sxy - Syx), axis=1)
+    K[:, 1, 1:] = np.stack((Sxx - Syy - Szz, Sxy + Syx, Szx + Sxz), axis=1)
+    K[:, 2, 2:] = np.stack((Syy - Sxx - Szz, Syz + Szy), axis=1)
+    K[:, 3, 3] = Szz - Sxx - Syy
+    i, j = np.tril_indices(4, -1)
+    K[:, i, j] = K[:, j, i]
+    return K
+
+def __coefficients(K:np.ndarray) -> tuple[np.ndarray]:
+    '''Returns (p, q, r) of the characteristic polynomial x^4 + p*x^2 + q*x + r of the
+    traceless matrices K.'''
+    K2 = K @ K
+    return (-0.5*np.trace(K2, axis1=1, axis2=2), -np.einsum('pij,pji->p', K2, K)/3,
+            np.linalg.det(K))
+
+def __eigenvector(K:np.ndarray, lam:np.ndarray) -> np.ndarray:
+    '''Returns the unitary eigenvectors of K for the eigenvalues lam, as the largest column of
+    the adjugate of K - lam*I (every non-zero column is an eigenvector).'''
+    M = K - lam[:, None, None]*np.eye(4)
+    rows = np.array([[r for r in range(4) if r != i] for i in range(4)])
+
+    # minors[p, i, j] = M without row i and column j
+    minors = M[:, rows[:, None, :, None], rows[None, :, None, :]]
+    signs = (-1.0)**np.add.outer(np.arange(4), np.arange(4))
+    adj = (signs * np.linalg.det(minors)).transpose(0, 2, 1)
+
+    best = np.argmax(np.einsum('pij,pij->pj', adj, adj), axis=1)
+    return batch.normalize(adj[np.arange(K.shape[0]), :, best])
+
+def __result(q:np.ndarray, single:bool, versors:bool):
+    '''Formats the result of a solver.'''
+    q = batch.canonical(q)
+    if not versors:
+        return q[0] if single else q
+    out = batch.to_quaternions(q, Versor)
+    return out[0] if single else out
+
+
+
+## Solvers ##
+def davenport(ref, obs, weights=None, versors:bool=True):
+    '''Davenport's q-method: eigendecomposition of the 4x4 symmetric matrix K.
+
+    Arguments:
+    - ref: reference vectors, array of shape (N, 3) or (P, N, 3)
+    - obs: observed vectors, same shape of ref
+    - weights: non-negative weights of shape (N,) or (P, N); default value is 1
+    - versors[bool]: if False, returns a (4,) or (P, 4) array instead of Versor objects
+    '''
+    ref, obs, weights, single = __problems(ref, obs, weights)
+    _, vectors = np.linalg.eigh(__davenport_matrix(ref, obs, weights))
+    return __result(vectors[:, :, -1], single, versors)
+
+
+def quest(ref, obs, weights=None, iterations:int=20, versors:bool=True):
+    '''QUEST: the largest eigenvalue of K is found by Newton's method on its characteristic
+    polynomial, starting from the sum of the weights (exact when the vectors are unitary and
+    perfectly consistent); the eigenvector follows from the adjugate of K - lambda*I.
+
+    Arguments: see davenport; iterations[int] is the maximum number of Newton steps.
+    '''
+    ref, obs, weights, single = __problems(ref, obs, weights)
+    K = __davenport_matrix(ref, obs, weights)
+    p, q, r = __coefficients(K)
+
+    # the sum of the weights times the norms is an upper bound of the largest eigenvalue, so
+    # the iteration decreases monotonically towards it (the polynomial is convex beyond it)
+    lam = np.einsum('pn,pn,pn->p', weights, np.linalg.norm(ref, axis=2), np.linalg.norm(obs, axis=2))
+    for _ in range(iterations):
+        f = ((lam*lam + p)*lam + q)*lam + r
+        df = (4*lam*lam + 2*p)*lam + q
+        step = np.divide(f, df, out=np.zeros_like(f), where=df > 0)
+        lam = lam - step
+        if np.all(np.abs(step) <= 1e-12*np.maximum(np.abs(lam), 1)):
+            break
+
+    return __result(__eigenvector(K, lam), single, versors)
+
+
+def horn(ref, obs, weights=None, center:bool=True, versors:bool=True):
+    '''Horn's closed-form solution of the absolute orientation of point sets (the quaternion
+    form of Kabsch's algorithm).
+
+    The largest root of the quartic x^4 + p*x^2 + q*x + r is (s1 + s2 + s3)/2, where s_k^2 are
+    the roots of the resolvent cubic z^3 + 2p*z^2 + (p^2 - 4r)*z - q^2 (found in closed form by
+    the trigonometric method) and the sign of the smallest s_k is the sign of -q.
+
+    Arguments: see davenport; with center=True the points are taken relative to their weighted
+    centroids, so the translation is mean(obs) - R*mean(ref).
+    '''
+    ref, obs, weights, single = __problems(ref, obs, weights)
+    if center:
+        total = np.sum(weights, axis=1)[:, None, None]
+        ref = ref - np.sum(weights[..., None]*ref, axis=1, keepdims=True)/total
+        obs = obs - np.sum(weights[..., None]*obs, axis=1, keepdims=True)/total
+
+    K = __davenport_matrix(ref, obs, weights)
+    p, q, r = __coefficients(K)
+
+    # Resolvent cubic z^3 + a*z^2 + b*z + c, with three real non-negative roots
+    a, b, c = 2*p, p*p - 4*r, -q*q
+    shift = -a/3
+    P = b - a*a/3
+    Q = 2*a**3/27 - a*b/3 + c
+    m = np.sqrt(np.maximum(-P/3, 0))
+    cosine = np.divide(3*Q, 2*P*m, out=np.zeros_like(Q), where=m > 0)
+    phi = np.arccos(np.clip(cosine, -1, 1))/3
+    z = shift[:, None] + 2*m[:, None]*np.cos(phi[:, None] - 2*np.pi*np.arange(3)/3)
+    s = np.sort(np.sqrt(np.maximum(z, 0)), axis=1)
+
+    s[:, 0] *= np.where(q > 0, -1.0, 1.0)
+    lam = np.sum(s, axis=1)/2
+    return __result(__eigenvector(K, lam), single, versors)